@@ -0,0 +1,137 @@
+"""
+Benchmark script for A2P_Cli.
+Compares output writers (encode time and size) and quantization methods (time and PSNR)
+on one or more sample images and prints a table.
+
+Usage:
+    python benchmark.py formats <image> [<image> ...] [--repeat N] [--qb BIT_COUNT]
+    python benchmark.py quantize <image> [<image> ...] [--repeat N] [--qb BIT_COUNT] [--dither 0 1 2 3]
+"""
+
+import argparse
+import io
+import sys
+import time
+import numpy as np
+from PIL import Image, ImageFilter
+
+from logic.config import METHOD_CHOICES
+from logic.quantize import NUMPY_METHODS, ORDERED_DITHERS, quantize_numpy
+from logic.writers import OUTPUT_WRITERS, write_image
+
+
+def _time_call(func, repeat):
+    """
+    Run func repeat times and return the best wall time in seconds together with the last result.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _print_table(headers, rows):
+    """
+    Print rows as a fixed-width text table.
+    """
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def bench_formats(images, repeat, qb):
+    """
+    Encode each image with every registered writer and report time and size.
+    Args:
+        images (list): Image paths.
+        repeat (int): Number of runs per writer (best time is reported).
+        qb (int or None): Quantize to 2**qb colors before encoding, like --qb_color.
+    """
+    rows = []
+    for path in images:
+        with Image.open(path) as src:
+            img = src.convert('RGBA' if 'A' in src.getbands() else 'RGB')
+        if qb:
+            img = img.convert('RGB').quantize(colors=2 ** qb, method=2, dither=1)
+        for name, writer in OUTPUT_WRITERS.items():
+            def encode():
+                buf = io.BytesIO()
+                write_image(img, buf, name)
+                return buf.getbuffer().nbytes
+            best, size = _time_call(encode, repeat)
+            rows.append((path, name, f"{best * 1000:.1f}", size, writer['encode_speed'], writer['size']))
+    _print_table(("image", "format", "encode_ms", "bytes", "declared_speed", "declared_size"), rows)
+
+
+def psnr(reference, test):
+    """
+    Peak signal-to-noise ratio in dB between two RGB images.
+    """
+    a = np.asarray(reference.convert('RGB'), dtype=np.float64)
+    b = np.asarray(test.convert('RGB'), dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def blurred_psnr(reference, test, radius=1.5):
+    """
+    PSNR after a Gaussian blur of both images, which approximates viewing distance:
+    dither patterns average out and only the tone error remains.
+    """
+    return psnr(reference.convert('RGB').filter(ImageFilter.GaussianBlur(radius)),
+                test.convert('RGB').filter(ImageFilter.GaussianBlur(radius)))
+
+
+def bench_quantize(images, repeat, qb, dithers):
+    """
+    Quantize each image with every method and dither setting and report time, PSNR and blurred PSNR.
+    Args:
+        images (list): Image paths.
+        repeat (int): Number of runs per measurement (best time is reported).
+        qb (int): Quantization bits (2**qb colors).
+        dithers (list): Dither settings to compare.
+    """
+    rows = []
+    for path in images:
+        with Image.open(path) as src:
+            img = src.convert('RGB')
+        for method in METHOD_CHOICES:
+            for dither in dithers:
+                if method in NUMPY_METHODS or dither in ORDERED_DITHERS:
+                    def run():
+                        return quantize_numpy(img, 2 ** qb, method=method, dither=dither)
+                else:
+                    def run():
+                        return img.quantize(colors=2 ** qb, method=method, dither=dither)
+                best, out = _time_call(run, repeat)
+                rows.append((path, f"{method} {METHOD_CHOICES[method]}", dither, f"{best * 1000:.1f}", f"{psnr(img, out):.2f}", f"{blurred_psnr(img, out):.2f}"))
+    _print_table(("image", "method", "dither", "ms", "psnr_db", "blurred_psnr_db"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A2P_Cli benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    formats = sub.add_parser("formats", help="Compare output writers")
+    formats.add_argument("images", nargs="+", help="Sample images")
+    formats.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+    formats.add_argument("--qb", type=int, choices=range(1, 9), metavar="BIT_COUNT", help="Quantize before encoding")
+    quant = sub.add_parser("quantize", help="Compare quantization methods (speed and PSNR)")
+    quant.add_argument("images", nargs="+", help="Sample images")
+    quant.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+    quant.add_argument("--qb", type=int, default=4, choices=range(1, 9), metavar="BIT_COUNT", help="Quantization bits (default: 4)")
+    quant.add_argument("--dither", type=int, nargs="+", default=[0, 1, 2, 3], help="Dither settings to compare (default: 0 1 2 3)")
+    args = parser.parse_args()
+    if args.command == "formats":
+        bench_formats(args.images, args.repeat, args.qb)
+    elif args.command == "quantize":
+        bench_quantize(args.images, args.repeat, args.qb, args.dither)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
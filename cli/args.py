@@ -1,16 +1,86 @@
 import argparse
+import sys
 from logic.logging_config import log_call
-from logic.config import DEFAULT_MAX_WORKERS
+from logic.sharding import parse_shard
+from logic.config import DEFAULT_MAX_WORKERS, FORMAT_CHOICES, INPUT_FORMAT_CHOICES, LOG_LEVEL_CHOICES
+from logic.logging_config import DEFAULT_LOG_LEVEL
+from logic.autotune import AUTO_WORKERS
+from logic.profiling import PROFILE_MODES, DEFAULT_PROFILE_MODE
+from logic.reader import READERS, DEFAULT_READER
+from logic.variants import OPTIONS_VARIANTS, VARIANT_KEYS, parse_variant
+
+def _input_formats_arg(value):
+    """
+    argparse type for --input_formats: validate comma separated decoder names.
+    """
+    names = [n.strip().lower() for n in value.split(',') if n.strip()]
+    unknown = [n for n in names if n not in INPUT_FORMAT_CHOICES]
+    if not names or unknown:
+        raise argparse.ArgumentTypeError(f"invalid input format(s) '{value}' (choose from {', '.join(INPUT_FORMAT_CHOICES)})")
+    return ','.join(names)
+
+def _shard_arg(value):
+    """
+    argparse type for --shard: validate 'K/N' and return it unchanged.
+    """
+    try:
+        parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+def _variant_arg(value):
+    """
+    argparse type for --variant: validate 'NAME[:key=value,...]' (or '@options') and return it unchanged.
+    """
+    if value == OPTIONS_VARIANTS:
+        return value
+    try:
+        parse_variant(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+def _max_workers_arg(value):
+    """
+    argparse type for --max_workers: a positive integer or 'auto'.
+    """
+    if value.lower() == AUTO_WORKERS:
+        return AUTO_WORKERS
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer or '{AUTO_WORKERS}', got '{value}'")
+    return count
+
+@log_call
+def parse_merge_args(argv):
+    """
+    Parse arguments of the 'merge' subcommand (combine per-shard result files).
+    Args:
+        argv (list): Arguments after 'merge'.
+    Returns:
+        dict: {'results': list of files/directories, 'output': str or None}
+    """
+    parser = argparse.ArgumentParser(prog="main.py merge", description="Merge per-shard result files into one summary.")
+    parser.add_argument("results", nargs="+", help="Result files, or directories containing a2p-results-*.json")
+    parser.add_argument("--output", type=str, default=None, help="Write the merged JSON here (default: print to stdout)")
+    return vars(parser.parse_args(argv))
 
 @log_call
 def parse_cli_args():
     """
     Parse command-line arguments for the A2P_Cli tool using argparse.
     Returns:
-        tuple: (mode, args_dict), where mode is one of 'meta', 'functional', or 'conversion'.
+        tuple: (mode, args_dict), where mode is one of 'functional', 'conversion' or 'merge'.
     Raises:
         SystemExit: If required arguments are missing or help/version is requested.
     """
+    if sys.argv[1:2] == ['merge']:
+        return 'merge', parse_merge_args(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawTextHelpFormatter,
         add_help=False  # Prevent argparse from adding its own help argument
@@ -20,7 +90,7 @@ def parse_cli_args():
     parser.add_argument('-h', '--help', action='help', default=argparse.SUPPRESS, help='Show this help message and exit')
 
     # === Mandatory ===
-    parser.add_argument("input_dir", type=str, nargs="?", help="Directory or file to convert (required unless --version)")
+    parser.add_argument("input_dir", type=str, nargs="?", help="Directory, .tar/.zip archive or file to convert (required unless --from_list);\nwith --from_list, the base for relative paths")
 
     # === Optional (Conversion/Operation Options) ===
     parser.add_argument("--output_dir", type=str, default=None, help="Directory to save .png files (default: same as input)")
@@ -30,10 +100,25 @@ def parse_cli_args():
     parser.add_argument("--qb_color", type=int, metavar="BIT_COUNT", help="Quantization bits for color images (1–8)")
     parser.add_argument("--qb_gray_color", type=int, metavar="BIT_COUNT", help="Quantization bits for grayscale+one images (1–8)")
     parser.add_argument("--qb_gray", type=int, metavar="BIT_COUNT", help="Quantization bits for grayscale images (1–8)")
-    parser.add_argument("--method", type=int, choices=[0, 1, 2], help="Quantization method: 0=Median Cut, 1=Max Coverage, 2=Fast Octree")
-    parser.add_argument("--dither", type=int, choices=[0, 1], help="Dither: 0=None, 1=Floyd-Steinberg")
+    parser.add_argument("--method", type=int, choices=[0, 1, 2, 3, 4], help="Quantization method: 0=Median Cut, 1=Max Coverage, 2=Fast Octree, 3=Wu (NumPy), 4=K-Means (NumPy)")
+    parser.add_argument("--dither", type=int, choices=[0, 1, 2, 3, 4], help="Dither: 0=None, 1=Floyd-Steinberg, 2=Bayer 8x8, 3=Blue noise, 4=Bayer 4x4")
+    parser.add_argument("--format", dest="output_format", type=str.lower, choices=list(FORMAT_CHOICES), help="Output format: " + ", ".join(FORMAT_CHOICES) + " (default: png)")
+    parser.add_argument("--input_formats", type=_input_formats_arg, metavar="FORMATS", help="Comma separated input formats: " + ", ".join(INPUT_FORMAT_CHOICES) + " (default: avif)")
+    parser.add_argument("--reader", choices=list(READERS), help="How input files are read: read (one bulk read per file), mmap (memory-mapped)\nor path (the decoder reads the file itself) (default: " + DEFAULT_READER + ")")
     parser.add_argument("--chk_bit", action="store_true", help="Check and display real bit depth for each converted image or file.")
-    parser.add_argument("--max_workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"Number of threads for parallel conversion (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--output_archive", type=str, metavar="FILE", help="Write all converted files into a .tar/.tar.gz/.zip archive instead of single files")
+    parser.add_argument("--from_list", type=str, metavar="FILE", help="Convert the files listed in FILE ('-' for stdin): one path per line or NDJSON records\nwith 'input', optional 'output' and qb_*/method/dither/output_format overrides.\nSkips the directory walk.")
+    parser.add_argument("--shard", type=_shard_arg, metavar="K/N", help="Convert only shard K of N (stable hash of the relative path)")
+    parser.add_argument("--worker_id", type=str, help="Name used in this run's result file (default: shard or host-pid)")
+    parser.add_argument("--results", type=str, metavar="FILE", help="Write this run's result/metrics JSON to FILE (default with --shard/--worker_id: a2p-results-<worker_id>.json in the output directory)")
+    parser.add_argument("--variant", type=_variant_arg, action="append", metavar="NAME[:KEY=VALUE,...]", help="Write every file once per variant into <output_dir>/NAME, decoding it only once (repeatable).\nKeys: " + ", ".join(VARIANT_KEYS) + "; e.g. --variant full --variant q4:qb_color=4\n--variant proof:grayscale=true. '--variant @options' uses the [VARIANTS] section of options.ini\n(written by --save).")
+    parser.add_argument("--plan", type=str, metavar="FILE", help="Dry run: read only image headers and write a plan (.json or .csv) with dimensions,\ndestinations, collisions and a time estimate; nothing is converted")
+    parser.add_argument("--analyze", type=str, metavar="FILE", help="Analysis only: decode and classify every file in parallel and write one NDJSON record per file\n(dimensions, class, colours, alpha, suggested qb_*) to FILE ('-' for stdout), plus an\naggregate histogram to FILE.summary.json; nothing is converted")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_MODE, choices=list(PROFILE_MODES), metavar="MODE", help="Profile every conversion task of a directory run: cprofile (default, .pstats) or sample (collapsed stacks)")
+    parser.add_argument("--profile_file", type=str, metavar="FILE", help="Where to write the merged profile (default: a2p-profile.pstats/.collapsed in the output directory)")
+    parser.add_argument("--log_level", type=str.upper, choices=list(LOG_LEVEL_CHOICES), help="Log file level: " + ", ".join(LOG_LEVEL_CHOICES) + f" (default: {DEFAULT_LOG_LEVEL})")
+    parser.add_argument("--log_json", action="store_true", help="Write the log file as JSON lines")
+    parser.add_argument("--max_workers", type=_max_workers_arg, default=DEFAULT_MAX_WORKERS, help=f"Number of worker processes for parallel conversion, or 'auto' to size from CPUs/memory\nand tune the tasks in flight while running (default: {DEFAULT_MAX_WORKERS})")
 
     # === Functional Options ===
     parser.add_argument("--save", action="store_true", help="Save current CLI options to the [CLI] block in options.ini and exit.")
@@ -47,6 +132,6 @@ def parse_cli_args():
     # Only 'functional' and 'conversion' modes remain
     if args_dict.get('save') or args_dict.get('options'):
         return 'functional', args_dict
-    if args.input_dir:
+    if args.input_dir or args.from_list:
         return 'conversion', args_dict
-    parser.error("the following arguments are required: input_dir")
+    parser.error("the following arguments are required: input_dir (or --from_list)")
@@ -1,9 +1,17 @@
-from logic.options_io import load_options, save_options
+from logic.options_io import load_options, save_options, load_variants, save_variants
 from cli.args import parse_cli_args
-from logic.convert import convert_avif_to_png, get_real_bit_count
+from logic.convert import convert_avif_to_png, convert_job_list, convert_archive, get_real_bit_count
+from logic.archives import is_input_archive
+from logic.planner import build_plan, write_plan, append_metrics
+from logic.reader import DEFAULT_READER
+from logic.analyze import analyze_tree, summary_path
+from logic.sharding import parse_shard, default_worker_id, results_path, write_results, merge_results
+from logic.variants import OPTIONS_VARIANTS, parse_variants
 from pathlib import Path
 from PIL import Image
+import json
 import sys
+import time
 from logic.logging_config import log_call
 
 @log_call
@@ -21,12 +29,32 @@ def handle_save_logic(args):
         save_dict = {k: v for k, v in args.items() if k not in ('save', 'options')}
         save_options('CLI', save_dict)
         print("[INFO] CLI options saved to [CLI] block in options.ini.")
+        if args.get('variant'):
+            save_variants(expand_variant_specs(args['variant']))
+            print(f"[INFO] {len(args['variant'])} variants saved to [VARIANTS] block in options.ini.")
         sys.exit(0)
 
+def expand_variant_specs(specs):
+    """
+    Replace '@options' in a list of --variant specs with the [VARIANTS] section of options.ini.
+    """
+    expanded = []
+    for spec in specs:
+        if spec == OPTIONS_VARIANTS:
+            saved = load_variants()
+            if not saved:
+                raise ValueError("--variant @options: options.ini has no [VARIANTS] section")
+            expanded.extend(saved)
+        else:
+            expanded.append(spec)
+    return expanded
+
 @log_call
 def handle_bit_check(args):
+    if not args.get('input_dir'):
+        return
     input_path = Path(args['input_dir'])
-    if input_path.is_file() and args.get('chk_bit', False):
+    if input_path.is_file() and not is_input_archive(input_path) and args.get('chk_bit', False):
         try:
             with Image.open(input_path) as img:
                 n_colors, bit_count = get_real_bit_count(img)
@@ -36,31 +64,208 @@ def handle_bit_check(args):
         sys.exit(0)
 
 @log_call
-def run_conversion(args):
-    result = convert_avif_to_png(
+def write_run_results(args, result, elapsed):
+    """
+    Write the result/metrics file of this run when sharding or a worker id/results path is set.
+    """
+    shard = parse_shard(args.get('shard'))
+    if not (shard or args.get('worker_id') or args.get('results')):
+        return
+    worker_id = args.get('worker_id') or default_worker_id(shard)
+    path = args.get('results') or results_path(args.get('output_dir') or args.get('input_dir') or '.', worker_id)
+    record = {
+        "worker_id": worker_id,
+        "shard": f"{shard[0]}/{shard[1]}" if shard else None,
+        "input_dir": args.get('input_dir'),
+        "from_list": args.get('from_list'),
+        "files": result.get('success', 0) + result.get('fail', 0),
+        "success": result.get('success', 0),
+        "fail": result.get('fail', 0),
+        "failed_files": result.get('failed_files', []),
+        "elapsed_seconds": round(elapsed, 3),
+    }
+    if result.get('read_bytes_per_second'):
+        record["read_bytes_per_second"] = result['read_bytes_per_second']
+    if result.get('workers'):
+        record["workers"] = result['workers']
+    write_results(path, record)
+    if not args['silent']:
+        print(f"[INFO] Results written to {path}")
+
+@log_call
+def run_merge(args):
+    merged = merge_results(args['results'])
+    text = json.dumps(merged, indent=2)
+    if args.get('output'):
+        with open(args['output'], 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Merged {len(merged['workers'])} result files. Success: {merged['success']}, Failed: {merged['fail']}")
+    else:
+        print(text)
+    for problem in merged['problems']:
+        print(f"[WARN] {problem}")
+
+@log_call
+def run_plan(args):
+    if args.get('from_list') or is_input_archive(args['input_dir']):
+        print("[ERROR] --plan works on input directories only.")
+        sys.exit(1)
+    plan = build_plan(
         args['input_dir'],
         output_dir=args['output_dir'],
-        remove=args['remove'],
         recursive=args['recursive'],
-        silent=args['silent'],
-        qb_color=args['qb_color'],
-        qb_gray_color=args['qb_gray_color'],
-        qb_gray=args['qb_gray'],
-        method=args['method'],
-        dither=args['dither'],
-        chk_bit=args['chk_bit'],
-        progress_printer=print,
-        max_workers=args.get('max_workers', 4)
+        max_workers=args.get('max_workers', 4),
+        output_format=args.get('output_format'),
+        input_formats=args.get('input_formats'),
+        shard=args.get('shard'),
     )
+    write_plan(plan, args['plan'])
+    summary = plan['summary']
+    estimate = summary['estimate']
+    basis = f"calibrated on {estimate['runs']} past runs" if estimate['calibrated'] else "uncalibrated, no past runs recorded"
+    print(f"Plan written to {args['plan']}: {summary['files']} files, {summary['bytes'] / 1e6:.1f} MB, {summary['megapixels']} MP")
+    print(f"Estimated time: {estimate['seconds']} s with {estimate['processes']} workers ({basis})")
+    if summary['unreadable']:
+        print(f"[WARN] {summary['unreadable']} files have unreadable headers")
+    if summary['existing_outputs']:
+        print(f"[WARN] {summary['existing_outputs']} outputs already exist and would be overwritten")
+    for dest, inputs in list(plan['collisions'].items())[:10]:
+        print(f"[WARN] Collision: {', '.join(inputs)} -> {dest}")
+    if len(plan['collisions']) > 10:
+        print(f"[WARN] ... {len(plan['collisions']) - 10} more collisions (see plan file)")
+
+@log_call
+def run_analyze(args):
+    if args.get('from_list') or is_input_archive(args['input_dir']):
+        print("[ERROR] --analyze works on input directories only.")
+        sys.exit(1)
+    # With '-' the records go to stdout, so everything else goes to stderr
+    out = sys.stderr if args['analyze'] == '-' else sys.stdout
+    summary = analyze_tree(
+        args['input_dir'],
+        args['analyze'],
+        recursive=args['recursive'],
+        max_workers=args.get('max_workers', 4),
+        input_formats=args.get('input_formats'),
+        shard=args.get('shard'),
+    )
+    if args['silent']:
+        return
+    print(f"Analyzed {summary['files']} files ({summary['megapixels']} MP) in {summary['elapsed_seconds']} s, "
+          f"{summary['files_per_second']} files/s, {summary['errors']} errors", file=out)
+    print("Classes: " + ", ".join(f"{k} {v}" for k, v in summary['classes'].items()), file=out)
+    print("Alpha: " + ", ".join(f"{k} {v}" for k, v in summary['alpha'].items()), file=out)
+    for option, counts in summary['suggested'].items():
+        print(f"Suggested {option}: " + ", ".join(f"{k} bits {v}" if k != 'none' else f"full colour {v}" for k, v in counts.items()), file=out)
+    path = summary_path(args['analyze'])
+    if path is not None:
+        print(f"Records written to {args['analyze']}, histogram to {path}", file=out)
+
+@log_call
+def run_conversion(args):
+    start_time = time.time()
+    try:
+        variants = parse_variants(expand_variant_specs(args['variant'])) if args.get('variant') else None
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    if variants and (args.get('from_list') or args.get('output_archive') or is_input_archive(args['input_dir'])):
+        print("[ERROR] --variant works on input directories only.")
+        sys.exit(1)
+    if args.get('from_list'):
+        result = convert_job_list(
+            args['from_list'],
+            input_dir=args.get('input_dir'),
+            output_dir=args['output_dir'],
+            remove=args['remove'],
+            silent=args['silent'],
+            qb_color=args['qb_color'],
+            qb_gray_color=args['qb_gray_color'],
+            qb_gray=args['qb_gray'],
+            method=args['method'],
+            dither=args['dither'],
+            chk_bit=args['chk_bit'],
+            output_format=args.get('output_format'),
+            reader=args.get('reader'),
+            shard=args.get('shard'),
+            max_workers=args.get('max_workers', 4)
+        )
+    elif args.get('output_archive') or is_input_archive(args['input_dir']):
+        result = convert_archive(
+            args['input_dir'],
+            output_dir=args['output_dir'],
+            output_archive=args.get('output_archive'),
+            remove=args['remove'],
+            recursive=args['recursive'],
+            silent=args['silent'],
+            qb_color=args['qb_color'],
+            qb_gray_color=args['qb_gray_color'],
+            qb_gray=args['qb_gray'],
+            method=args['method'],
+            dither=args['dither'],
+            chk_bit=args['chk_bit'],
+            output_format=args.get('output_format'),
+            reader=args.get('reader'),
+            input_formats=args.get('input_formats'),
+            shard=args.get('shard'),
+            max_workers=args.get('max_workers', 4)
+        )
+    else:
+        result = convert_avif_to_png(
+            args['input_dir'],
+            output_dir=args['output_dir'],
+            remove=args['remove'],
+            recursive=args['recursive'],
+            silent=args['silent'],
+            qb_color=args['qb_color'],
+            qb_gray_color=args['qb_gray_color'],
+            qb_gray=args['qb_gray'],
+            method=args['method'],
+            dither=args['dither'],
+            chk_bit=args['chk_bit'],
+            output_format=args.get('output_format'),
+            reader=args.get('reader'),
+            input_formats=args.get('input_formats'),
+            shard=args.get('shard'),
+            profile=args.get('profile'),
+            profile_file=args.get('profile_file'),
+            variants=variants,
+            progress_printer=print,
+            max_workers=args.get('max_workers', 4)
+        )
+    elapsed = time.time() - start_time
+    write_run_results(args, result, elapsed)
+    if result.get('input_bytes') and result.get('success'):
+        workers = result.get('workers')
+        append_metrics({
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "files": result['success'] + result['fail'],
+            "input_bytes": result['input_bytes'],
+            "elapsed_seconds": round(elapsed, 3),
+            "processes": workers['processes'] if workers else args.get('max_workers', 4),
+            "output_format": args.get('output_format') or 'png',
+            "method": args.get('method'),
+            "reader": args.get('reader') or DEFAULT_READER,
+            "read_bytes_per_second": result.get('read_bytes_per_second'),
+        })
     if not args['silent']:
         if result is not None and isinstance(result, dict):
             print(f"Conversion finished. Success: {result.get('success', 0)}, Failed: {result.get('fail', 0)}")
+            workers = result.get('workers')
+            if workers:
+                print(f"Workers: auto -> {workers['processes']} processes (CPUs: {workers['cpus']}, memory limit: {workers['memory_limit']}), "
+                      f"{workers['window']} tasks in flight (best: {workers['best_window']} at {workers['best_rate']} files/s)")
+            if result.get('profile_file'):
+                print(f"Profile written to {result['profile_file']}")
         else:
             print("Conversion finished.")
 
 @log_call
 def run():
     mode, args = parse_cli_args()
+    if mode == 'merge':
+        run_merge(args)
+        return
     if mode == 'functional':
         # Functional logic (save/options) can be handled here if needed
         handle_save_logic(args)
@@ -70,5 +275,11 @@ def run():
         # Proceed with conversion logic
         args = handle_options_logic(args)
         handle_save_logic(args)
+        if args.get('plan'):
+            run_plan(args)
+            return
+        if args.get('analyze'):
+            run_analyze(args)
+            return
         handle_bit_check(args)
         run_conversion(args)
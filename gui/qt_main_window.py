@@ -4,12 +4,15 @@ from PyQt5.QtWidgets import (
     QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, QGroupBox, QFileDialog, QMessageBox, QProgressBar, QStatusBar
 )
 from PyQt5.QtCore import pyqtSignal, Qt, QThread
-from PyQt5.QtGui import QIcon
+from PyQt5.QtGui import QIcon, QImage, QPixmap
 import time
 import os
 from logic.convert import convert_avif_to_png
 from logic.config import OPTIONS_DEFAULTS, DEFAULT_MAX_WORKERS
+from logic.autotune import AUTO_WORKERS
+from logic.decoders import DECODERS
 from logic.options_io import save_options, load_options
+from logic.preview import PREVIEW_MAX_SIDE, load_preview, render_preview
 
 class ConversionThread(QThread):
     progress = pyqtSignal(int)
@@ -37,15 +40,44 @@ class ConversionThread(QThread):
                 method=self.options.get("method"),
                 dither=self.options.get("dither"),
                 max_workers=self.options.get("max_workers"),
+                profile=self.options.get("profile"),
                 progress_callback=progress_callback
             )
             elapsed = time.time() - start_time
             num_files = result.get("success", 0)
             msg = f"Conversion complete in {elapsed:.2f} seconds.\n{num_files} files converted total."
+            if result.get("workers"):
+                msg += f"\nAuto workers: {result['workers']['processes']} processes, {result['workers']['window']} tasks in flight."
+            if result.get("profile_file"):
+                msg += f"\nProfile written to {result['profile_file']}"
             self.finished.emit(msg)
         except Exception as e:
             self.error.emit(str(e))
 
+class PreviewThread(QThread):
+    image_ready = pyqtSignal(QImage)
+    stats_ready = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, path, options):
+        super().__init__()
+        self.path = path
+        self.options = options
+
+    def run(self):
+        try:
+            source = load_preview(self.path)
+
+            def on_image(img):
+                # QImage (unlike QPixmap) may be built off the UI thread; copy() detaches it from img's buffer
+                data = img.tobytes()
+                self.image_ready.emit(QImage(data, img.width, img.height, 4 * img.width, QImage.Format_RGBA8888).copy())
+
+            result = render_preview(source, self.options, on_image=on_image)
+            self.stats_ready.emit(dict(result, image=None, width=source['width'], height=source['height'], image_class=source['class']))
+        except Exception as e:
+            self.error.emit(str(e))
+
 class MainWindow(QMainWindow):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -56,6 +88,9 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("A2P")
         self.options = OPTIONS_DEFAULTS.copy()
         self.thread = None
+        self.preview_path = None
+        self.preview_thread = None
+        self.preview_pending = False
         self._setup_ui()
         self.setFixedSize(self.sizeHint())
         # Remove status bar size grip (dotted thing in bottom right)
@@ -105,8 +140,11 @@ class MainWindow(QMainWindow):
         options_layout.setAlignment(Qt.AlignLeft)
         self.remove_chk = QCheckBox("Remove originals")
         self.recursive_chk = QCheckBox("Recursive")
+        self.profile_chk = QCheckBox("Profile")
+        self.profile_chk.setToolTip("Profile every conversion task and write a merged a2p-profile.pstats to the output directory")
         options_layout.addWidget(self.remove_chk)
         options_layout.addWidget(self.recursive_chk)
+        options_layout.addWidget(self.profile_chk)
         layout.addLayout(options_layout)
         # --- Quantization GroupBox ---
         quant_group = QGroupBox("Quantization:")
@@ -128,16 +166,16 @@ class MainWindow(QMainWindow):
         for label, value in quant_choices:
             self.qb_color_combo.addItem(label, value)
         quant_layout.addRow(QLabel("Color"), self.qb_color_combo)
-        # Method (0=Median Cut, 1=Max Coverage, 2=Fast Octree)
+        # Method (0=Median Cut, 1=Max Coverage, 2=Fast Octree, 3=Wu, 4=K-Means)
         self.method_combo = QComboBox()
-        method_choices = [("Median Cut", 0), ("Max Coverage", 1), ("Fast Octree", 2)]
+        method_choices = [("Median Cut", 0), ("Max Coverage", 1), ("Fast Octree", 2), ("Wu (NumPy)", 3), ("K-Means (NumPy)", 4)]
         for label, value in method_choices:
             self.method_combo.addItem(label, value)
         self.method_label = QLabel("Method:")
         quant_layout.addRow(self.method_label, self.method_combo)
-        # Dither (0=None, 1=Floyd-Steinberg)
+        # Dither (0=None, 1=Floyd-Steinberg, 2=Bayer 8x8, 3=Blue noise, 4=Bayer 4x4)
         self.dither_combo = QComboBox()
-        dither_choices = [("None", 0), ("Floyd-Steinberg", 1)]
+        dither_choices = [("None", 0), ("Floyd-Steinberg", 1), ("Bayer 8x8", 2), ("Blue noise", 3), ("Bayer 4x4", 4)]
         for label, value in dither_choices:
             self.dither_combo.addItem(label, value)
         self.dither_label = QLabel("Dither:")
@@ -165,10 +203,32 @@ class MainWindow(QMainWindow):
         self.qb_gray_color_combo.currentIndexChanged.connect(update_method_dither_visibility)
         self.qb_color_combo.currentIndexChanged.connect(update_method_dither_visibility)
         update_method_dither_visibility()
+        # --- Preview GroupBox ---
+        preview_group = QGroupBox("Preview:")
+        preview_layout = QVBoxLayout()
+        preview_layout.setContentsMargins(8, 16, 8, 8)
+        preview_file_row = QHBoxLayout()
+        self.preview_file_label = QLabel("No file selected")
+        preview_browse = QPushButton("File...")
+        preview_browse.clicked.connect(self._select_preview_file)
+        preview_file_row.addWidget(self.preview_file_label, 1)
+        preview_file_row.addWidget(preview_browse)
+        preview_layout.addLayout(preview_file_row)
+        self.preview_image = QLabel()
+        self.preview_image.setFixedSize(PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE)
+        self.preview_image.setAlignment(Qt.AlignCenter)
+        preview_layout.addWidget(self.preview_image, 0, Qt.AlignCenter)
+        self.preview_stats = QLabel("")
+        preview_layout.addWidget(self.preview_stats)
+        preview_group.setLayout(preview_layout)
+        layout.addWidget(preview_group)
+        # Re-render the preview whenever a quantization option changes
+        for combo in (self.qb_gray_combo, self.qb_gray_color_combo, self.qb_color_combo, self.method_combo, self.dither_combo):
+            combo.currentIndexChanged.connect(self._schedule_preview)
         # Max Workers
         maxw_layout = QHBoxLayout()
         self.maxw_edit = QLineEdit()
-        self.maxw_edit.setPlaceholderText(f"Threads (default: {DEFAULT_MAX_WORKERS})")
+        self.maxw_edit.setPlaceholderText(f"Threads or 'auto' (default: {DEFAULT_MAX_WORKERS})")
         maxw_layout.addWidget(QLabel("Threads:"))
         maxw_layout.addWidget(self.maxw_edit)
         layout.addLayout(maxw_layout)
@@ -210,19 +270,65 @@ class MainWindow(QMainWindow):
         if path:
             self.output_edit.setText(path)
 
+    def _select_preview_file(self):
+        patterns = " ".join(f"*{ext}" for dec in DECODERS.values() for ext in dec['extensions'])
+        path, _ = QFileDialog.getOpenFileName(self, "Select Preview File", self.input_edit.text().strip(), f"Images ({patterns});;All files (*)")
+        if path:
+            self.preview_path = path
+            self.preview_file_label.setText(os.path.basename(path))
+            self._schedule_preview()
+
+    def _schedule_preview(self):
+        # One render at a time; changes made meanwhile are coalesced into one more render
+        if not self.preview_path:
+            return
+        if self.preview_thread is not None and self.preview_thread.isRunning():
+            self.preview_pending = True
+            return
+        self.preview_pending = False
+        opts = self._gather_options()
+        options = {k: opts.get(k) for k in ("qb_color", "qb_gray_color", "qb_gray", "method", "dither", "output_format")}
+        self.preview_thread = PreviewThread(self.preview_path, options)
+        self.preview_thread.image_ready.connect(self._on_preview_image)
+        self.preview_thread.stats_ready.connect(self._on_preview_stats)
+        self.preview_thread.error.connect(self._on_preview_error)
+        self.preview_thread.finished.connect(self._on_preview_finished)
+        self.preview_thread.start()
+
+    def _on_preview_image(self, image):
+        self.preview_image.setPixmap(QPixmap.fromImage(image))
+
+    def _on_preview_stats(self, stats):
+        self.preview_stats.setText(
+            f"{stats['width']}x{stats['height']} {stats['image_class']}: ~{stats['projected_bytes'] / 1024:.0f} KiB, "
+            f"~{stats['projected_seconds'] * 1000:.0f} ms to quantize and encode (preview: {stats['seconds'] * 1000:.0f} ms)"
+        )
+
+    def _on_preview_error(self, err):
+        self.preview_image.clear()
+        self.preview_stats.setText("Preview failed: " + err)
+
+    def _on_preview_finished(self):
+        if self.preview_pending:
+            self._schedule_preview()
+
     def _gather_options(self):
         opts = self.options.copy()
         opts["input_dir"] = self.input_edit.text().strip()
         opts["output_dir"] = self.output_edit.text().strip() or None
         opts["remove"] = self.remove_chk.isChecked()
         opts["recursive"] = self.recursive_chk.isChecked()
+        opts["profile"] = "cprofile" if self.profile_chk.isChecked() else None
         # Quantization as int or None
         opts["qb_color"] = self.qb_color_combo.currentData()
         opts["qb_gray_color"] = self.qb_gray_color_combo.currentData()
         opts["qb_gray"] = self.qb_gray_combo.currentData()
         opts["method"] = self.method_combo.currentData()
         opts["dither"] = self.dither_combo.currentData()
-        # Max workers (threads)
+        # Max workers (threads), or 'auto'
+        if self.maxw_edit.text().strip().lower() == AUTO_WORKERS:
+            opts["max_workers"] = AUTO_WORKERS
+            return opts
         try:
             mw = int(self.maxw_edit.text())
             if mw > 0:
@@ -320,4 +426,6 @@ class MainWindow(QMainWindow):
         if self.thread is not None and hasattr(self.thread, "isRunning") and self.thread.isRunning():
             self.thread.quit()
             self.thread.wait()
+        if self.preview_thread is not None and self.preview_thread.isRunning():
+            self.preview_thread.wait()
         event.accept()
@@ -0,0 +1,199 @@
+"""
+This module implements the --analyze mode of A2P_Cli: corpus statistics without writing any image.
+Files are decoded and classified in parallel, exactly as a conversion would see them, and each
+file's dimensions, class, distinct colour count, alpha usage and suggested qb_* setting are
+streamed as NDJSON. An aggregate histogram of the whole tree is written next to it.
+"""
+
+import concurrent.futures
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from logic.convert import EXACT_PALETTE_MAX, classify_image_type, count_colors, drop_redundant_alpha, stream_to_pool, worker_plan
+from logic.decoders import find_input_files, open_image, sniff_decoder, usable_input_formats
+from logic.logging_config import log_call, worker_logging_kwargs
+from logic.sharding import parse_shard, select_shard
+
+# Files analyzed per worker task (amortizes inter-process overhead on large corpora)
+ANALYZE_BATCH = 16
+
+# qb_* option that applies to each image class
+CLASS_QB_OPTIONS = {
+    'color': 'qb_color',
+    'grayscale': 'qb_gray',
+    'grayscale+one': 'qb_gray_color',
+}
+
+
+def analyze_image(img):
+    """
+    Describe an opened image the way convert_single_image classifies it.
+    The suggested bit count is the smallest one that still holds every colour (plus one
+    transparent entry for binary alpha), i.e. the exact, lossless palette; None above 256 entries.
+    Args:
+        img (PIL.Image): Opened image.
+    Returns:
+        dict: width, height, mode, class, alpha, colors, bits and suggested ({qb option: bits or None}).
+    """
+    width, height, mode = img.width, img.height, img.mode
+    img, alpha = drop_redundant_alpha(img)
+    img_type = classify_image_type(img)
+    mask = np.asarray(img.getchannel('A')) != 0 if alpha == 'binary' else None
+    counted = img.convert('L') if img_type != 'color' else img
+    colors = count_colors(counted, mask)
+    entries = colors + (1 if alpha == 'binary' else 0)
+    bits = max(1, math.ceil(math.log2(entries))) if entries > 1 else 1
+    return {
+        'width': width,
+        'height': height,
+        'mode': mode,
+        'class': img_type,
+        'alpha': alpha,
+        'colors': colors,
+        'bits': bits,
+        'suggested': {CLASS_QB_OPTIONS[img_type]: bits if entries <= EXACT_PALETTE_MAX else None},
+    }
+
+
+def analyze_file(path):
+    """
+    Analyze one file; errors are reported in the record instead of raised.
+    Returns:
+        dict: {'input', 'decoder', 'bytes', ...analyze_image fields} or {'input', 'error'}.
+    """
+    record = {'input': str(path)}
+    try:
+        record['decoder'] = sniff_decoder(path)
+        record['bytes'] = Path(path).stat().st_size
+        with open_image(path) as img:
+            record.update(analyze_image(img))
+    except Exception as e:
+        logging.error(f"Analyze failed for {path}: {e}")
+        record['error'] = str(e)
+    return record
+
+
+def analyze_batch(paths):
+    """
+    Worker function: analyze a batch of files.
+    """
+    return [analyze_file(p) for p in paths]
+
+
+class AnalysisSummary:
+    """
+    Aggregate histogram of analysis records.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.errors = 0
+        self.pixels = 0
+        self.bytes = 0
+        self.classes = {}
+        self.alpha = {}
+        self.color_bits = {}
+        self.suggested = {}
+
+    def add(self, record):
+        self.files += 1
+        if 'error' in record:
+            self.errors += 1
+            return
+        self.pixels += record['width'] * record['height']
+        self.bytes += record['bytes']
+        img_type = record['class']
+        self.classes[img_type] = self.classes.get(img_type, 0) + 1
+        self.alpha[record['alpha']] = self.alpha.get(record['alpha'], 0) + 1
+        # Bits needed for every distinct colour, per class (up to 24 for full colour)
+        bits = self.color_bits.setdefault(img_type, {})
+        bits[record['bits']] = bits.get(record['bits'], 0) + 1
+        for option, value in record['suggested'].items():
+            counts = self.suggested.setdefault(option, {})
+            key = 'none' if value is None else value
+            counts[key] = counts.get(key, 0) + 1
+
+    def to_dict(self, elapsed):
+        def ordered(counts):
+            return {str(k): counts[k] for k in sorted(counts, key=lambda k: (isinstance(k, str), k))}
+
+        return {
+            'files': self.files,
+            'errors': self.errors,
+            'megapixels': round(self.pixels / 1e6, 1),
+            'bytes': self.bytes,
+            'classes': self.classes,
+            'alpha': self.alpha,
+            'color_bits': {k: ordered(v) for k, v in self.color_bits.items()},
+            'suggested': {k: ordered(v) for k, v in self.suggested.items()},
+            'elapsed_seconds': round(elapsed, 3),
+            'files_per_second': round(self.files / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def summary_path(output):
+    """
+    Return the aggregate file written next to an NDJSON output (None for stdout).
+    """
+    if output == '-':
+        return None
+    path = Path(output)
+    return path.with_name(path.stem + '.summary.json')
+
+
+@log_call
+def analyze_tree(input_dir, output, recursive=False, max_workers=4, progress_callback=None, **kwargs):
+    """
+    Analyze every input file of a directory in parallel without writing any image.
+    Args:
+        input_dir (str): Input directory.
+        output (str): NDJSON file for the per-file records, or '-' for stdout.
+        recursive (bool): Search subdirectories.
+        max_workers (int or 'auto'): Number of worker processes.
+        progress_callback (callable, optional): Called as progress_callback(done, total).
+        **kwargs: input_formats and shard (as for convert_avif_to_png).
+    Returns:
+        dict: Aggregate summary (also written to summary_path(output)).
+    """
+    started = time.time()
+    input_path = Path(input_dir)
+    if not input_path.is_dir():
+        raise FileNotFoundError(f"Input directory '{input_dir}' does not exist.")
+    input_formats = usable_input_formats(kwargs.get('input_formats'))
+    files = find_input_files(input_path, recursive, input_formats) if input_formats else []
+    files = select_shard(files, input_path, parse_shard(kwargs.get('shard')))
+    summary = AnalysisSummary()
+    stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')
+
+    def tasks():
+        for i in range(0, len(files), ANALYZE_BATCH):
+            batch = [str(f) for f in files[i:i + ANALYZE_BATCH]]
+            yield analyze_batch, batch, batch
+
+    def on_result(batch, records):
+        if not records:
+            records = [{'input': p, 'error': 'worker failed'} for p in batch]
+        for record in records:
+            record['input'] = Path(record['input']).relative_to(input_path).as_posix()
+            stream.write(json.dumps(record) + '\n')
+            summary.add(record)
+        if progress_callback:
+            progress_callback(summary.files, len(files))
+
+    try:
+        processes, window, _ = worker_plan(max_workers, files)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes, **worker_logging_kwargs()) as executor:
+            stream_to_pool(executor, tasks(), window, on_result)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    result = dict(summary.to_dict(time.time() - started), input_dir=str(input_path))
+    path = summary_path(output)
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return result
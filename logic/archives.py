@@ -0,0 +1,135 @@
+"""
+This module implements archive I/O for A2P_Cli.
+Input archives (.tar, .tar.gz/.tgz, .zip) are read member by member and handed to the
+decoders as in-memory buffers; ArchiveSink appends converted files to a tar or zip archive
+from a single writer thread, so millions of small outputs become one file on disk.
+"""
+
+import io
+import logging
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from logic.logging_config import log_call
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+ZIP_SUFFIXES = ('.zip',)
+
+# Encoded outputs waiting for the writer thread (backpressure for the workers' results)
+SINK_QUEUE_SIZE = 256
+
+
+def archive_kind(path):
+    """
+    Return 'tar' or 'zip' if the path names an archive by its suffix, else None.
+    """
+    name = str(path).lower()
+    if name.endswith(TAR_SUFFIXES):
+        return 'tar'
+    if name.endswith(ZIP_SUFFIXES):
+        return 'zip'
+    return None
+
+
+def is_input_archive(path):
+    """
+    Return True if path is an existing tar or zip file.
+    """
+    path = Path(path)
+    return path.is_file() and archive_kind(path) is not None
+
+
+@log_call
+def iter_archive_members(path, extensions):
+    """
+    Yield (member name, bytes) for archive members whose extension is in extensions.
+    Tar archives are read as a stream, so members are never extracted to disk.
+    Args:
+        path (Path or str): Archive file.
+        extensions (set): Lowercase extensions including the dot.
+    Yields:
+        tuple: (str, bytes)
+    """
+    if archive_kind(path) == 'zip':
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and Path(info.filename).suffix.lower() in extensions:
+                    yield info.filename, zf.read(info)
+        return
+    with tarfile.open(path, 'r|*') as tf:
+        for member in tf:
+            if member.isfile() and Path(member.name).suffix.lower() in extensions:
+                yield member.name, tf.extractfile(member).read()
+
+
+class ArchiveSink:
+    """
+    Append files to a tar or zip archive from one background writer thread.
+    Use add(name, data) from any thread, then close() to flush and finish the archive.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.kind = archive_kind(self.path)
+        if self.kind is None:
+            raise ValueError(f"Output archive '{path}' must end with one of: {', '.join(TAR_SUFFIXES + ZIP_SUFFIXES)}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=SINK_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="ArchiveSink", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        if self.kind == 'zip':
+            # Encoded images are already compressed
+            return zipfile.ZipFile(self.path, 'w', compression=zipfile.ZIP_STORED)
+        mode = {'.gz': 'w:gz', '.tgz': 'w:gz', '.bz2': 'w:bz2', '.xz': 'w:xz'}.get(self.path.suffix.lower(), 'w')
+        return tarfile.open(self.path, mode)
+
+    def _write(self, archive, name, data):
+        if self.kind == 'zip':
+            archive.writestr(name, data)
+            return
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        archive.addfile(info, io.BytesIO(data))
+
+    def _run(self):
+        finished = False
+        try:
+            with self._open() as archive:
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        finished = True
+                        break
+                    self._write(archive, *item)
+                    self.count += 1
+        except Exception as e:
+            self.error = e
+            logging.error(f"Writing archive {self.path} failed: {e}")
+            # Keep draining so producers never block on a dead writer
+            while not finished:
+                finished = self._queue.get() is None
+
+    def add(self, name, data):
+        """
+        Queue a file for the archive (blocks while the queue is full).
+        """
+        self._queue.put((name, data))
+
+    def close(self):
+        """
+        Finish the archive and wait for the writer thread.
+        Raises:
+            OSError: If writing the archive failed.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise OSError(f"Writing archive {self.path} failed: {self.error}")
@@ -0,0 +1,218 @@
+"""
+This module implements the 'auto' worker mode of A2P_Cli (--max_workers auto).
+The pool size is derived from the CPUs this process may run on and the memory available for
+the largest input images; during the run a ConcurrencyTuner measures throughput and moves the
+number of tasks in flight up or down to the best value it finds.
+"""
+
+import logging
+import os
+import time
+from logic.decoders import open_image
+from logic.logging_config import log_call
+
+AUTO_WORKERS = 'auto'
+
+# Peak bytes per pixel of one conversion (decoded RGB(A), classification and quantization copies)
+TASK_BYTES_PER_PIXEL = 24
+# Per-task memory assumed when no input headers can be read (streamed job lists/archives)
+DEFAULT_TASK_MEMORY = 256 * 1024 * 1024
+# Share of the available memory the workers may use
+MEMORY_BUDGET = 0.8
+# Number of largest inputs (by file size) whose headers are read to estimate task memory
+HEADER_SAMPLE = 3
+# Completed tasks per throughput measurement (at least the current window)
+TUNE_SAMPLE_TASKS = 8
+# Relative throughput change treated as noise
+TUNE_TOLERANCE = 0.05
+# Consecutive slow measurements after settling that start a new probe
+TUNE_REPROBE_SAMPLES = 3
+
+
+def usable_cpus():
+    """
+    Return the number of CPUs this process may run on (its affinity mask where supported).
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def available_memory():
+    """
+    Return the available physical memory in bytes, or None if it cannot be determined.
+    """
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_task_memory(files=None):
+    """
+    Estimate the peak memory of one conversion from the headers of the largest inputs.
+    Args:
+        files (list, optional): Input file paths.
+    Returns:
+        int: Bytes.
+    """
+    if not files:
+        return DEFAULT_TASK_MEMORY
+    sizes = []
+    for f in files:
+        try:
+            sizes.append((os.path.getsize(f), f))
+        except OSError:
+            continue
+    pixels = 0
+    for _, f in sorted(sizes, reverse=True)[:HEADER_SAMPLE]:
+        try:
+            # Only the header is needed; a bulk read of the whole file would be wasted
+            with open_image(f, reader='path') as img:
+                pixels = max(pixels, img.width * img.height)
+        except Exception as e:
+            logging.debug(f"Autotune could not read header of {f}: {e}")
+    return pixels * TASK_BYTES_PER_PIXEL if pixels else DEFAULT_TASK_MEMORY
+
+
+@log_call
+def plan_workers(files=None):
+    """
+    Choose the pool size for --max_workers auto.
+    Args:
+        files (list, optional): Input file paths used to estimate per-task memory.
+    Returns:
+        dict: {"processes", "cpus", "memory_available", "task_memory", "memory_limit"}
+    """
+    cpus = usable_cpus()
+    memory = available_memory()
+    task_memory = estimate_task_memory(files)
+    memory_limit = max(1, int(memory * MEMORY_BUDGET // task_memory)) if memory else cpus
+    processes = max(1, min(cpus, memory_limit))
+    logging.info(f"Autotune: {processes} processes (cpus={cpus}, memory limit={memory_limit}, task memory={task_memory >> 20} MiB)")
+    return {
+        "processes": processes,
+        "cpus": cpus,
+        "memory_available": memory,
+        "task_memory": task_memory,
+        "memory_limit": memory_limit,
+    }
+
+
+class ConcurrencyTuner:
+    """
+    Hill-climb the number of tasks in flight on measured throughput.
+    Calling the tuner returns the current window; report each finished task with task_done().
+    The window ranges from the pool size (every worker busy) to twice the pool size (workers plus
+    read-ahead). Each overshoot or bound halves the step; once the step is 1 the tuner settles on
+    the best window found and only probes again after TUNE_REPROBE_SAMPLES slow measurements in a row.
+    It moves down when available memory drops below two tasks' worth.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.low = plan["processes"]
+        self.high = plan["processes"] * 2
+        self.window = plan["processes"]
+        self.step = max(1, plan["processes"] // 4)
+        self.direction = 1
+        self.adjustments = 0
+        self.settled = False
+        self.best_rate = 0.0
+        self.best_window = self.window
+        self._last_rate = None
+        self._slow = 0
+        self._done = 0
+        self._start = time.monotonic()
+
+    def __call__(self):
+        return self.window
+
+    def _settle(self):
+        """
+        Stop probing and hold the best window found.
+        """
+        self.settled = True
+        self._slow = 0
+        if self.window != self.best_window:
+            self.window = self.best_window
+            self.adjustments += 1
+        logging.debug(f"Autotune: settled at window {self.window} ({self.best_rate:.2f} tasks/s)")
+
+    def _reprobe(self, rate, low_memory):
+        """
+        Start probing again from the current window after a sustained drop.
+        """
+        self.settled = False
+        self.best_rate, self.best_window = rate, self.window
+        self._last_rate = None
+        self.step = max(1, self.plan["processes"] // 4)
+        self.direction = -1 if low_memory else 1
+        logging.debug(f"Autotune: throughput dropped to {rate:.2f} tasks/s, probing again")
+
+    def task_done(self):
+        """
+        Record one finished task and adjust the window after each measurement.
+        """
+        self._done += 1
+        if self._done < max(TUNE_SAMPLE_TASKS, self.window):
+            return
+        now = time.monotonic()
+        rate = self._done / max(now - self._start, 1e-9)
+        self._done = 0
+        self._start = now
+        memory = available_memory()
+        low_memory = memory is not None and memory < 2 * self.plan["task_memory"]
+        if self.settled:
+            slow = low_memory or rate < self.best_rate * (1 - TUNE_TOLERANCE)
+            self._slow = self._slow + 1 if slow else 0
+            if self._slow >= TUNE_REPROBE_SAMPLES:
+                self._reprobe(rate, low_memory)
+            return
+        if rate > self.best_rate:
+            self.best_rate, self.best_window = rate, self.window
+        if self._last_rate is not None and rate < self._last_rate * (1 - TUNE_TOLERANCE):
+            # Overshot: turn around with a smaller step, or stop once the step cannot shrink
+            if self.step == 1:
+                self._settle()
+                return
+            self.direction = -self.direction
+            self.step = max(1, self.step // 2)
+        self._last_rate = rate
+        if low_memory:
+            self.direction = -1
+        window = min(self.high, max(self.low, self.window + self.direction * self.step))
+        if window == self.window:
+            # At a bound: flat or rising throughput all the way, so sweep back with a smaller step
+            if self.step == 1:
+                self._settle()
+                return
+            self.direction = -self.direction
+            self.step = max(1, self.step // 2)
+        else:
+            self.window = window
+            self.adjustments += 1
+            logging.debug(f"Autotune: {rate:.2f} tasks/s, window -> {window}")
+
+    def summary(self):
+        """
+        Return the chosen values for the run summary.
+        """
+        return {
+            "mode": AUTO_WORKERS,
+            "processes": self.plan["processes"],
+            "cpus": self.plan["cpus"],
+            "memory_limit": self.plan["memory_limit"],
+            "window": self.window,
+            "best_window": self.best_window,
+            "best_rate": round(self.best_rate, 2),
+            "adjustments": self.adjustments,
+            "settled": self.settled,
+        }
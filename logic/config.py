@@ -3,15 +3,21 @@ This module defines default configuration values, option descriptions, and valid
 It is used by both the CLI and GUI to provide consistent defaults and validation.
 """
 
+from logic.writers import OUTPUT_WRITERS
+from logic.decoders import DECODERS
+from logic.reader import READERS
+
 # Centralized configuration for A2P_Cli 2.0-beta
 
 # Default values for CLI and GUI options
 DEFAULT_QB_COLOR = None  # None means no quantization (full color)
 DEFAULT_QB_GRAY_COLOR = None
 DEFAULT_QB_GRAY = None
-DEFAULT_METHOD = 2  # 0=Median Cut, 1=Max Coverage, 2=Fast Octree
-DEFAULT_DITHER = 1  # 0=None, 1=Floyd-Steinberg
+DEFAULT_METHOD = 2  # 0=Median Cut, 1=Max Coverage, 2=Fast Octree, 3=Wu (NumPy), 4=K-Means (NumPy)
+DEFAULT_DITHER = 1  # 0=None, 1=Floyd-Steinberg, 2=Bayer 8x8, 3=Blue noise, 4=Bayer 4x4
 DEFAULT_MAX_WORKERS = 4
+DEFAULT_OUTPUT_FORMAT = 'png'  # See logic/writers.py for registered formats
+DEFAULT_INPUT_FORMATS = 'avif'  # Comma separated, see logic/decoders.py
 
 # Default options dictionary (used for initializing option state)
 OPTIONS_DEFAULTS = {
@@ -26,6 +32,8 @@ OPTIONS_DEFAULTS = {
     "method": DEFAULT_METHOD,
     "dither": DEFAULT_DITHER,
     "max_workers": DEFAULT_MAX_WORKERS,
+    "output_format": DEFAULT_OUTPUT_FORMAT,
+    "input_formats": DEFAULT_INPUT_FORMATS,
 }
 
 # Choices and descriptions for options
@@ -33,11 +41,19 @@ METHOD_CHOICES = {
     0: 'Median Cut',
     1: 'Max Coverage',
     2: 'Fast Octree',
+    3: 'Wu (NumPy)',
+    4: 'K-Means (NumPy)',
 }
 DITHER_CHOICES = {
     0: 'None',
     1: 'Floyd-Steinberg',
+    2: 'Bayer 8x8',
+    3: 'Blue noise',
+    4: 'Bayer 4x4',
 }
+LOG_LEVEL_CHOICES = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+FORMAT_CHOICES = {name: writer['description'] for name, writer in OUTPUT_WRITERS.items()}
+INPUT_FORMAT_CHOICES = {name: ', '.join(dec['extensions']) for name, dec in DECODERS.items()}
 
 # Option descriptions for help/menus
 OPTION_DESCRIPTIONS = {
@@ -49,9 +65,16 @@ OPTION_DESCRIPTIONS = {
     'qb_color': 'Quantization bits for color images (1–8, 2–256 colors)',
     'qb_gray_color': 'Quantization bits for grayscale+one images (1–8, 2–256 levels)',
     'qb_gray': 'Quantization bits for grayscale images (1–8, 2–256 levels)',
-    'method': 'Quantization method: 0=Median Cut, 1=Max Coverage, 2=Fast Octree',
-    'dither': 'Dither: 0=None, 1=Floyd-Steinberg',
+    'method': 'Quantization method: 0=Median Cut, 1=Max Coverage, 2=Fast Octree, 3=Wu (NumPy), 4=K-Means (NumPy)',
+    'dither': 'Dither: 0=None, 1=Floyd-Steinberg, 2=Bayer 8x8, 3=Blue noise, 4=Bayer 4x4 (2-4 are ordered)',
     'chk_bit': 'Check and display real bit depth (unique color count) for each converted image or single file.',
+    'output_format': 'Output format: ' + ', '.join(FORMAT_CHOICES) + ' (default: png)',
+    'input_formats': 'Comma separated input formats: ' + ', '.join(INPUT_FORMAT_CHOICES) + ' (default: avif)',
+    'reader': 'Input reader: ' + ', '.join(READERS) + ' (default: read)',
+    'variant': 'Output variant NAME[:key=value,...] written to <output_dir>/NAME (repeatable)',
+    'profile': 'Profile every conversion task: cprofile (pstats file) or sample (collapsed stacks)',
+    'log_level': 'Log file level: ' + ', '.join(LOG_LEVEL_CHOICES) + ' (default: DEBUG)',
+    'log_json': 'Write the log file as JSON lines',
 }
 
 # Validators for each CLI option
@@ -64,7 +87,13 @@ OPTION_VALIDATORS = {
     'qb_color': lambda v: (str(v).isdigit() and 1 <= int(v) <= 8) or v == '' or v is None,
     'qb_gray_color': lambda v: (str(v).isdigit() and 1 <= int(v) <= 8) or v == '' or v is None,
     'qb_gray': lambda v: (str(v).isdigit() and 1 <= int(v) <= 8) or v == '' or v is None,
-    'method': lambda v: str(v) in ['0','1','2'],
-    'dither': lambda v: str(v) in ['0','1'],
+    'method': lambda v: str(v) in ['0','1','2','3','4'],
+    'dither': lambda v: str(v) in ['0','1','2','3','4'],
     'chk_bit': lambda v: v in [True, False],
+    'output_format': lambda v: v is None or str(v).lower() in FORMAT_CHOICES,
+    'input_formats': lambda v: v is None or all(n.strip().lower() in INPUT_FORMAT_CHOICES for n in str(v).split(',')),
+    'reader': lambda v: v is None or v in READERS,
+    'profile': lambda v: v in [None, 'cprofile', 'sample'],
+    'log_level': lambda v: v is None or str(v).upper() in LOG_LEVEL_CHOICES,
+    'log_json': lambda v: v in [True, False],
 }
@@ -1,21 +1,34 @@
-try:
-    import pillow_avif  # noqa: F401
-except ImportError:
-    pillow_avif = None  # For environments without AVIF support
-
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from PIL import Image
+import io
 import math
 import logging
 import traceback
 import numpy as np
-from logic.logging_config import log_call
-from logic.config import DEFAULT_MAX_WORKERS
+from logic.logging_config import log_call, worker_logging_kwargs
+from logic.config import DEFAULT_MAX_WORKERS, DEFAULT_METHOD, DEFAULT_DITHER
+from logic.writers import write_image, get_writer, get_extension
+from logic.decoders import open_image, find_input_files, input_extensions, usable_input_formats
+from logic.reader import DEFAULT_READER, prefetch, read_delta, read_totals
+from logic.quantize import NUMPY_METHODS, ORDERED_DITHERS, quantize_numpy
+from logic.sharding import parse_shard, select_shard, shard_of
+from logic.joblist import iter_job_list
+from logic.archives import ArchiveSink, is_input_archive, iter_archive_members
+from logic.autotune import AUTO_WORKERS, ConcurrencyTuner, plan_workers
+from logic.tiles import tile_quantize, use_tiles
+from logic.profiling import ProfileCollector, default_profile_path, profile_call
 import concurrent.futures
 import os
 
 GREYSCALE_ONE_LABEL = "GREYSCALE+ONE"
 FULL_COLOR_LABEL = "FULL COLOR"
+# classify_image_type: sampling grid step for the early-exit pass, rows per block for the exact pass
+CLASSIFY_SAMPLE_STRIDE = 16
+CLASSIFY_BLOCK_ROWS = 256
+# Images with at most this many distinct colours can be written as an exact palette
+EXACT_PALETTE_MAX = 256
+# count_colors: below this many pixels np.unique is cheaper than clearing a 2**24 bitmap
+COUNT_BITMAP_MIN_PIXELS = 1 << 20
 
 @log_call
 def batch_files_by_size(avif_files, target_batch_size_bytes):
@@ -72,14 +85,38 @@ def get_real_bit_count(img):
         colors = img.getcolors(maxcolors=256)
         n_colors = len(colors) if colors else 0
     else:
-        colors = img.convert("RGB").getcolors(maxcolors=2**24)
-        n_colors = len(colors) if colors else 0
+        n_colors = count_colors(img)
     if n_colors > 0:
         bit_count = math.ceil(math.log2(n_colors))
     else:
         bit_count = 0
     return n_colors, bit_count
 
+def count_colors(img, mask=None):
+    """
+    Count the distinct RGB colours (or levels of an 'L' image) with NumPy.
+    Large images mark packed 0xRRGGBB values in a 2**24 bitmap, which is linear in the pixel count.
+    Args:
+        img (PIL.Image): Image to count.
+        mask (np.ndarray, optional): (H, W) bool array; only pixels where it is True are counted.
+    Returns:
+        int: Number of distinct colours.
+    """
+    if img.mode == 'L':
+        values = np.asarray(img)
+        values = values[mask] if mask is not None else values.ravel()
+        return int(np.count_nonzero(np.bincount(values, minlength=256)))
+    rgb = np.asarray(img if img.mode == 'RGB' else img.convert('RGB'))
+    if mask is not None:
+        rgb = rgb[mask]
+    rgb = rgb.reshape(-1, 3)
+    packed = (rgb[:, 0].astype(np.uint32) << 16) | (rgb[:, 1].astype(np.uint32) << 8) | rgb[:, 2]
+    if packed.size < COUNT_BITMAP_MIN_PIXELS:
+        return int(np.unique(packed).size)
+    seen = np.zeros(1 << 24, dtype=bool)
+    seen[packed] = True
+    return int(np.count_nonzero(seen))
+
 @log_call
 def quantize_4bit(img):
     """
@@ -104,71 +141,259 @@ def find_avif_files(input_path, recursive):
     pattern = '**/*.avif' if recursive else '*.avif'
     return list(input_path.glob(pattern))
 
+def quantize_image(img, colors, mode, method, dither):
+    """
+    Quantize an image to a palette image with the selected engine.
+    Args:
+        img (PIL.Image): Image to quantize.
+        colors (int): Number of colors.
+        mode (str): Image mode for quantization.
+        method (int): Quantization method (0-4).
+        dither (int): 0=None, 1=Floyd-Steinberg, 2=Bayer 8x8, 3=Blue noise, 4=Bayer 4x4.
+    Returns:
+        PIL.Image: Palette ('P') image.
+    """
+    if use_tiles(img):
+        return tile_quantize(img, int(colors), method=method, dither=dither, mode=mode)
+    if method in NUMPY_METHODS or dither in ORDERED_DITHERS:
+        return quantize_numpy(img, int(colors), method=method, dither=dither, mode=mode)
+    return img.convert(mode).quantize(colors=int(colors), method=method, dither=dither)
+
 @log_call
 def quantize_and_save(img, png_file, colors: int, mode: str, silent: bool, label: str, progress_printer=None, **kwargs):
     """
-    Quantize an image and save it as PNG.
+    Quantize an image and save it with the selected output writer (PNG by default).
     Args:
         img (PIL.Image): Image to quantize.
-        png_file (Path or str): Output PNG file.
+        png_file (Path or str): Output file.
         colors (int): Number of colors for quantization.
         mode (str): Image mode for quantization.
         silent (bool): Suppress output.
         label (str): Label for logging.
         progress_printer (callable, optional): Progress reporting callback.
-        **kwargs: Quantization method and dither.
+        **kwargs: Quantization method, dither and output_format.
     """
     method = int(kwargs.pop('method', 2))
     dither = int(kwargs.pop('dither', 1))
+    output_format = kwargs.pop('output_format', None)
     if kwargs:
         logging.warning(f"Unexpected keyword arguments received: {', '.join(kwargs.keys())}")
-    img_q = img.convert(mode).quantize(colors=int(colors), method=method, dither=dither)
-    img_q.save(png_file, 'PNG', optimize=True)
+    write_image(quantize_image(img, colors, mode, method, dither), png_file, output_format)
     if not silent and progress_printer:
         progress_printer(f"[{label}] Converted: {png_file.name}")
 
 @log_call
-def save_image(img, png_file, silent, label, progress_printer=None):
+def save_image(img, png_file, silent, label, progress_printer=None, output_format=None):
     """
-    Save an image as PNG without quantization.
+    Save an image without quantization using the selected output writer (PNG by default).
     Args:
         img (PIL.Image): Image to save.
-        png_file (Path or str): Output PNG file.
+        png_file (Path or str): Output file.
         silent (bool): Suppress output.
         label (str): Label for logging.
         progress_printer (callable, optional): Progress reporting callback.
+        output_format (str, optional): Output format name (see logic.writers).
     """
-    img.save(png_file, 'PNG', optimize=True)
+    write_image(img, png_file, output_format)
     if not silent and progress_printer:
         progress_printer(f"[{label}] Converted: {png_file.name}")
 
+def _rgb_block_is_gray(arr):
+    """
+    Return True if every pixel of an RGB(A) array block has equal R, G and B.
+    """
+    r, g, b = arr[..., 0], arr[..., 1], arr[..., 2]
+    return bool(np.all((r == g) & (g == b)))
+
+def _gray_class_from_histogram(histogram):
+    """
+    Classify a grayscale image from its 256-bin level histogram.
+    """
+    # Grayscale+one: exactly two distinct levels
+    levels = sum(1 for count in histogram[:256] if count)
+    return 'grayscale+one' if levels == 2 else 'grayscale'
+
 @log_call
 def classify_image_type(img):
     """
     Classify image as 'grayscale', 'grayscale+one', or 'color' using numpy.
+    Staged: a strided sample is checked first and a colored pixel there settles 'color' at once.
+    Otherwise the frame is scanned in row blocks, stopping at the first colored block, so the
+    result is always the same as a full-frame scan.
     Args:
         img (PIL.Image): Image to classify.
     Returns:
         str: 'grayscale', 'grayscale+one', or 'color'.
     """
-    arr = np.array(img.convert('RGBA'))
-    r, g, b, _ = arr[...,0], arr[...,1], arr[...,2], arr[...,3]
-    # Grayscale: all RGB channels are equal everywhere
-    if np.all((r == g) & (g == b)):
-        # Grayscale+one: check for a single unique color (besides gray)
-        unique_colors = np.unique(arr[...,:3].reshape(-1, 3), axis=0)
-        if unique_colors.shape[0] == 2:
-            return 'grayscale+one'
-        return 'grayscale'
-    return 'color'
+    if img.mode in ('L', 'LA'):
+        return _gray_class_from_histogram(img.getchannel('L').histogram())
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    width, height = img.size
+    # Stage 1: nearest-neighbour resize picks real pixels on a grid, without copying the frame
+    if width > CLASSIFY_SAMPLE_STRIDE and height > CLASSIFY_SAMPLE_STRIDE:
+        sample = img.resize((width // CLASSIFY_SAMPLE_STRIDE, height // CLASSIFY_SAMPLE_STRIDE), Image.NEAREST)
+        if not _rgb_block_is_gray(np.asarray(sample)):
+            return 'color'
+    # Stage 2: exact scan in row blocks with early exit
+    for top in range(0, height, CLASSIFY_BLOCK_ROWS):
+        block = img.crop((0, top, width, min(top + CLASSIFY_BLOCK_ROWS, height)))
+        if not _rgb_block_is_gray(np.asarray(block)):
+            return 'color'
+    # All channels are equal, so the red channel carries every gray level
+    return _gray_class_from_histogram(img.getchannel('R').histogram())
 
 @log_call
-def _quantize_if_requested(img, png_file, qb_val, mode, silent, label, progress_printer, method, dither):
+def classify_alpha(img):
+    """
+    Classify the alpha channel of an image from its histogram.
+    Args:
+        img (PIL.Image): Image to inspect.
+    Returns:
+        str: 'none' (no alpha band), 'opaque' (all 255), 'binary' (only 0 and 255) or 'full'.
+    """
+    if 'A' not in img.getbands():
+        return 'none'
+    histogram = img.getchannel('A').histogram()
+    total = img.width * img.height
+    if histogram[255] == total:
+        return 'opaque'
+    if histogram[0] + histogram[255] == total:
+        return 'binary'
+    return 'full'
+
+def drop_redundant_alpha(img):
+    """
+    Remove an alpha channel that is opaque everywhere.
+    Args:
+        img (PIL.Image): Decoded image.
+    Returns:
+        tuple: (image, alpha class from classify_alpha)
+    """
+    alpha = classify_alpha(img)
+    if alpha == 'opaque':
+        img = img.convert('L' if img.mode == 'LA' else 'RGB')
+    return img, alpha
+
+def _split_binary_alpha(img):
+    """
+    Split a binary-alpha image into its colour part and a mask of the transparent pixels.
+    Transparent pixels take the colour of the first opaque pixel, so their hidden colours
+    neither count as colours nor pull the palette.
+    Returns:
+        tuple: (RGB or L image, (H, W) bool mask)
+    """
+    base_mode = 'L' if img.mode == 'LA' else 'RGB'
+    alpha = np.asarray(img.getchannel('A'))
+    mask = alpha == 0
+    pixels = np.array(img.convert(base_mode))
+    opaque = np.flatnonzero(~mask.ravel())
+    if opaque.size:
+        pixels[mask] = pixels.reshape(-1, *pixels.shape[2:])[opaque[0]]
+    return Image.fromarray(pixels, base_mode), mask
+
+def _add_transparent_index(img_q, mask):
+    """
+    Append a transparent palette entry to a quantized image and assign it to the masked pixels.
+    """
+    indices = np.array(img_q)
+    entries = int(indices.max()) + 1
+    indices[mask] = entries
+    out = Image.fromarray(indices, 'P')
+    out.putpalette(img_q.getpalette()[:3 * entries] + [0, 0, 0])
+    out.info['transparency'] = entries
+    return out
+
+def _binary_alpha_to_key(img):
+    """
+    Replace a binary alpha channel by a single transparent colour key (PNG tRNS).
+    Returns:
+        PIL.Image or None: RGB/L image with info['transparency'] set, or None if no colour is unused.
+    """
+    base, mask = _split_binary_alpha(img)
+    pixels = np.array(base)
+    if base.mode == 'L':
+        used = np.zeros(256, dtype=bool)
+        used[pixels[~mask]] = True
+    else:
+        packed = (pixels[..., 0].astype(np.uint32) << 16) | (pixels[..., 1].astype(np.uint32) << 8) | pixels[..., 2]
+        used = np.zeros(1 << 24, dtype=bool)
+        used[packed[~mask]] = True
+    key = int(np.argmin(used))
+    if used[key]:
+        return None
+    if base.mode == 'L':
+        pixels[mask] = key
+        transparency = key
+    else:
+        transparency = (key >> 16, (key >> 8) & 0xFF, key & 0xFF)
+        pixels[mask] = transparency
+    out = Image.fromarray(pixels, base.mode)
+    out.info['transparency'] = transparency
+    return out
+
+@log_call
+def exact_colors(img, mode, limit=EXACT_PALETTE_MAX):
+    """
+    Return the distinct colours of an image if there are at most limit of them.
+    A strided sample with too many colours settles 'too many' before the full frame is counted.
+    Args:
+        img (PIL.Image): Image to inspect.
+        mode (str): 'L' counts luminance levels, anything else counts RGB colours.
+        limit (int): Largest count of interest.
+    Returns:
+        np.ndarray or None: Sorted levels (mode 'L') or packed 0xRRGGBB values, or None if there are more.
+    """
+    if mode == 'L':
+        histogram = np.asarray(img.convert('L').histogram())
+        levels = np.flatnonzero(histogram)
+        return levels if len(levels) <= limit else None
+    rgb = img if img.mode == 'RGB' else img.convert('RGB')
+    width, height = rgb.size
+    if width > CLASSIFY_SAMPLE_STRIDE and height > CLASSIFY_SAMPLE_STRIDE:
+        sample = rgb.resize((width // CLASSIFY_SAMPLE_STRIDE, height // CLASSIFY_SAMPLE_STRIDE), Image.NEAREST)
+        if sample.getcolors(limit) is None:
+            return None
+    colors = rgb.getcolors(limit)
+    if colors is None:
+        return None
+    return np.sort(np.array([(r << 16) | (g << 8) | b for _, (r, g, b) in colors], dtype=np.uint32))
+
+@log_call
+def exact_palette_image(img, mode, colors):
+    """
+    Convert an image to a 'P' image holding exactly the given colours (no quantization, no dithering).
+    Args:
+        img (PIL.Image): Image to convert.
+        mode (str): 'L' for luminance levels, anything else for RGB.
+        colors (np.ndarray): Result of exact_colors.
+    Returns:
+        PIL.Image: Lossless palette image.
+    """
+    if mode == 'L':
+        pixels = np.asarray(img.convert('L'))
+        lut = np.zeros(256, dtype=np.uint8)
+        lut[colors] = np.arange(len(colors), dtype=np.uint8)
+        indices = lut[pixels]
+        palette = np.repeat(colors.astype(np.uint8), 3)
+    else:
+        pixels = np.asarray(img if img.mode == 'RGB' else img.convert('RGB'))
+        keys = (pixels[..., 0].astype(np.uint32) << 16) | (pixels[..., 1].astype(np.uint32) << 8) | pixels[..., 2]
+        indices = np.searchsorted(colors, keys).astype(np.uint8)
+        palette = np.stack([colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=1).astype(np.uint8).flatten()
+    out = Image.fromarray(indices, 'P')
+    out.putpalette(palette.tolist())
+    return out
+
+@log_call
+def _quantize_if_requested(img, png_file, qb_val, mode, silent, label, progress_printer, method, dither, output_format=None, alpha=None):
     """
     Helper: quantize image if qb_val is valid, else save as-is.
+    An image with no more distinct colours than 2**qb_val is written as an exact palette instead.
+    Binary alpha becomes one transparent palette entry (or a tRNS colour key when not quantizing).
     Args:
         img (PIL.Image): Image to process.
-        png_file (Path or str): Output PNG file.
+        png_file (Path or str): Output file.
         qb_val (int or None): Quantization bits.
         mode (str): Image mode for quantization.
         silent (bool): Suppress output.
@@ -176,6 +401,8 @@ def _quantize_if_requested(img, png_file, qb_val, mode, silent, label, progress_
         progress_printer (callable): Progress reporting callback.
         method (int): Quantization method.
         dither (int): Dither option.
+        output_format (str, optional): Output format name (see logic.writers).
+        alpha (str, optional): Alpha class from classify_alpha.
     """
     if qb_val is not None and str(qb_val).strip() != "":
         try:
@@ -184,19 +411,42 @@ def _quantize_if_requested(img, png_file, qb_val, mode, silent, label, progress_
             bits = None
         if bits is not None and 1 <= bits <= 8:
             quant_colors = 2 ** bits
-            quantize_and_save(img, png_file, quant_colors, mode, silent, label, progress_printer, method=method, dither=dither)
+            mask = None
+            if alpha == 'binary':
+                # One palette entry is reserved for the transparent pixels
+                img, mask = _split_binary_alpha(img)
+                quant_colors -= 1
+            # Images that already fit the palette are written losslessly without quantizing
+            colors = exact_colors(img, mode, quant_colors)
+            if colors is not None:
+                logging.debug(f"{png_file}: {len(colors)} colours fit {bits} bits, writing exact palette")
+                img_q = exact_palette_image(img, mode, colors)
+            elif mask is None:
+                quantize_and_save(img, png_file, quant_colors, mode, silent, label, progress_printer, method=method, dither=dither, output_format=output_format)
+                return
+            else:
+                img_q = quantize_image(img, quant_colors, mode, int(method), int(dither))
+            if mask is not None:
+                img_q = _add_transparent_index(img_q, mask)
+            save_image(img_q, png_file, silent, label, progress_printer, output_format=output_format)
             return
-    save_image(img, png_file, silent, label, progress_printer)
+    if alpha == 'binary' and get_writer(output_format)['pil_format'] == 'PNG':
+        img = _binary_alpha_to_key(img) or img
+    save_image(img, png_file, silent, label, progress_printer, output_format=output_format)
 
 @log_call
 def _print_chk_bit(png_file, progress_printer):
     """
     Print the real bit depth (unique color count) of a PNG file after conversion.
     Args:
-        png_file (Path or str): PNG file to analyze.
+        png_file (Path, str or file object): PNG file to analyze; a file object (archive member,
+            Converter output) is read from the start and left at its end position.
         progress_printer (callable): Progress reporting callback.
     """
+    position = png_file.tell() if hasattr(png_file, 'seek') else None
     try:
+        if position is not None:
+            png_file.seek(0)
         with Image.open(png_file) as out_img:
             n_colors, bit_count = get_real_bit_count(out_img)
             chk_msg = f"[CHK_BIT] {png_file.name}: {n_colors} colors, ~{bit_count} bits"
@@ -206,14 +456,57 @@ def _print_chk_bit(png_file, progress_printer):
                 logging.info(chk_msg)
     except (OSError, ValueError) as e:
         logging.error(f"CHK_BIT failed for {png_file}: {e}")
+    finally:
+        if position is not None:
+            png_file.seek(position)
+
+def emit_image(img, img_type, alpha, png_file, silent, progress_printer, options):
+    """
+    Write one output of a decoded and classified image, quantizing per its class.
+    Args:
+        img (PIL.Image): Decoded image (gray classes already reduced to L/LA).
+        img_type (str): Class from classify_image_type.
+        alpha (str): Alpha class from classify_alpha.
+        png_file (Path or str): Output file.
+        silent (bool): Suppress output.
+        progress_printer (callable): Progress reporting callback.
+        options (dict): qb_color, qb_gray_color, qb_gray, method, dither, output_format, grayscale.
+    """
+    method = DEFAULT_METHOD if options.get('method') is None else options['method']
+    dither = DEFAULT_DITHER if options.get('dither') is None else options['dither']
+    output_format = options.get('output_format')
+    if options.get('grayscale') and img_type != 'grayscale':
+        # A grayscale proof of a colour (or gray+one) image
+        img = img.convert('LA' if 'A' in img.getbands() else 'L')
+        img_type = 'grayscale'
+    if img_type == 'grayscale+one':
+        _quantize_if_requested(img, png_file, options.get('qb_gray_color'), "P", silent, GREYSCALE_ONE_LABEL, progress_printer, method, dither, output_format, alpha)
+    elif img_type == 'grayscale':
+        _quantize_if_requested(img, png_file, options.get('qb_gray'), "L", silent, "GREYSCALE", progress_printer, method, dither, output_format, alpha)
+    else:  # color
+        _quantize_if_requested(img, png_file, options.get('qb_color'), "P", silent, FULL_COLOR_LABEL, progress_printer, method, dither, output_format, alpha)
+
+def decode_and_classify(img):
+    """
+    Drop a redundant alpha channel and classify an opened image.
+    Returns:
+        tuple: (image, image class, alpha class)
+    """
+    # An all-opaque alpha channel only costs encode time and size
+    img, alpha = drop_redundant_alpha(img)
+    img_type = classify_image_type(img)
+    if img_type != 'color' and img.mode in ('RGB', 'RGBA'):
+        # R == G == B everywhere, so one channel holds the image exactly
+        img = img.convert('L' if img.mode == 'RGB' else 'LA')
+    return img, img_type, alpha
 
 @log_call
 def convert_single_image(avif_file, png_file, silent, chk_bit=False, progress_printer=None, **kwargs):
     """
-    Convert a single AVIF image to PNG, applying quantization if requested.
+    Convert a single AVIF image to PNG (or another output format), applying quantization if requested.
     Args:
         avif_file (Path or str): Source AVIF file.
-        png_file (Path or str): Output PNG file.
+        png_file (Path or str): Output file.
         silent (bool): Suppress output.
         chk_bit (bool, optional): Check and print real bit depth after conversion.
         progress_printer (callable, optional): Progress reporting callback.
@@ -221,29 +514,44 @@ def convert_single_image(avif_file, png_file, silent, chk_bit=False, progress_pr
     Returns:
         bool: True if conversion succeeded, False otherwise.
     """
-    try:
-        qb_color = kwargs.pop('qb_color', None)
-        qb_gray_color = kwargs.pop('qb_gray_color', None)
-        qb_gray = kwargs.pop('qb_gray', None)
-        method = kwargs.pop('method', 2)
-        dither = kwargs.pop('dither', 1)
+    return convert_variants(avif_file, [(png_file, {})], silent, chk_bit, progress_printer, **kwargs)
 
+@log_call
+def convert_variants(avif_file, targets, silent, chk_bit=False, progress_printer=None, **kwargs):
+    """
+    Decode and classify an image once, then write one output per target.
+    Args:
+        avif_file (Path or str): Source image.
+        targets (list): (output file, option overrides) pairs; overrides take precedence over kwargs
+            and may also set 'grayscale' (see logic/variants.py).
+        silent (bool): Suppress output.
+        chk_bit (bool, optional): Check and print real bit depth after conversion.
+        progress_printer (callable, optional): Progress reporting callback.
+        **kwargs: qb_color, qb_gray_color, qb_gray, method, dither, output_format, and reader
+            (see logic/reader.py) for how a path input is read.
+    Returns:
+        bool: True if every output was written, False otherwise.
+    """
+    try:
+        base = {key: kwargs.pop(key, None) for key in ('qb_color', 'qb_gray_color', 'qb_gray', 'method', 'dither', 'output_format')}
+        reader = kwargs.pop('reader', None) or DEFAULT_READER
         if kwargs:
             unexpected = ', '.join(kwargs.keys())
             logging.warning(f"Unexpected keyword arguments: {unexpected}")
 
-        with Image.open(avif_file) as img:
-            img_type = classify_image_type(img)
-            if img_type == 'grayscale+one':
-                _quantize_if_requested(img, png_file, qb_gray_color, "P", silent, GREYSCALE_ONE_LABEL, progress_printer, method, dither)
-            elif img_type == 'grayscale':
-                _quantize_if_requested(img, png_file, qb_gray, "L", silent, "GREYSCALE", progress_printer, method, dither)
-            else:  # color
-                _quantize_if_requested(img, png_file, qb_color, "P", silent, FULL_COLOR_LABEL, progress_printer, method, dither)
-
-            if chk_bit:
-                _print_chk_bit(png_file, progress_printer)
-            return True
+        with open_image(avif_file, reader) as img:
+            img, img_type, alpha = decode_and_classify(img)
+            ok = True
+            for png_file, overrides in targets:
+                try:
+                    emit_image(img, img_type, alpha, png_file, silent, progress_printer, dict(base, **overrides))
+                except Exception as e:
+                    logging.error(f"Exception writing {png_file} from {avif_file}: {e}\n{traceback.format_exc()}")
+                    ok = False
+                    continue
+                if chk_bit:
+                    _print_chk_bit(png_file, progress_printer)
+            return ok
     except Exception as e:
         logging.error(f"Exception in convert_single_image for {avif_file}: {e}\n{traceback.format_exc()}")
         return False
@@ -275,28 +583,58 @@ def handle_single_conversion(avif_file, output_path, recursive, silent, remove,
     return converted
 
 @log_call
-def _resolve_png_file(avif_file, input_path, output_path, output_dir, recursive):
+def _resolve_png_file(avif_file, input_path, output_path, output_dir, recursive, extension='.png'):
     """
-    Resolve the output path for the PNG file based on input/output settings.
+    Resolve the output path for the converted file based on input/output settings.
     Args:
         avif_file (Path): Source AVIF file.
         input_path (Path): Input directory.
         output_path (Path): Output directory.
         output_dir (str or None): Output directory as string or None.
         recursive (bool): Whether conversion is recursive.
+        extension (str, optional): Output file extension (default: '.png').
+    Returns:
+        Path: Output file path.
+    """
+    png_file = output_file_for(avif_file, input_path, output_path, output_dir, recursive, extension)
+    if recursive and output_dir:
+        png_file.parent.mkdir(parents=True, exist_ok=True)
+    return png_file
+
+def _variant_targets(avif_file, input_path, output_path, recursive, variants, output_format=None):
+    """
+    Resolve the output file of every variant: each variant has its own tree under output_path/<name>.
+    Args:
+        avif_file (Path): Source file.
+        input_path (Path): Input directory.
+        output_path (Path): Output directory (the input directory without --output_dir).
+        recursive (bool): Keep the relative folder of the source inside each tree.
+        variants (list): Parsed variants (see logic/variants.py).
+        output_format (str, optional): Output format of variants that do not override it.
     Returns:
-        Path: Output PNG file path.
+        list: (output file, option overrides) pairs for convert_variants.
+    """
+    targets = []
+    for variant in variants:
+        root = output_path / variant['name']
+        extension = get_extension(variant['options'].get('output_format', output_format))
+        png_file = output_file_for(avif_file, input_path, root, str(root), recursive, extension)
+        png_file.parent.mkdir(parents=True, exist_ok=True)
+        targets.append((png_file, variant['options']))
+    return targets
+
+def output_file_for(avif_file, input_path, output_path, output_dir, recursive, extension='.png'):
+    """
+    Return the output path of a file without touching the filesystem (see _resolve_png_file).
     """
     if recursive and output_dir:
         rel_path = avif_file.parent.relative_to(input_path)
-        target_folder = output_path / rel_path
-        target_folder.mkdir(parents=True, exist_ok=True)
-        return target_folder / (avif_file.stem + '.png')
+        return output_path / rel_path / (avif_file.stem + extension)
     if recursive:
-        return avif_file.parent / (avif_file.stem + '.png')
+        return avif_file.parent / (avif_file.stem + extension)
     if output_dir:
-        return output_path / (avif_file.stem + '.png')
-    return avif_file.parent / (avif_file.stem + '.png')
+        return output_path / (avif_file.stem + extension)
+    return avif_file.parent / (avif_file.stem + extension)
 
 @log_call
 def _remove_original_if_requested(avif_file, remove):
@@ -319,33 +657,58 @@ def convert_worker(args):
     Args:
         args (tuple): Arguments for conversion (see convert_avif_to_png for details).
     Returns:
-        bool: True if conversion succeeded, False otherwise.
+        tuple: (bool conversion succeeded, reader counters of this task as from read_delta).
+            With kwargs['profile'] set: that tuple and the profile data for ProfileCollector.add.
+    """
+    profile = args[-1].get('profile')
+    if profile:
+        return profile_call(profile, _convert_worker_task, args)
+    return _convert_worker_task(args)
+
+def _convert_worker_task(args):
+    """
+    Convert one file for convert_worker.
     """
     avif_file, input_dir, output_dir, remove, recursive, silent, qb_color, qb_gray_color, qb_gray, kwargs = args
+    before = read_totals()
     try:
         avif_file = Path(avif_file)  # FIX: convert string to Path
         input_path = Path(input_dir)
         output_path = Path(output_dir) if output_dir else input_path
-        png_file = _resolve_png_file(avif_file, input_path, output_path, output_dir, recursive)
-        converted = convert_single_image(
-            avif_file, png_file, silent, progress_printer=None,
-            qb_color=qb_color, qb_gray_color=qb_gray_color, qb_gray=qb_gray, **kwargs
-        )
+        kwargs = dict(kwargs)
+        # The parent's progress printer is not forwarded; workers report through the result only
+        kwargs.pop('progress_printer', None)
+        kwargs.pop('profile', None)
+        variants = kwargs.pop('variants', None)
+        if variants:
+            targets = _variant_targets(avif_file, input_path, output_path, recursive, variants, kwargs.get('output_format'))
+            converted = convert_variants(
+                avif_file, targets, silent, progress_printer=None,
+                qb_color=qb_color, qb_gray_color=qb_gray_color, qb_gray=qb_gray, **kwargs
+            )
+        else:
+            extension = get_extension(kwargs.get('output_format'))
+            png_file = _resolve_png_file(avif_file, input_path, output_path, output_dir, recursive, extension)
+            converted = convert_single_image(
+                avif_file, png_file, silent, progress_printer=None,
+                qb_color=qb_color, qb_gray_color=qb_gray_color, qb_gray=qb_gray, **kwargs
+            )
         if converted and remove:
             try:
                 remove_original_file(avif_file)
             except Exception as e:
                 print(f"[WARN] Failed to remove {avif_file}: {e}")
-        return converted
+        return converted, read_delta(before)
     except Exception as e:
         import traceback
         print(f"Exception in worker for {avif_file}: {e}\n{traceback.format_exc()}")
-        return False
+        return False, read_delta(before)
 
 @log_call
 def convert_avif_to_png(input_dir, output_dir=None, remove=False, recursive=False, silent=False, qb_color=None, qb_gray_color=None, qb_gray=None, progress_callback=None, max_workers=DEFAULT_MAX_WORKERS, **kwargs):
     """
-    Convert all AVIF images in the input directory (optionally recursively) to PNG format.
+    Convert all AVIF images in the input directory (optionally recursively) to PNG (or the format given by output_format).
+    Other input formats (WebP, HEIC, JPEG XL) are included when listed in input_formats.
     Args:
         input_dir (str): Directory containing AVIF files.
         output_dir (str, optional): Directory to save PNG files. Defaults to input_dir.
@@ -356,45 +719,354 @@ def convert_avif_to_png(input_dir, output_dir=None, remove=False, recursive=Fals
         qb_gray_color (int, optional): Quantization bits for grayscale+one images.
         qb_gray (int, optional): Quantization bits for grayscale images.
         progress_callback (callable, optional): Callback for progress updates.
-        max_workers (int, optional): Number of parallel workers.
-        **kwargs: Additional arguments for future compatibility.
+        max_workers (int or 'auto', optional): Number of parallel workers, or 'auto' (see logic/autotune.py).
+        **kwargs: Additional conversion options (method, dither, chk_bit, output_format, input_formats,
+            shard as 'K/N' to convert only that deterministic part of the tree,
+            profile as 'cprofile' or 'sample' to profile every task, profile_file for the merged result,
+            variants as parsed by logic/variants.py to write every file once per variant,
+            reader as a key of logic.reader.READERS).
     Returns:
-        dict: {"success": int, "fail": int}
+        dict: {"success": int, "fail": int, "failed_files": list of paths relative to input_dir,
+            "input_bytes": int}, plus "read_bytes_per_second" when inputs were pre-read,
+            "workers" in auto mode and "profile_file" when profiling.
     """
     input_path = Path(input_dir)
     if not input_path.exists():
         logging.error(f"Input directory '{input_dir}' does not exist.")
         raise FileNotFoundError(f"Input directory '{input_dir}' does not exist.")
+    # Fail once on an unknown output format instead of once per file
+    get_writer(kwargs.get('output_format'))
+    for variant in kwargs.get('variants') or ():
+        get_writer(variant['options'].get('output_format', kwargs.get('output_format')))
     output_path = Path(output_dir) if output_dir else input_path
     output_path.mkdir(parents=True, exist_ok=True)
-    avif_files = find_avif_files(input_path, recursive)
+    # Decoders with missing plugins are reported here once, not per file
+    input_formats = usable_input_formats(kwargs.pop('input_formats', None))
+    shard = parse_shard(kwargs.pop('shard', None))
+    profile_file = kwargs.pop('profile_file', None)
+    collector = ProfileCollector(kwargs['profile']) if kwargs.get('profile') else None
+    avif_files = find_input_files(input_path, recursive, input_formats) if input_formats else []
+    avif_files = select_shard(avif_files, input_path, shard)
     if not avif_files:
-        logging.warning(f"No AVIF files found in '{input_dir}'.")
-        return {"success": 0, "fail": 0}
+        logging.warning(f"No input files ({', '.join(input_formats) or 'no usable decoder'}) found in '{input_dir}'.")
+        return {"success": 0, "fail": 0, "failed_files": []}
     total = len(avif_files)
-    results = [None] * total
-    progress_counter = [0]
+    counts = {"success": 0, "read_bytes": 0, "read_seconds": 0.0}
+    failed_files = []
+    processes, window, tuner = worker_plan(max_workers, avif_files)
+    # Input volume lets later --plan runs calibrate their time estimate; summed before --remove deletes inputs
+    input_bytes = sum(f.stat().st_size for f in avif_files if f.exists())
 
     # Prepare arguments for each worker
-    worker_args = [
-        (str(avif_file), str(input_dir), str(output_dir) if output_dir else None, remove, recursive, silent, qb_color, qb_gray_color, qb_gray, kwargs)
-        for avif_file in avif_files
-    ]
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(convert_worker, arg) for arg in worker_args]
-        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+    def tasks():
+        for avif_file in avif_files:
+            arg = (str(avif_file), str(input_dir), str(output_dir) if output_dir else None, remove, recursive, silent, qb_color, qb_gray_color, qb_gray, kwargs)
+            # Submitted tasks wait for a worker; their read-ahead overlaps the conversions in flight
+            prefetch(avif_file)
+            yield convert_worker, arg, avif_file
+
+    def on_result(avif_file, result):
+        if collector is not None and result:
+            result, profile_data = result
+            collector.add(profile_data)
+        converted, read = result or (False, None)
+        if read:
+            counts["read_bytes"] += read['bytes']
+            counts["read_seconds"] += read['seconds']
+        if converted:
+            counts["success"] += 1
+        else:
+            failed_files.append(avif_file.relative_to(input_path).as_posix())
+        if progress_callback:
+            progress_callback(counts["success"] + len(failed_files), total)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, **worker_logging_kwargs()) as executor:
+        stream_to_pool(executor, tasks(), window, on_result)
+    success = counts["success"]
+    fail = total - success
+    summary = {"success": success, "fail": fail, "failed_files": sorted(failed_files)}
+    summary["input_bytes"] = input_bytes
+    if counts["read_seconds"] > 0:
+        summary["read_bytes_per_second"] = int(counts["read_bytes"] / counts["read_seconds"])
+        logging.info(f"Read {counts['read_bytes']} bytes in {counts['read_seconds']:.3f} worker-seconds "
+                     f"({summary['read_bytes_per_second'] / 1e6:.1f} MB/s, reader={kwargs.get('reader') or DEFAULT_READER})")
+    if tuner is not None:
+        summary["workers"] = tuner.summary()
+    if collector is not None:
+        path = collector.write(profile_file or default_profile_path(output_path, collector.mode))
+        logging.info(f"Profile of {collector.tasks} tasks written to {path}")
+        summary["profile_file"] = str(path)
+    return summary
+
+def worker_plan(max_workers, files=None):
+    """
+    Resolve max_workers to a pool size and an in-flight window.
+    Args:
+        max_workers (int or 'auto'): Fixed worker count, or 'auto' to size from CPUs/memory and tune while running.
+        files (list, optional): Input files, used by 'auto' to estimate per-task memory.
+    Returns:
+        tuple: (processes, window as int or ConcurrencyTuner, tuner or None)
+    """
+    if max_workers == AUTO_WORKERS:
+        tuner = ConcurrencyTuner(plan_workers(files))
+        return tuner.plan["processes"], tuner, tuner
+    return max_workers, max(1, max_workers) * 4, None
+
+def stream_to_pool(executor, tasks, window, on_result):
+    """
+    Submit tasks to an executor with at most window of them in flight.
+    Args:
+        executor (concurrent.futures.Executor): Pool to submit to.
+        tasks (iterable): (func, arg, name) tuples, consumed lazily.
+        window (int or ConcurrencyTuner): Maximum number of pending futures; a tuner is asked
+            before every submission and told about every finished task.
+        on_result (callable): Called as on_result(name, result) for each finished task;
+            result is False if the task raised.
+    """
+    pending = {}
+    tuner = window if isinstance(window, ConcurrencyTuner) else None
+
+    def collect(done):
+        for future in done:
+            name = pending.pop(future)
             try:
                 result = future.result()
-                results[i] = result
             except Exception as exc:
                 logging.error(f"Exception during conversion: {exc}\n{traceback.format_exc()}")
-                results[i] = False
-            if progress_callback:
-                progress_counter[0] += 1
-                progress_callback(progress_counter[0], total)
-    success = sum(1 for r in results if r)
-    fail = total - success
-    return {"success": success, "fail": fail}
+                result = False
+            if tuner is not None:
+                tuner.task_done()
+            on_result(name, result)
+
+    for func, arg, name in tasks:
+        pending[executor.submit(func, arg)] = name
+        while len(pending) >= (tuner() if tuner is not None else window):
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            collect(done)
+    collect(concurrent.futures.wait(pending).done)
+
+def _summary(success, failed_files, tuner=None):
+    """
+    Build the result dict of a streamed conversion (with the autotune values in 'auto' mode).
+    """
+    summary = {"success": success, "fail": len(failed_files), "failed_files": sorted(failed_files)}
+    if tuner is not None:
+        summary["workers"] = tuner.summary()
+    return summary
+
+def convert_job_worker(job):
+    """
+    Worker function for job-list conversion, where the output path is already resolved.
+    Args:
+        job (tuple): (avif_file, png_file, remove, silent, options) with options passed to convert_single_image.
+    Returns:
+        bool: True if conversion succeeded, False otherwise.
+    """
+    avif_file, png_file, remove, silent, options = job
+    try:
+        avif_file = Path(avif_file)
+        png_file = Path(png_file)
+        png_file.parent.mkdir(parents=True, exist_ok=True)
+        converted = convert_single_image(avif_file, png_file, silent, progress_printer=None, **dict(options))
+        if converted and remove:
+            _remove_original_if_requested(avif_file, remove)
+        return converted
+    except Exception as e:
+        print(f"Exception in worker for {avif_file}: {e}\n{traceback.format_exc()}")
+        return False
+
+def _resolve_job_output(job, input_path, output_path, output_dir, extension):
+    """
+    Resolve the output path of a job-list entry.
+    An explicit 'output' wins; otherwise files under input_path keep their relative folder
+    inside output_dir, other files go straight into output_dir, or next to the input without one.
+    """
+    if job.get('output'):
+        return Path(job['output'])
+    avif_file = input_path / job['input']
+    if not output_dir:
+        return avif_file.parent / (avif_file.stem + extension)
+    try:
+        rel_parent = avif_file.parent.relative_to(input_path)
+    except ValueError:
+        rel_parent = Path()
+    return output_path / rel_parent / (avif_file.stem + extension)
+
+@log_call
+def convert_job_list(source, input_dir=None, output_dir=None, remove=False, silent=False, progress_callback=None, max_workers=DEFAULT_MAX_WORKERS, **kwargs):
+    """
+    Convert the files named in a job list (see logic/joblist.py) without walking any directory.
+    Entries are streamed into the pool with a bounded number of jobs in flight.
+    Args:
+        source (str): Job list file, or '-' for stdin.
+        input_dir (str, optional): Base directory for relative input paths (default: current directory).
+        output_dir (str, optional): Directory for outputs of entries without an explicit 'output'.
+        remove (bool, optional): Remove original files after conversion.
+        silent (bool, optional): Suppress output.
+        progress_callback (callable, optional): Called as progress_callback(done, None); the total is unknown.
+        max_workers (int or 'auto', optional): Number of parallel workers, or 'auto' (see logic/autotune.py).
+        **kwargs: Default conversion options (qb_color, qb_gray_color, qb_gray, method, dither, chk_bit,
+            output_format), overridable per entry, and shard as 'K/N'.
+    Returns:
+        dict: {"success": int, "fail": int, "failed_files": list of input paths as listed}
+    """
+    get_writer(kwargs.get('output_format'))
+    kwargs.pop('progress_printer', None)
+    kwargs.pop('input_formats', None)  # Decoders are picked by sniffing each listed file
+    shard = parse_shard(kwargs.pop('shard', None))
+    input_path = Path(input_dir) if input_dir else Path('.')
+    output_path = Path(output_dir) if output_dir else input_path
+    counts = {"success": 0}
+    failed_files = []
+
+    def tasks():
+        for job in iter_job_list(source):
+            if 'error' in job:
+                failed_files.append(job['input'])
+                continue
+            if shard is not None and shard_of(job['input'], shard[1]) != shard[0]:
+                continue
+            options = dict(kwargs, **job['options'])
+            try:
+                png_file = _resolve_job_output(job, input_path, output_path, output_dir, get_extension(options.get('output_format')))
+            except ValueError as e:
+                logging.error(f"Job {job['input']}: {e}")
+                failed_files.append(job['input'])
+                continue
+            prefetch(input_path / job['input'])
+            yield convert_job_worker, (str(input_path / job['input']), str(png_file), remove, silent, options), job['input']
+
+    def on_result(name, ok):
+        if ok:
+            counts["success"] += 1
+        else:
+            failed_files.append(name)
+        if progress_callback:
+            progress_callback(counts["success"] + len(failed_files), None)
+
+    processes, window, tuner = worker_plan(max_workers)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, **worker_logging_kwargs()) as executor:
+        stream_to_pool(executor, tasks(), window, on_result)
+    return _summary(counts["success"], failed_files, tuner)
+
+def convert_archive_worker(job):
+    """
+    Worker function for archive conversion. The input is either raw bytes (an archive member)
+    or a file path; the output is written to png_file, or returned as bytes when png_file is None.
+    Args:
+        job (tuple): (name, source, out_name, png_file, silent, options).
+    Returns:
+        tuple: (bool success, bytes or None)
+    """
+    name, source, out_name, png_file, silent, options = job
+    try:
+        if isinstance(source, bytes):
+            src = io.BytesIO(source)
+            src.name = name
+        else:
+            src = Path(source)
+        if png_file:
+            png_file = Path(png_file)
+            png_file.parent.mkdir(parents=True, exist_ok=True)
+            return convert_single_image(src, png_file, silent, progress_printer=None, **dict(options)), None
+        dst = io.BytesIO()
+        dst.name = out_name
+        converted = convert_single_image(src, dst, silent, progress_printer=None, **dict(options))
+        return converted, dst.getvalue() if converted else None
+    except Exception as e:
+        print(f"Exception in worker for {name}: {e}\n{traceback.format_exc()}")
+        return False, None
+
+def _safe_member_path(name):
+    """
+    Return a member name as a relative PurePosixPath, or None if it is absolute or escapes its root.
+    """
+    rel = PurePosixPath(name)
+    if rel.is_absolute() or '..' in rel.parts:
+        return None
+    return rel
+
+@log_call
+def convert_archive(input_dir, output_dir=None, output_archive=None, recursive=False, silent=False, progress_callback=None, max_workers=DEFAULT_MAX_WORKERS, **kwargs):
+    """
+    Convert images read from a tar/zip archive and/or write the results into a tar/zip archive.
+    Archive members are streamed to the workers as bytes; encoded outputs come back as bytes and
+    are appended by a single writer thread (see logic/archives.py). Per-image conversion is
+    convert_single_image, exactly as for files.
+    Args:
+        input_dir (str): Input archive, or a directory (when only output_archive is used).
+        output_dir (str, optional): Directory for outputs when no output_archive is given
+            (default: a folder named after the input archive, next to it).
+        output_archive (str, optional): Tar or zip file to write all outputs into.
+        recursive (bool, optional): Recursively search a directory input.
+        silent (bool, optional): Suppress output.
+        progress_callback (callable, optional): Called as progress_callback(done, None); the total is unknown.
+        max_workers (int or 'auto', optional): Number of parallel workers, or 'auto' (see logic/autotune.py).
+        **kwargs: Conversion options (qb_color, qb_gray_color, qb_gray, method, dither, chk_bit,
+            output_format, input_formats, shard).
+    Returns:
+        dict: {"success": int, "fail": int, "failed_files": list of member/relative names}
+    """
+    input_path = Path(input_dir)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input '{input_dir}' does not exist.")
+    extension = get_extension(kwargs.get('output_format'))
+    kwargs.pop('progress_printer', None)
+    if kwargs.pop('remove', False):
+        logging.warning("--remove is not supported for archive conversion; originals are kept.")
+    input_formats = usable_input_formats(kwargs.pop('input_formats', None))
+    shard = parse_shard(kwargs.pop('shard', None))
+    from_archive = is_input_archive(input_path)
+    if output_archive:
+        output_path = None
+    elif output_dir:
+        output_path = Path(output_dir)
+    else:
+        output_path = input_path.parent / input_path.name.split('.')[0]
+    counts = {"success": 0}
+    failed_files = []
+
+    def sources():
+        if from_archive:
+            yield from iter_archive_members(input_path, input_extensions(input_formats) if input_formats else set())
+        elif input_formats:
+            for f in find_input_files(input_path, recursive, input_formats):
+                yield f.relative_to(input_path).as_posix(), str(f)
+
+    def tasks():
+        for name, source in sources():
+            rel = _safe_member_path(name)
+            if rel is None:
+                logging.error(f"Skipping unsafe archive member name: {name}")
+                failed_files.append(name)
+                continue
+            if shard is not None and shard_of(rel, shard[1]) != shard[0]:
+                continue
+            out_name = rel.with_suffix(extension).as_posix()
+            png_file = str(output_path / out_name) if output_path is not None else None
+            yield convert_archive_worker, (name, source, out_name, png_file, silent, kwargs), (name, out_name)
+
+    sink = ArchiveSink(output_archive) if output_archive else None
+
+    def on_result(names, result):
+        ok, data = result if result else (False, None)
+        if ok and sink is not None:
+            sink.add(names[1], data)
+        if ok:
+            counts["success"] += 1
+        else:
+            failed_files.append(names[0])
+        if progress_callback:
+            progress_callback(counts["success"] + len(failed_files), None)
+
+    processes, window, tuner = worker_plan(max_workers)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes, **worker_logging_kwargs()) as executor:
+            stream_to_pool(executor, tasks(), window, on_result)
+    finally:
+        if sink is not None:
+            sink.close()
+    return _summary(counts["success"], failed_files, tuner)
 
 @log_call
 def print_summary(success, fail, silent):
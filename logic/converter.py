@@ -0,0 +1,141 @@
+"""
+This module provides the in-memory conversion API of A2P_Cli.
+A Converter owns a long-lived process pool and converts image bytes to PNG (or another
+output format) bytes, so a service can convert per request without temp files or pool startup.
+"""
+
+import collections
+import concurrent.futures
+import logging
+from logic.autotune import AUTO_WORKERS, plan_workers
+from logic.config import DEFAULT_MAX_WORKERS, OPTION_VALIDATORS
+from logic.convert import convert_archive_worker
+from logic.logging_config import worker_logging_kwargs
+from logic.writers import get_writer, get_extension
+
+# Options accepted by convert_bytes/convert_many (passed to convert_single_image)
+CONVERTER_OPTION_KEYS = ('qb_color', 'qb_gray_color', 'qb_gray', 'method', 'dither', 'output_format')
+
+
+class Converter:
+    """
+    Reusable converter with a long-lived worker pool.
+
+    Example:
+        with Converter(max_workers=8, qb_color=6) as conv:
+            png = conv.convert_bytes(avif_bytes)
+            for result in conv.convert_many(items, ordered=False):
+                ...
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, **defaults):
+        """
+        Args:
+            max_workers (int or 'auto'): Number of worker processes; 'auto' sizes the pool from CPUs and memory.
+            **defaults: Default conversion options (see CONVERTER_OPTION_KEYS).
+        """
+        if max_workers == AUTO_WORKERS:
+            max_workers = plan_workers()["processes"]
+        self.max_workers = max_workers
+        self.defaults = self._check_options(defaults)
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, **worker_logging_kwargs())
+
+    @staticmethod
+    def _check_options(options):
+        """
+        Validate conversion options and return them as a new dict.
+        Raises:
+            ValueError: On unknown keys or invalid values.
+        """
+        for key, value in options.items():
+            if key not in CONVERTER_OPTION_KEYS:
+                raise ValueError(f"Unsupported conversion option '{key}'")
+            if not OPTION_VALIDATORS[key](value):
+                raise ValueError(f"Invalid value {value!r} for '{key}'")
+        get_writer(options.get('output_format'))
+        return dict(options)
+
+    def _submit(self, data, name, options):
+        """
+        Submit one conversion to the pool and return its future.
+        """
+        out_name = 'output' + get_extension(options.get('output_format'))
+        return self._executor.submit(convert_archive_worker, (name, bytes(data), out_name, None, True, options))
+
+    @staticmethod
+    def _result(key, future):
+        """
+        Build the result dict for a finished future.
+        """
+        try:
+            ok, out = future.result()
+        except Exception:
+            ok, out = False, None
+        return {"key": key, "success": bool(ok), "data": out}
+
+    # Not wrapped in @log_call: its DEBUG entry/exit lines would format the whole input and output
+    def convert_bytes(self, data, **opts):
+        """
+        Convert one encoded image (AVIF, or any format the decoders support) to output bytes.
+        Args:
+            data (bytes or memoryview): Encoded input image.
+            **opts: Conversion options overriding the converter defaults.
+        Returns:
+            bytes: Encoded output image (PNG unless output_format says otherwise).
+        Raises:
+            ValueError: On invalid options.
+            OSError: If the image could not be converted.
+        """
+        options = dict(self.defaults, **self._check_options(opts))
+        result = self._result(None, self._submit(data, '<bytes>', options))
+        if not result["success"]:
+            raise OSError("Image conversion failed (see log for details)")
+        logging.debug(f"convert_bytes: {len(data)} bytes in, {len(result['data'])} bytes out "
+                      f"({options.get('output_format') or 'png'})")
+        return result["data"]
+
+    def convert_many(self, items, ordered=True, window=None, **opts):
+        """
+        Convert many images, streaming results as they become available.
+        At most window conversions are in flight, so items may be a lazy, unbounded iterable.
+        Args:
+            items (iterable): bytes objects, or (key, bytes) tuples; a bare item's key is its index.
+            ordered (bool): Yield results in submission order (True) or completion order (False).
+            window (int, optional): Maximum conversions in flight (default: 4 x max_workers).
+            **opts: Conversion options overriding the converter defaults.
+        Yields:
+            dict: {"key": key, "success": bool, "data": bytes or None}
+        """
+        options = dict(self.defaults, **self._check_options(opts))
+        window = window or max(1, self.max_workers) * 4
+        pending = collections.OrderedDict()
+        for index, item in enumerate(items):
+            key, data = item if isinstance(item, tuple) else (index, item)
+            pending[self._submit(data, str(key), options)] = key
+            if len(pending) < window:
+                continue
+            if ordered:
+                future, k = pending.popitem(last=False)
+                yield self._result(k, future)
+            else:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield self._result(pending.pop(future), future)
+        if ordered:
+            for future, k in pending.items():
+                yield self._result(k, future)
+        else:
+            for future in concurrent.futures.as_completed(pending):
+                yield self._result(pending[future], future)
+
+    def close(self):
+        """
+        Shut down the worker pool, waiting for running conversions.
+        """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,241 @@
+"""
+This module defines the input decoder registry for A2P_Cli.
+Each decoder maps file extensions and magic bytes to a Pillow format. Optional plugins
+(AVIF, HEIF, JPEG XL) are imported once per process and missing ones are reported once,
+so discovery skips files that cannot be decoded instead of failing on every one of them.
+"""
+
+import logging
+from PIL import Image
+from logic.logging_config import log_call
+from logic.reader import DEFAULT_READER, read_input
+
+try:
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pillow_avif = None  # For environments without AVIF support (Pillow >= 11.3 has it built in)
+
+try:
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+except ImportError:
+    pillow_heif = None  # HEIC/HEIF input is optional
+
+try:
+    import pillow_jxl  # noqa: F401
+except ImportError:
+    pillow_jxl = None  # JPEG XL input is optional
+
+# Number of leading bytes read for magic-byte sniffing (enough for an 'ftyp' box with
+# a dozen compatible brands)
+SNIFF_BYTES = 64
+
+_HEIF_BRANDS = (b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx', b'mif1', b'msf1')
+_JXL_CONTAINER = b'\x00\x00\x00\x0cJXL \r\n\x87\n'
+
+DECODERS = {}
+
+
+def register_decoder(name, extensions, pil_format, sniff, plugin=''):
+    """
+    Register an input decoder.
+    Args:
+        name (str): Decoder name used by --input_formats and options.ini.
+        extensions (tuple): Lowercase file extensions including the dot.
+        pil_format (str): Pillow format identifier the decoder opens with.
+        sniff (callable): Takes the first SNIFF_BYTES of a file and returns True on a match.
+        plugin (str): Package to install when the Pillow format is missing.
+    """
+    DECODERS[name] = {
+        'name': name,
+        'extensions': tuple(extensions),
+        'pil_format': pil_format,
+        'sniff': sniff,
+        'plugin': plugin,
+    }
+
+
+def _ftyp_brands(header):
+    """
+    Return the major brand and the compatible brands of an ISO-BMFF 'ftyp' box.
+    Many AVIF encoders write the generic 'mif1' as major brand and list 'avif' only among
+    the compatible brands, so both have to be looked at.
+    Args:
+        header (bytes): Leading bytes of the file.
+    Returns:
+        tuple: (major brand or None, set of compatible brands).
+    """
+    if len(header) < 12 or header[4:8] != b'ftyp':
+        return None, set()
+    end = min(int.from_bytes(header[:4], 'big'), len(header))
+    # Box header (8), major brand (4), minor version (4), then 4-byte compatible brands
+    compatible = {header[i:i + 4] for i in range(16, end - 3, 4)}
+    return header[8:12], compatible
+
+
+def _is_avif(header):
+    major, compatible = _ftyp_brands(header)
+    return major in (b'avif', b'avis') or bool(compatible & {b'avif', b'avis'})
+
+
+def _is_heif(header):
+    major, compatible = _ftyp_brands(header)
+    return not _is_avif(header) and (major in _HEIF_BRANDS or bool(compatible & set(_HEIF_BRANDS)))
+
+
+register_decoder('avif', ('.avif', '.avifs'), 'AVIF', _is_avif, plugin='pillow-avif-plugin')
+register_decoder('heic', ('.heic', '.heif', '.hif'), 'HEIF', _is_heif, plugin='pillow-heif')
+register_decoder('webp', ('.webp',), 'WEBP',
+                 lambda h: h[:4] == b'RIFF' and h[8:12] == b'WEBP')
+register_decoder('jxl', ('.jxl',), 'JXL',
+                 lambda h: h[:2] == b'\xff\x0a' or h[:12] == _JXL_CONTAINER, plugin='pillow-jxl-plugin')
+
+
+def _detect_available():
+    """
+    Check once which registered decoders have their Pillow format available in this process.
+    Returns:
+        dict: Decoder name -> bool.
+    """
+    Image.init()
+    return {name: dec['pil_format'] in Image.OPEN for name, dec in DECODERS.items()}
+
+
+AVAILABLE_DECODERS = _detect_available()
+
+
+def parse_input_formats(value):
+    """
+    Normalize an input format selection to a tuple of decoder names.
+    Args:
+        value (str, list, tuple or None): Comma separated names, a sequence of names, or None for AVIF only.
+    Returns:
+        tuple: Decoder names.
+    Raises:
+        ValueError: If a name is not a registered decoder.
+    """
+    if value is None or value == '':
+        return ('avif',)
+    names = value.split(',') if isinstance(value, str) else value
+    names = tuple(n.strip().lower() for n in names if n and n.strip())
+    unknown = [n for n in names if n not in DECODERS]
+    if unknown:
+        raise ValueError(f"Unknown input format(s) {', '.join(unknown)}. Available: {', '.join(DECODERS)}")
+    return names
+
+
+@log_call
+def usable_input_formats(input_formats):
+    """
+    Drop requested decoders whose plugin is missing, warning once per decoder.
+    Args:
+        input_formats (str, list, tuple or None): Requested input formats.
+    Returns:
+        tuple: Decoder names that can be used in this process.
+    """
+    usable = []
+    for name in parse_input_formats(input_formats):
+        if AVAILABLE_DECODERS.get(name):
+            usable.append(name)
+        else:
+            plugin = DECODERS[name]['plugin']
+            hint = f" (install '{plugin}')" if plugin else ''
+            logging.warning(f"Input format '{name}' is not supported in this environment{hint}; skipping those files.")
+    return tuple(usable)
+
+
+def input_extensions(input_formats=None):
+    """
+    Return the set of file extensions handled by the given decoders.
+    Args:
+        input_formats (tuple, optional): Decoder names (default: AVIF only).
+    Returns:
+        set: Lowercase extensions including the dot.
+    """
+    extensions = set()
+    for name in parse_input_formats(input_formats):
+        extensions.update(DECODERS[name]['extensions'])
+    return extensions
+
+
+@log_call
+def find_input_files(input_path, recursive, input_formats=None):
+    """
+    Find all files in a directory whose extension maps to one of the given decoders.
+    Args:
+        input_path (Path): Directory to search.
+        recursive (bool): Whether to search subdirectories.
+        input_formats (tuple, optional): Decoder names (default: AVIF only).
+    Returns:
+        list: List of Path objects for found files.
+    """
+    extensions = input_extensions(input_formats)
+    candidates = input_path.rglob('*') if recursive else input_path.glob('*')
+    return [p for p in candidates if p.suffix.lower() in extensions and p.is_file()]
+
+
+def sniff_decoder(path):
+    """
+    Identify the decoder for a file from its magic bytes, falling back to its extension.
+    Args:
+        path (Path, str or file object): File to inspect; file objects are rewound afterwards.
+    Returns:
+        str or None: Decoder name, or None if nothing matches.
+    """
+    if hasattr(path, 'read'):
+        header = path.read(SNIFF_BYTES)
+        path.seek(0)
+    else:
+        with open(path, 'rb') as f:
+            header = f.read(SNIFF_BYTES)
+    for name, dec in DECODERS.items():
+        if dec['sniff'](header):
+            return name
+    return _extension_decoder(path)
+
+
+def _extension_decoder(path):
+    """
+    Return the decoder registered for a file's extension, or None.
+    """
+    suffix = str(getattr(path, 'name', path)).lower().rsplit('.', 1)[-1]
+    for name, dec in DECODERS.items():
+        if '.' + suffix in dec['extensions']:
+            return name
+    return None
+
+
+def open_image(path, reader=DEFAULT_READER):
+    """
+    Open an input image with the decoder selected by magic-byte sniffing.
+    Restricting Pillow to one format skips probing every other registered plugin. If the
+    sniffed decoder is unavailable, the decoder for the extension is tried, then every
+    available decoder.
+    Args:
+        path (Path, str or file object): File to open, e.g. a BytesIO holding an archive member.
+        reader (str): How a path is read (see logic/reader.py); file objects are used as they are.
+    Returns:
+        PIL.Image: Opened (lazily decoded) image.
+    Raises:
+        OSError: If the file matches no decoder or no available decoder can open it.
+    """
+    if not hasattr(path, 'read'):
+        path = read_input(path, reader)
+    name = sniff_decoder(path)
+    label = getattr(path, 'name', path)
+    if name is None:
+        raise OSError(f"Unrecognized input format: {label}")
+    if AVAILABLE_DECODERS.get(name):
+        return Image.open(path, formats=[DECODERS[name]['pil_format']])
+    fallback = _extension_decoder(path)
+    if AVAILABLE_DECODERS.get(fallback):
+        formats = [DECODERS[fallback]['pil_format']]
+    else:
+        formats = [dec['pil_format'] for n, dec in DECODERS.items() if AVAILABLE_DECODERS.get(n)]
+    if not formats:
+        raise OSError(f"No decoder available for '{name}' input: {label}")
+    logging.debug(f"No '{name}' decoder for {label}; trying {', '.join(formats)}")
+    try:
+        return Image.open(path, formats=formats)
+    except OSError as e:
+        raise OSError(f"No decoder available for '{name}' input: {label} ({e})") from e
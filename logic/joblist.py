@@ -0,0 +1,72 @@
+"""
+This module reads explicit job lists for A2P_Cli (--from_list FILE or '-' for stdin).
+Each non-empty line is either a plain input path or an NDJSON record such as
+{"input": "a/b.avif", "output": "out/b.png", "qb_color": 4}. Records are yielded one
+at a time, so a list of tens of millions of entries is never held in memory.
+"""
+
+import json
+import logging
+import sys
+from logic.config import OPTION_VALIDATORS
+from logic.logging_config import log_call
+
+# Per-file options a record may override
+JOB_OVERRIDE_KEYS = ('qb_color', 'qb_gray_color', 'qb_gray', 'method', 'dither', 'output_format')
+
+
+def parse_job_line(line):
+    """
+    Parse one job list line.
+    Args:
+        line (str): Line without its trailing newline.
+    Returns:
+        dict or None: {'input': str, 'output': str or None, 'options': dict}, or None for blank/comment lines.
+    Raises:
+        ValueError: If an NDJSON record is malformed or has an invalid override.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if not line.startswith('{'):
+        return {'input': line, 'output': None, 'options': {}}
+    record = json.loads(line)
+    if not isinstance(record.get('input'), str) or not record['input']:
+        raise ValueError("record has no 'input' path")
+    options = {}
+    for key, value in record.items():
+        if key in ('input', 'output'):
+            continue
+        if key not in JOB_OVERRIDE_KEYS:
+            raise ValueError(f"unsupported key '{key}'")
+        if not OPTION_VALIDATORS[key](value):
+            raise ValueError(f"invalid value {value!r} for '{key}'")
+        options[key] = value
+    return {'input': record['input'], 'output': record.get('output'), 'options': options}
+
+
+@log_call
+def iter_job_list(source):
+    """
+    Yield job records from a list file or stdin.
+    Malformed lines are logged and yielded as {'input': '<source>:<line>', 'error': message}
+    so callers can count them as failures.
+    Args:
+        source (str): Path of the list file, or '-' for stdin.
+    Yields:
+        dict: Parsed job records (see parse_job_line).
+    """
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        for lineno, line in enumerate(stream, 1):
+            try:
+                job = parse_job_line(line)
+            except ValueError as e:
+                logging.error(f"Job list {source}:{lineno}: {e}")
+                yield {'input': f"{source}:{lineno}", 'error': str(e)}
+                continue
+            if job is not None:
+                yield job
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
@@ -1,11 +1,125 @@
+import argparse
 import logging
+import logging.handlers
 import functools
 import inspect
+import json
+import multiprocessing
+import sys
 import threading
 import os
 
 ASYNC_LOG_PREFIX = '[async] '
 
+DEFAULT_LOG_FILE = "a2pcli.log"
+DEFAULT_LOG_LEVEL = "DEBUG"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Parent-side state: the queue workers log into and the listener that writes the file
+_log_queue = None
+_log_listener = None
+_file_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format log records as one JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "pid": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry)
+
+
+def setup_logging(log_file=DEFAULT_LOG_FILE, level=DEFAULT_LOG_LEVEL, json_format=False):
+    """
+    Configure process-safe logging in the parent process.
+    Records from this process and from pool workers (see worker_logging_kwargs) go through a
+    multiprocessing queue to a single QueueListener that owns a rotating log file. The previous
+    run's log is rotated away at the first call. Calling again only updates level and format.
+    Args:
+        log_file (str): Log file path.
+        level (str or int): Logging level name or number.
+        json_format (bool): Write JSON lines instead of plain text.
+    """
+    global _log_queue, _log_listener, _file_handler
+    root = logging.getLogger()
+    root.setLevel(level)
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    if _log_listener is not None:
+        _file_handler.setFormatter(formatter)
+        return
+    _file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+    if os.path.exists(log_file) and os.path.getsize(log_file) > 0:
+        _file_handler.doRollover()
+    _file_handler.setFormatter(formatter)
+    _log_queue = multiprocessing.Queue(-1)
+    _log_listener = logging.handlers.QueueListener(_log_queue, _file_handler, respect_handler_level=False)
+    _log_listener.start()
+    root.handlers[:] = [logging.handlers.QueueHandler(_log_queue)]
+
+
+def logging_options(argv):
+    """
+    Read --log_level and --log_json from command line arguments ahead of the full CLI parser,
+    so the log file is configured once, before the first record is written.
+    Invalid values fall back to the defaults here and are reported by the CLI parser.
+    Args:
+        argv (list): Command line arguments without the program name.
+    Returns:
+        dict: setup_logging keyword arguments {'level', 'json_format'}.
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--log_level", type=str.upper, default=DEFAULT_LOG_LEVEL)
+    parser.add_argument("--log_json", action="store_true")
+    known, _ = parser.parse_known_args(argv)
+    level = known.log_level if isinstance(logging.getLevelName(known.log_level), int) else DEFAULT_LOG_LEVEL
+    return {"level": level, "json_format": known.log_json}
+
+
+def shutdown_logging():
+    """
+    Flush and stop the log listener (call once before the parent process exits).
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+        _file_handler.close()
+
+
+def _init_worker_logging(queue, level):
+    """
+    Pool initializer: send every record of this worker to the parent's log queue.
+    """
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(queue)]
+    root.setLevel(level)
+
+
+def worker_logging_kwargs():
+    """
+    Return ProcessPoolExecutor keyword arguments that route worker logs to the parent's listener.
+    Returns:
+        dict: {'initializer', 'initargs'}, or {} when setup_logging was not called.
+    """
+    if _log_queue is None:
+        return {}
+    return {"initializer": _init_worker_logging, "initargs": (_log_queue, logging.getLogger().level)}
+
+
 def _log_entry(func, cls, args, kwargs, caller, is_async=False):
     """
     Log the entry of a function, including arguments, caller, thread, and process info.
@@ -14,7 +128,7 @@ def _log_entry(func, cls, args, kwargs, caller, is_async=False):
     logging.debug(
         f"{prefix}Entering {func.__qualname__} (class={cls}) "
         f"args={args} kwargs={kwargs} "
-        f"called_from={caller.function}:{caller.lineno} "
+        f"called_from={caller.f_code.co_name}:{caller.f_lineno} "
         f"thread={threading.current_thread().name} pid={os.getpid()}"
     )
 
@@ -44,12 +158,17 @@ def log_call(func):
             """
             Asynchronous wrapper for logging function calls.
             """
-            cls = args[0].__class__.__name__ if args and hasattr(args[0], '__class__') else None
-            caller = inspect.stack()[1]
-            _log_entry(func, cls, args, kwargs, caller, is_async=True)
+            # Only the argument formatting is skipped without DEBUG; exceptions are always logged
+            debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+            if debug:
+                cls = args[0].__class__.__name__ if args and hasattr(args[0], '__class__') else None
+                # sys._getframe is far cheaper than inspect.stack(), which reads source context
+                caller = sys._getframe(1)
+                _log_entry(func, cls, args, kwargs, caller, is_async=True)
             try:
                 result = await func(*args, **kwargs)
-                _log_exit(func, result, is_async=True)
+                if debug:
+                    _log_exit(func, result, is_async=True)
                 return result
             except Exception as e:
                 _log_exception(func, e, is_async=True)
@@ -61,12 +180,15 @@ def log_call(func):
             """
             Synchronous wrapper for logging function calls.
             """
-            cls = args[0].__class__.__name__ if args and hasattr(args[0], '__class__') else None
-            caller = inspect.stack()[1]
-            _log_entry(func, cls, args, kwargs, caller)
+            debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+            if debug:
+                cls = args[0].__class__.__name__ if args and hasattr(args[0], '__class__') else None
+                caller = sys._getframe(1)
+                _log_entry(func, cls, args, kwargs, caller)
             try:
                 result = func(*args, **kwargs)
-                _log_exit(func, result)
+                if debug:
+                    _log_exit(func, result)
                 return result
             except Exception as e:
                 _log_exception(func, e)
@@ -2,6 +2,9 @@ import configparser
 import sys
 from pathlib import Path
 
+VARIANTS_SECTION = 'VARIANTS'
+
+
 def get_options_path():
     """
     Return the absolute path to the options.ini file for the application.
@@ -16,6 +19,17 @@ def get_options_path():
     return base / 'options.ini'
 
 
+def _config():
+    """
+    Return a parser for options.ini that keeps the case of keys.
+    Every reader and writer must use it: a default ConfigParser lowercases the keys, so a save
+    through one would rewrite the case-sensitive variant names of the [VARIANTS] section.
+    """
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    return config
+
+
 def parse_value(val):
     """
     Parse a string value from options.ini and convert it to its appropriate type.
@@ -39,7 +53,7 @@ def load_options(section: str) -> dict:
     Returns a dict of options, or empty dict if section not present.
     Converts types: 'None'->None, 'True'->True, 'False'->False, ints, else str.
     """
-    config = configparser.ConfigParser()
+    config = _config()
     options_path = get_options_path()
     if not options_path.exists():
         return {}
@@ -52,19 +66,49 @@ def load_options(section: str) -> dict:
 def save_options(section: str, options: dict):
     """
     Save the given options dict to the specified section ('GUI' or 'CLI') in options.ini.
-    Overwrites only that section. Does NOT save input_dir/output_dir/log/version/check_update.
+    Overwrites only that section. Does NOT save input_dir/output_dir/log/version/check_update
+    or the per-run from_list/output_archive/shard/worker_id/results settings.
     """
-    config = configparser.ConfigParser()
+    config = _config()
     options_path = get_options_path()
     if options_path.exists():
         config.read(options_path)
-    # Exclude input_dir, output_dir, log, version, and check_update from saving
-    filtered = {k: str(v) for k, v in options.items() if k not in ('input_dir', 'output_dir', 'log', 'version', 'check_update')}
+    # Exclude input_dir, output_dir, log, version, check_update and per-node settings from saving
+    excluded = ('input_dir', 'output_dir', 'log', 'version', 'check_update', 'shard', 'worker_id', 'results', 'from_list', 'output_archive', 'profile', 'profile_file', 'plan', 'analyze', 'variant')
+    filtered = {k: str(v) for k, v in options.items() if k not in excluded}
     config[section] = filtered
     with open(options_path, 'w') as f:
         config.write(f)
 
 
+def load_variants() -> list:
+    """
+    Load the variant specs of the [VARIANTS] section, one 'name = overrides' line per variant.
+    Returns a list of 'name:overrides' specs (see logic/variants.py), or an empty list.
+    """
+    config = _config()  # Variant names are folder names; keep their case
+    options_path = get_options_path()
+    if not options_path.exists():
+        return []
+    config.read(options_path)
+    if VARIANTS_SECTION not in config:
+        return []
+    return [f"{name}:{overrides}" if overrides else name for name, overrides in config[VARIANTS_SECTION].items()]
+
+
+def save_variants(specs: list):
+    """
+    Save variant specs ('name:overrides') to the [VARIANTS] section, replacing it.
+    """
+    config = _config()
+    options_path = get_options_path()
+    if options_path.exists():
+        config.read(options_path)
+    config[VARIANTS_SECTION] = {name.strip(): overrides.strip() for name, _, overrides in (s.partition(':') for s in specs)}
+    with open(options_path, 'w') as f:
+        config.write(f)
+
+
 def print_options(section: str):
     """
     Print all options for the given section ('GUI' or 'CLI') from options.ini to stdout.
@@ -0,0 +1,296 @@
+"""
+This module implements the --plan dry run of A2P_Cli.
+Input files are found exactly as for a conversion, but only their headers are read (AVIF/HEIC
+dimensions come straight from the primary item's ISO-BMFF 'ispe' property), in parallel. The plan lists every
+file's dimensions and resolved destination, flags destination collisions and existing outputs,
+and estimates the run time from the metrics of past runs.
+"""
+
+import concurrent.futures
+import csv
+import json
+import logging
+import os
+import struct
+import time
+from pathlib import Path
+from PIL import Image
+from logic.autotune import AUTO_WORKERS, plan_workers
+from logic.convert import output_file_for
+from logic.decoders import DECODERS, SNIFF_BYTES, find_input_files, usable_input_formats
+from logic.logging_config import log_call
+from logic.sharding import parse_shard, select_shard
+from logic.writers import get_extension
+
+# Leading bytes parsed for the 'meta' box (item properties) of AVIF/HEIC files
+PLAN_HEADER_BYTES = 64 * 1024
+# Header reads are I/O bound: threads, and files per submitted batch
+PLAN_THREADS = 32
+PLAN_BATCH = 256
+# Run history used to calibrate the time estimate (in the user cache directory), how many runs
+# count, and how many are kept in the file
+METRICS_DIR = 'a2p_cli'
+METRICS_FILE = 'a2p-metrics.jsonl'
+METRICS_RUNS = 20
+METRICS_HISTORY = 200
+# Worker-seconds per megapixel assumed before any run has been recorded
+UNCALIBRATED_SECONDS_PER_MEGAPIXEL = 0.05
+
+PLAN_FIELDS = ('input', 'output', 'decoder', 'width', 'height', 'bytes', 'exists', 'collision', 'error')
+
+
+def _iter_boxes(data, start, end):
+    """
+    Yield (type, payload start, box end) for the ISO-BMFF boxes in data[start:end].
+    Raises:
+        ValueError: If a box header is malformed or a box runs past end.
+    """
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+        payload = pos + 8
+        if size == 1:
+            if pos + 16 > end:
+                raise ValueError('truncated box header')
+            size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+            payload = pos + 16
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos or pos + size > end:
+            raise ValueError(f"box '{box_type.decode('latin-1')}' runs past its container")
+        yield box_type, payload, pos + size
+        pos += size
+
+
+def _child(data, start, end, box_type):
+    """
+    Return (payload start, box end) of the first child box of a type, or None.
+    """
+    return next(((p, e) for t, p, e in _iter_boxes(data, start, end) if t == box_type), None)
+
+
+def _ispe_size(header):
+    """
+    Return the displayed (width, height) of the primary item of an AVIF/HEIC file, or None.
+    Walks meta -> pitm/iprp -> ipco/ipma, takes the 'ispe' extents associated with the primary
+    item and swaps them when its 'irot' rotates by 90 or 270 degrees. Returns None when the
+    boxes are missing, malformed or not within the header, so the caller can ask Pillow instead.
+    """
+    try:
+        meta = _child(header, 0, len(header), b'meta')
+        if meta is None:
+            return None
+        # 'meta', 'pitm' and 'ipma' are full boxes: 1 byte version and 3 bytes flags come first
+        meta_start, meta_end = meta[0] + 4, meta[1]
+        pitm, iprp = _child(header, meta_start, meta_end, b'pitm'), _child(header, meta_start, meta_end, b'iprp')
+        if pitm is None or iprp is None:
+            return None
+        if header[pitm[0]] == 0:
+            primary = struct.unpack('>H', header[pitm[0] + 4:pitm[0] + 6])[0]
+        else:
+            primary = struct.unpack('>I', header[pitm[0] + 4:pitm[0] + 8])[0]
+        ipco, ipma = _child(header, *iprp, b'ipco'), _child(header, *iprp, b'ipma')
+        if ipco is None or ipma is None:
+            return None
+        properties = [(t, p) for t, p, _ in _iter_boxes(header, *ipco)]
+        version, flags = header[ipma[0]], int.from_bytes(header[ipma[0] + 1:ipma[0] + 4], 'big')
+        pos = ipma[0] + 4
+        (count,) = struct.unpack('>I', header[pos:pos + 4])
+        pos += 4
+        indices = None
+        for _ in range(count):
+            id_format = '>H' if version < 1 else '>I'
+            item = struct.unpack(id_format, header[pos:pos + struct.calcsize(id_format)])[0]
+            pos += struct.calcsize(id_format)
+            associations = header[pos]
+            pos += 1
+            width = 2 if flags & 1 else 1
+            entries = [int.from_bytes(header[pos + i * width:pos + (i + 1) * width], 'big') for i in range(associations)]
+            pos += associations * width
+            if item == primary:
+                # The top bit flags an essential property; the rest is a 1-based ipco index
+                indices = [e & ((1 << (8 * width - 1)) - 1) for e in entries]
+                break
+        if not indices:
+            return None
+        size, rotation = None, 0
+        for index in indices:
+            if not 0 < index <= len(properties):
+                continue
+            box_type, payload = properties[index - 1]
+            if box_type == b'ispe':
+                size = struct.unpack('>II', header[payload + 4:payload + 12])
+            elif box_type == b'irot':
+                rotation = header[payload] & 3
+        if size is None:
+            return None
+        return (size[1], size[0]) if rotation in (1, 3) else size
+    except (ValueError, IndexError, struct.error) as e:
+        logging.debug(f"ISO-BMFF header not parsed: {e}")
+        return None
+
+
+def read_header(path):
+    """
+    Read the decoder and dimensions of an image without decoding its pixels.
+    Args:
+        path (Path or str): Image file.
+    Returns:
+        dict: {'decoder', 'width', 'height', 'bytes'}; 'error' instead of dimensions when unreadable.
+    """
+    entry = {'decoder': None, 'width': None, 'height': None, 'bytes': None}
+    try:
+        entry['bytes'] = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header = f.read(PLAN_HEADER_BYTES)
+        entry['decoder'] = next((name for name, dec in DECODERS.items() if dec['sniff'](header[:SNIFF_BYTES])), None)
+        size = _ispe_size(header) if entry['decoder'] in ('avif', 'heic') else None
+        if size is None:
+            # Pillow reads the header lazily; pixels are only decoded on load()
+            with Image.open(path) as img:
+                size = img.size
+        entry['width'], entry['height'] = size
+    except Exception as e:
+        entry['error'] = str(e)
+    return entry
+
+
+def _read_batch(paths):
+    return [read_header(p) for p in paths]
+
+
+def metrics_path():
+    """
+    Return the run metrics history file in the user cache directory
+    (%LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache elsewhere).
+    """
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / METRICS_DIR / METRICS_FILE
+
+
+def append_metrics(record):
+    """
+    Append one run's metrics to the history used by the planner, keeping the last METRICS_HISTORY runs.
+    """
+    path = metrics_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = path.read_text(encoding='utf-8').splitlines(keepends=True) if path.exists() else []
+        lines = lines[-(METRICS_HISTORY - 1):] + [json.dumps(record) + '\n']
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(''.join(lines), encoding='utf-8')
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning(f"Could not record run metrics: {e}")
+
+
+def load_metrics(limit=METRICS_RUNS):
+    """
+    Return the last limit run records that can calibrate an estimate.
+    """
+    path = metrics_path()
+    if not path.exists():
+        return []
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('input_bytes') and record.get('elapsed_seconds') and record.get('processes'):
+                records.append(record)
+    return records[-limit:]
+
+
+def estimate_seconds(total_bytes, total_pixels, processes, history):
+    """
+    Estimate the wall time of a run.
+    With history, the cost is the recorded worker-seconds per input byte; otherwise a
+    conservative per-megapixel default is used.
+    Returns:
+        dict: {'seconds', 'processes', 'calibrated', 'runs'}
+    """
+    if history:
+        worker_seconds = sum(r['elapsed_seconds'] * r['processes'] for r in history)
+        per_byte = worker_seconds / sum(r['input_bytes'] for r in history)
+        seconds = total_bytes * per_byte / processes
+    else:
+        seconds = total_pixels / 1e6 * UNCALIBRATED_SECONDS_PER_MEGAPIXEL / processes
+    return {'seconds': round(seconds, 1), 'processes': processes, 'calibrated': bool(history), 'runs': len(history)}
+
+
+@log_call
+def build_plan(input_dir, output_dir=None, recursive=False, max_workers=4, **kwargs):
+    """
+    Plan a directory conversion without converting anything.
+    Args:
+        input_dir (str): Input directory.
+        output_dir (str, optional): Output directory (default: same as input).
+        recursive (bool): Search subdirectories.
+        max_workers (int or 'auto'): Workers the estimate is made for.
+        **kwargs: output_format, input_formats, shard (as for convert_avif_to_png).
+    Returns:
+        dict: {'summary': dict, 'collisions': {output: [inputs]}, 'files': list of per-file dicts}
+    """
+    started = time.time()
+    input_path = Path(input_dir)
+    if not input_path.is_dir():
+        raise FileNotFoundError(f"Input directory '{input_dir}' does not exist.")
+    output_path = Path(output_dir) if output_dir else input_path
+    extension = get_extension(kwargs.get('output_format'))
+    input_formats = usable_input_formats(kwargs.get('input_formats'))
+    files = find_input_files(input_path, recursive, input_formats) if input_formats else []
+    files = select_shard(files, input_path, parse_shard(kwargs.get('shard')))
+    batches = [files[i:i + PLAN_BATCH] for i in range(0, len(files), PLAN_BATCH)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=PLAN_THREADS) as executor:
+        headers = [entry for batch in executor.map(_read_batch, batches) for entry in batch]
+
+    entries = []
+    by_output = {}
+    for src, header in zip(files, headers):
+        dest = output_file_for(src, input_path, output_path, output_dir, recursive, extension)
+        entry = dict(header, input=src.relative_to(input_path).as_posix(), output=str(dest), exists=dest.exists(), collision=False)
+        by_output.setdefault(entry['output'], []).append(entry)
+        entries.append(entry)
+    collisions = {}
+    for dest, group in by_output.items():
+        if len(group) > 1:
+            collisions[dest] = [e['input'] for e in group]
+            for e in group:
+                e['collision'] = True
+
+    total_bytes = sum(e['bytes'] or 0 for e in entries)
+    total_pixels = sum((e['width'] or 0) * (e['height'] or 0) for e in entries)
+    processes = plan_workers(files)['processes'] if max_workers == AUTO_WORKERS else max_workers
+    summary = {
+        'input_dir': str(input_path),
+        'files': len(entries),
+        'bytes': total_bytes,
+        'megapixels': round(total_pixels / 1e6, 1),
+        'largest': max(((e['width'] or 0) * (e['height'] or 0), e['input']) for e in entries)[1] if entries else None,
+        'unreadable': sum(1 for e in entries if 'error' in e),
+        'collisions': len(collisions),
+        'existing_outputs': sum(1 for e in entries if e['exists']),
+        'estimate': estimate_seconds(total_bytes, total_pixels, processes, load_metrics()),
+        'plan_seconds': round(time.time() - started, 3),
+    }
+    return {'summary': summary, 'collisions': collisions, 'files': entries}
+
+
+def write_plan(plan, path):
+    """
+    Write a plan as CSV (one row per file) when path ends in .csv, else as JSON.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=PLAN_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(plan['files'])
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(plan, f, indent=2)
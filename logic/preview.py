@@ -0,0 +1,142 @@
+"""
+This module implements the live preview of A2P_Cli's GUI.
+A selected file is decoded and classified once; a thumbnail and two small full-resolution
+samples are kept in an LRU cache keyed by path and modification time. Each option change re-runs
+the real output pipeline (emit_image) in memory: on the thumbnail with a fast PNG writer, so the
+preview can be shown at once, then on the samples with the selected writer to project the size
+and time of the full-size result.
+"""
+
+import io
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image
+from logic.convert import decode_and_classify, emit_image
+from logic.decoders import open_image
+from logic.logging_config import log_call
+
+# Longest side of the cached thumbnail
+PREVIEW_MAX_SIDE = 256
+# Writer of the displayed preview (the selected writer only runs on the samples)
+PREVIEW_FORMAT = 'png-fast'
+# Sides of the full-resolution samples; two sizes separate per-image from per-pixel cost
+PREVIEW_SAMPLE_SIDES = (128, 256)
+# Thumbnails kept in the per-process cache
+PREVIEW_CACHE_ENTRIES = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _native_sample(img, side):
+    """
+    Return a side x side mosaic of crops from the centres of the four quadrants, at full resolution.
+    A thumbnail has more detail per pixel than the image, so sizes are projected from these instead.
+    """
+    if img.width <= side and img.height <= side:
+        return img.copy()
+    half = side // 2
+    sample = Image.new(img.mode, (2 * half, 2 * half))
+    for i, (qx, qy) in enumerate(((1, 1), (3, 1), (1, 3), (3, 3))):
+        cx, cy = img.width * qx // 4, img.height * qy // 4
+        left = min(max(0, cx - half // 2), max(0, img.width - half))
+        top = min(max(0, cy - half // 2), max(0, img.height - half))
+        sample.paste(img.crop((left, top, left + half, top + half)), ((i % 2) * half, (i // 2) * half))
+    return sample
+
+
+@log_call
+def load_preview(path):
+    """
+    Return the cached preview source of a file, decoding it on a miss.
+    The image is classified at full size, so the preview takes the same class (and qb_* option)
+    as the conversion, and only then reduced to PREVIEW_MAX_SIDE.
+    Args:
+        path (Path or str): Input file.
+    Returns:
+        dict: {'thumb', 'samples', 'class', 'alpha', 'width', 'height'}
+    """
+    path = Path(path)
+    key = (str(path.resolve()), path.stat().st_mtime_ns)
+    with _cache_lock:
+        source = _cache.get(key)
+        if source is not None:
+            _cache.move_to_end(key)
+            return source
+    with open_image(path) as img:
+        width, height = img.size
+        img, img_type, alpha = decode_and_classify(img)
+        samples = [_native_sample(img, side) for side in PREVIEW_SAMPLE_SIDES]
+        thumb = img.copy()
+    thumb.thumbnail((PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE), Image.LANCZOS)
+    source = {
+        'thumb': thumb,
+        'samples': samples,
+        'class': img_type,
+        'alpha': alpha,
+        'width': width,
+        'height': height,
+    }
+    with _cache_lock:
+        _cache[key] = source
+        while len(_cache) > PREVIEW_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return source
+
+
+def clear_preview_cache():
+    """
+    Drop all cached preview sources.
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+def _run_pipeline(source, img, options):
+    """
+    Run emit_image on one image into memory.
+    Returns:
+        tuple: (encoded BytesIO, seconds)
+    """
+    buf = io.BytesIO()
+    start = time.perf_counter()
+    emit_image(img, source['class'], source['alpha'], buf, True, None, options)
+    return buf, time.perf_counter() - start
+
+
+@log_call
+def render_preview(source, options, on_image=None):
+    """
+    Run the output pipeline on a preview source.
+    The projected time is fitted as a per-image plus a per-pixel cost from the two samples
+    (palette building does not grow with the image); the projected size uses the larger sample.
+    Args:
+        source (dict): Result of load_preview.
+        options (dict): qb_color, qb_gray_color, qb_gray, method, dither, output_format.
+        on_image (callable, optional): Called with the RGBA preview as soon as it is ready,
+            before the samples are encoded with the selected writer.
+    Returns:
+        dict: {'image' (RGBA preview), 'seconds' (preview render), 'projected_bytes', 'projected_seconds'}
+    """
+    buf, seconds = _run_pipeline(source, source['thumb'], dict(options, output_format=PREVIEW_FORMAT))
+    buf.seek(0)
+    with Image.open(buf) as out:
+        image = out.convert('RGBA')
+    if on_image:
+        on_image(image)
+    runs = []
+    for sample in source['samples']:
+        encoded, elapsed = _run_pipeline(source, sample, options)
+        runs.append((sample.width * sample.height, elapsed, encoded.getbuffer().nbytes))
+    pixels = source['width'] * source['height']
+    (n1, t1, _), (n2, t2, size) = runs[0], runs[-1]
+    per_pixel = max(0.0, (t2 - t1) / (n2 - n1)) if n2 > n1 else t2 / max(1, n2)
+    fixed = max(0.0, t2 - per_pixel * n2)
+    return {
+        'image': image,
+        'seconds': seconds,
+        'projected_bytes': int(size * pixels / max(1, n2)),
+        'projected_seconds': fixed + per_pixel * pixels,
+    }
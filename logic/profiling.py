@@ -0,0 +1,146 @@
+"""
+This module implements the --profile mode of A2P_Cli.
+Each conversion task is profiled inside its worker process, either with cProfile or with a
+low-overhead stack sampler, and the per-task data is returned to the parent, which merges it
+into one pstats file or one flamegraph-ready collapsed-stack file.
+"""
+
+import collections
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from pathlib import Path
+
+PROFILE_MODES = {
+    'cprofile': 'Deterministic cProfile (pstats file)',
+    'sample': 'Stack sampling (collapsed stacks for flamegraph.pl / speedscope)',
+}
+DEFAULT_PROFILE_MODE = 'cprofile'
+PROFILE_EXTENSIONS = {'cprofile': '.pstats', 'sample': '.collapsed'}
+
+# Seconds between two stack samples of the sampling profiler
+SAMPLE_INTERVAL = 0.005
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread from a background thread.
+    Stacks are stored collapsed (root first, frames joined by ';') with their sample counts.
+    """
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    @staticmethod
+    def _label(code):
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+
+class _StatsHolder:
+    """
+    Minimal profiler stand-in so pstats.Stats can load a pickled stats dict.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profile_call(mode, func, *args, **kwargs):
+    """
+    Call func under the given profiler.
+    Args:
+        mode (str): 'cprofile' or 'sample'.
+        func (callable): Function to profile.
+    Returns:
+        tuple: (func result, picklable profile data for ProfileCollector.add)
+    """
+    if mode == 'sample':
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            counts = sampler.stop()
+        return result, dict(counts)
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.create_stats()
+    return result, profiler.stats
+
+
+class ProfileCollector:
+    """
+    Merge the profile data returned by the workers and write it to one file.
+    """
+
+    def __init__(self, mode):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.tasks = 0
+        self._stats = pstats.Stats() if mode == 'cprofile' else None
+        self._counts = collections.Counter()
+
+    def add(self, data):
+        """
+        Add the profile data of one task (ignored if None).
+        """
+        if data is None:
+            return
+        self.tasks += 1
+        if self.mode == 'cprofile':
+            self._stats.add(_StatsHolder(data))
+        else:
+            self._counts.update(data)
+
+    def write(self, path):
+        """
+        Write the merged profile: a pstats dump or collapsed stacks ('stack count' per line).
+        Returns:
+            Path: The written file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self.mode == 'cprofile':
+            self._stats.dump_stats(str(path))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in self._counts.most_common():
+                    f.write(f"{stack} {count}\n")
+        return path
+
+
+def default_profile_path(output_path, mode):
+    """
+    Return the default profile file in the output directory (a2p-profile.pstats / .collapsed).
+    """
+    return Path(output_path) / f"a2p-profile{PROFILE_EXTENSIONS[mode]}"
@@ -0,0 +1,600 @@
+"""
+This module implements the NumPy quantization engine for A2P_Cli (methods 3 and 4).
+Palettes come from Wu's variance-minimizing box cut (method 3), optionally refined by
+mini-batch k-means on a pixel subsample (method 4). Pixels are mapped to palette entries
+through a 3D inverse-colour-map LUT (an exact 256-entry table for grayscale), and Floyd-Steinberg dithering runs on row blocks
+with a vectorized wavefront, so every step works on many pixels at once.
+Ordered dithering (Bayer or blue-noise threshold matrices) is a per-pixel offset before the
+LUT lookup; it is also used with the Pillow methods, whose palette is taken from Pillow.
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from logic.logging_config import log_call
+
+WU_METHOD = 3
+KMEANS_METHOD = 4
+NUMPY_METHODS = (WU_METHOD, KMEANS_METHOD)
+
+# Wu histogram: 5 bits per channel, plus a zero row/column/plane for the cumulative moments
+WU_BITS = 5
+WU_SIZE = (1 << WU_BITS) + 1
+
+# Default inverse-colour-map LUT resolution (bits per channel; see lut_bits) and per-process cache budget
+LUT_BITS = 5
+# LUT 'bits' value of the exact 1-D table used for grayscale: 256 entries indexed by the first channel
+GRAY_LUT_BITS = 8
+# Palettes with more entries than this are too dense for 5-bit LUT cells and get a 6-bit LUT
+LUT_FINE_MIN_COLORS = 32
+LUT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Mini-batch k-means settings
+KMEANS_SAMPLE = 65536
+KMEANS_BATCH = 2048
+KMEANS_ITERATIONS = 60
+KMEANS_SEED = 0
+
+# Rows per Floyd-Steinberg block; each block is processed as one wavefront
+DITHER_BLOCK_ROWS = 512
+
+# Ordered dither modes: dither value -> threshold matrix ('bayer', size) or ('blue_noise', size)
+ORDERED_DITHERS = {
+    2: ('bayer', 8),
+    3: ('blue_noise', 64),
+    4: ('bayer', 4),
+}
+# Void-and-cluster settings of the blue-noise tile
+BLUE_NOISE_SIGMA = 1.5
+BLUE_NOISE_SEED = 0
+
+
+def _wu_moments(rgb):
+    """
+    Build cumulative Wu moments (weight, r, g, b, r²+g²+b²) over a 33³ grid.
+    Args:
+        rgb (np.ndarray): Pixels as an (N, 3) uint8 array.
+    Returns:
+        np.ndarray: Array of shape (5, 33, 33, 33).
+    """
+    shift = 8 - WU_BITS
+    bins = (rgb >> shift).astype(np.intp) + 1
+    flat = (bins[:, 0] * WU_SIZE + bins[:, 1]) * WU_SIZE + bins[:, 2]
+    vals = rgb.astype(np.float64)
+    size = WU_SIZE ** 3
+    moments = np.empty((5, size))
+    moments[0] = np.bincount(flat, minlength=size)
+    for c in range(3):
+        moments[c + 1] = np.bincount(flat, weights=vals[:, c], minlength=size)
+    moments[4] = np.bincount(flat, weights=(vals * vals).sum(axis=1), minlength=size)
+    moments = moments.reshape(5, WU_SIZE, WU_SIZE, WU_SIZE)
+    for axis in (1, 2, 3):
+        np.cumsum(moments, axis=axis, out=moments)
+    return moments
+
+
+def _wu_volume(moments, box):
+    """
+    Sum the moments inside a box (r0, r1, g0, g1, b0, b1), lower bounds exclusive.
+    """
+    r0, r1, g0, g1, b0, b1 = box
+    m = moments
+    return (m[:, r1, g1, b1] - m[:, r1, g1, b0] - m[:, r1, g0, b1] + m[:, r1, g0, b0]
+            - m[:, r0, g1, b1] + m[:, r0, g1, b0] + m[:, r0, g0, b1] - m[:, r0, g0, b0])
+
+
+def _wu_lower_volumes(moments, box, axis, positions):
+    """
+    Sum the moments of the lower part (lo, i] of a box along one axis, for every cut position i.
+    Returns:
+        np.ndarray: Array of shape (5, len(positions)).
+    """
+    m = np.moveaxis(moments, axis + 1, 1)
+    (a0, a1), (b0, b1) = [box[2 * a:2 * a + 2] for a in range(3) if a != axis]
+
+    def face(x):
+        return m[:, x, a1, b1] - m[:, x, a1, b0] - m[:, x, a0, b1] + m[:, x, a0, b0]
+
+    return face(positions) - face(box[2 * axis])[:, None]
+
+
+def _wu_variance(moments, box):
+    """
+    Return the summed squared error of a box around its mean colour.
+    """
+    w, r, g, b, m2 = _wu_volume(moments, box)
+    if w == 0:
+        return 0.0
+    return m2 - (r * r + g * g + b * b) / w
+
+
+def _wu_cut(moments, box):
+    """
+    Find the best axis-aligned cut of a box.
+    Returns:
+        tuple or None: (lower_box, upper_box), or None if the box cannot be split.
+    """
+    whole = _wu_volume(moments, box)
+    best_score, best = 0.0, None
+    for axis in range(3):
+        lo, hi = box[2 * axis], box[2 * axis + 1]
+        if hi - lo < 2:
+            continue
+        positions = np.arange(lo + 1, hi)
+        lower = _wu_lower_volumes(moments, box, axis, positions)
+        upper = whole[:, None] - lower
+        valid = (lower[0] > 0) & (upper[0] > 0)
+        if not valid.any():
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = ((lower[1:4] ** 2).sum(axis=0) / lower[0]) + ((upper[1:4] ** 2).sum(axis=0) / upper[0])
+        score = np.where(valid, score, -np.inf)
+        k = int(np.argmax(score))
+        if score[k] > best_score:
+            best_score = score[k]
+            cut = int(positions[k])
+            best = (box[:2 * axis] + (lo, cut) + box[2 * axis + 2:],
+                    box[:2 * axis] + (cut, hi) + box[2 * axis + 2:])
+    return best
+
+
+@log_call
+def wu_palette(rgb, colors):
+    """
+    Compute a palette with Wu's colour quantizer.
+    Args:
+        rgb (np.ndarray): Pixels as an (N, 3) uint8 array.
+        colors (int): Maximum number of palette entries.
+    Returns:
+        np.ndarray: Palette as a (K, 3) float64 array, K <= colors.
+    """
+    moments = _wu_moments(rgb)
+    full = WU_SIZE - 1
+    boxes = [(0, full, 0, full, 0, full)]
+    variances = [_wu_variance(moments, boxes[0])]
+    while len(boxes) < colors:
+        i = int(np.argmax(variances))
+        if variances[i] <= 0:
+            break
+        split = _wu_cut(moments, boxes[i])
+        if split is None:
+            variances[i] = 0.0
+            continue
+        boxes[i] = split[0]
+        variances[i] = _wu_variance(moments, split[0])
+        boxes.append(split[1])
+        variances.append(_wu_variance(moments, split[1]))
+    palette = []
+    for box in boxes:
+        w, r, g, b, _ = _wu_volume(moments, box)
+        if w > 0:
+            palette.append((r / w, g / w, b / w))
+    return np.array(palette, dtype=np.float64)
+
+
+@log_call
+def wu_gray_palette(gray, colors):
+    """
+    Compute a grayscale palette with Wu's quantizer on the full 256-level histogram.
+    The 3D histogram of wu_palette has 32 bins per channel, which caps gray output at 32 levels.
+    Args:
+        gray (np.ndarray): Gray values as an (N,) uint8 array.
+        colors (int): Maximum number of palette entries.
+    Returns:
+        np.ndarray: Gray palette as a (K, 3) float64 array, K <= colors.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    values = np.arange(256, dtype=np.float64)
+    cw = np.concatenate(([0.0], np.cumsum(hist)))
+    cs = np.concatenate(([0.0], np.cumsum(hist * values)))
+    cs2 = np.concatenate(([0.0], np.cumsum(hist * values * values)))
+
+    def variance(lo, hi):
+        w = cw[hi] - cw[lo]
+        return cs2[hi] - cs2[lo] - (cs[hi] - cs[lo]) ** 2 / w if w > 0 else 0.0
+
+    boxes = [(0, 256)]
+    variances = [variance(0, 256)]
+    while len(boxes) < colors:
+        i = int(np.argmax(variances))
+        if variances[i] <= 0:
+            break
+        lo, hi = boxes[i]
+        cuts = np.arange(lo + 1, hi)
+        w_lo, w_hi = cw[cuts] - cw[lo], cw[hi] - cw[cuts]
+        s_lo, s_hi = cs[cuts] - cs[lo], cs[hi] - cs[cuts]
+        valid = (w_lo > 0) & (w_hi > 0)
+        if not valid.any():
+            variances[i] = 0.0
+            continue
+        # Maximizing the summed squared means of both halves minimizes their summed variance
+        score = np.where(valid, s_lo ** 2 / np.where(valid, w_lo, 1) + s_hi ** 2 / np.where(valid, w_hi, 1), -np.inf)
+        cut = int(cuts[np.argmax(score)])
+        boxes[i], variances[i] = (lo, cut), variance(lo, cut)
+        boxes.append((cut, hi))
+        variances.append(variance(cut, hi))
+    levels = [(cs[hi] - cs[lo]) / (cw[hi] - cw[lo]) for lo, hi in boxes if cw[hi] > cw[lo]]
+    return np.repeat(np.array(levels, dtype=np.float64)[:, None], 3, axis=1)
+
+
+def _nearest(points, palette):
+    """
+    Return the index of the nearest palette entry for each point (squared Euclidean distance).
+    """
+    d = (palette * palette).sum(axis=1)[None, :] - 2.0 * points @ palette.T
+    return np.argmin(d, axis=1)
+
+
+@log_call
+def kmeans_palette(rgb, colors, centers=None):
+    """
+    Compute a palette with mini-batch k-means on a pixel subsample, seeded by Wu's palette.
+    Args:
+        rgb (np.ndarray): Pixels as an (N, 3) uint8 array.
+        colors (int): Maximum number of palette entries.
+        centers (np.ndarray, optional): Seed palette (default: wu_palette).
+    Returns:
+        np.ndarray: Palette as a (K, 3) float64 array, K <= colors.
+    """
+    centers = wu_palette(rgb, colors) if centers is None else np.array(centers, dtype=np.float64)
+    rng = np.random.default_rng(KMEANS_SEED)
+    if rgb.shape[0] > KMEANS_SAMPLE:
+        sample = rgb[rng.choice(rgb.shape[0], KMEANS_SAMPLE, replace=False)]
+    else:
+        sample = rgb
+    sample = sample.astype(np.float64)
+    k = centers.shape[0]
+    counts = np.zeros(k)
+    for _ in range(KMEANS_ITERATIONS):
+        batch = sample[rng.integers(0, sample.shape[0], min(KMEANS_BATCH, sample.shape[0]))]
+        labels = _nearest(batch, centers)
+        n = np.bincount(labels, minlength=k).astype(np.float64)
+        hit = n > 0
+        sums = np.stack([np.bincount(labels, weights=batch[:, c], minlength=k) for c in range(3)], axis=1)
+        counts += n
+        # Per-center learning rate 1/count, applied to the batch mean in one step
+        rate = np.where(hit, n / np.maximum(counts, 1), 0.0)[:, None]
+        means = np.where(hit[:, None], sums / np.maximum(n, 1)[:, None], centers)
+        centers += rate * (means - centers)
+    return centers
+
+
+@log_call
+def build_palette_lut(palette, bits=LUT_BITS):
+    """
+    Build a 3D inverse-colour map: nearest palette index for every cell of a 2**bits per channel grid.
+    With bits=GRAY_LUT_BITS it is the exact 1-D table of a gray image: nearest entry for every level.
+    Args:
+        palette (np.ndarray): (K, 3) palette.
+        bits (int): Bits per channel of the LUT grid, or GRAY_LUT_BITS.
+    Returns:
+        np.ndarray: Flat uint8 array of length 2**(3*bits), or 256 for GRAY_LUT_BITS.
+    """
+    if bits == GRAY_LUT_BITS:
+        levels = np.repeat(np.arange(256, dtype=np.float64)[:, None], 3, axis=1)
+        return _nearest(levels, np.asarray(palette, dtype=np.float64)).astype(np.uint8)
+    levels = 1 << bits
+    step = 256 // levels
+    # float32 distances are precise enough on this grid and halve the cost of a 6-bit LUT
+    axis = np.arange(levels, dtype=np.float32) * step + (step - 1) / 2.0
+    grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+    lut = np.empty(grid.shape[0], dtype=np.uint8)
+    pal = np.asarray(palette, dtype=np.float32)
+    chunk = 16384
+    for start in range(0, grid.shape[0], chunk):
+        lut[start:start + chunk] = _nearest(grid[start:start + chunk], pal)
+    return lut
+
+
+_lut_cache = OrderedDict()
+_lut_cache_lock = threading.Lock()
+_lut_cache_stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+
+
+def get_palette_lut(palette, bits=LUT_BITS):
+    """
+    Return the LUT for a palette from the per-process LRU cache, building it on a miss.
+    Palettes are keyed by a hash of their uint8 entries, so images that end up with the same
+    palette share one LUT. The cache is bounded by LUT_CACHE_MAX_BYTES.
+    Args:
+        palette (np.ndarray): (K, 3) uint8 palette.
+        bits (int): Bits per channel of the LUT grid (5 or 6), or GRAY_LUT_BITS.
+    Returns:
+        np.ndarray: Flat uint8 LUT (treat as read-only).
+    """
+    if bits not in (5, 6, GRAY_LUT_BITS):
+        raise ValueError(f"LUT bits must be 5, 6 or {GRAY_LUT_BITS}, got {bits}")
+    pal = np.ascontiguousarray(palette, dtype=np.uint8)
+    key = (bits, hashlib.blake2b(pal.tobytes(), digest_size=16).digest())
+    with _lut_cache_lock:
+        lut = _lut_cache.get(key)
+        if lut is not None:
+            _lut_cache.move_to_end(key)
+            _lut_cache_stats['hits'] += 1
+            return lut
+        _lut_cache_stats['misses'] += 1
+    lut = build_palette_lut(pal, bits)
+    with _lut_cache_lock:
+        if key not in _lut_cache:
+            _lut_cache[key] = lut
+            _lut_cache_stats['bytes'] += lut.nbytes
+            while _lut_cache_stats['bytes'] > LUT_CACHE_MAX_BYTES and len(_lut_cache) > 1:
+                _, evicted = _lut_cache.popitem(last=False)
+                _lut_cache_stats['bytes'] -= evicted.nbytes
+    return lut
+
+
+def lut_cache_info():
+    """
+    Return LUT cache statistics for this process.
+    Returns:
+        dict: hits, misses, entries and bytes.
+    """
+    with _lut_cache_lock:
+        return dict(_lut_cache_stats, entries=len(_lut_cache))
+
+
+def clear_lut_cache():
+    """
+    Drop all cached LUTs and reset the statistics.
+    """
+    with _lut_cache_lock:
+        _lut_cache.clear()
+        _lut_cache_stats.update(hits=0, misses=0, bytes=0)
+
+
+def lut_bits(palette, mode):
+    """
+    Return the LUT resolution for a palette: the exact gray table for 'L', 6 bits for palettes
+    with more than LUT_FINE_MIN_COLORS entries, else LUT_BITS.
+    """
+    if mode == 'L':
+        return GRAY_LUT_BITS
+    return 6 if len(palette) > LUT_FINE_MIN_COLORS else LUT_BITS
+
+
+def _lut_index(values, bits=LUT_BITS):
+    """
+    Map (..., 3) values in 0..255 to flat LUT cell indices (the rounded first channel for GRAY_LUT_BITS).
+    """
+    if bits == GRAY_LUT_BITS:
+        return np.rint(values[..., 0]).astype(np.intp)
+    q = values.astype(np.intp) >> (8 - bits)
+    return (q[..., 0] << (2 * bits)) | (q[..., 1] << bits) | q[..., 2]
+
+
+def map_pixels(rgb, lut, bits=LUT_BITS):
+    """
+    Map an (H, W, 3) uint8 image to palette indices without dithering.
+    """
+    return np.take(lut, _lut_index(rgb, bits))
+
+
+def dither_pixels(rgb, palette, lut, bits=LUT_BITS):
+    """
+    Map an (H, W, 3) uint8 image to palette indices with Floyd-Steinberg error diffusion.
+    Each block of rows is processed as a wavefront: pixel (y, x) only depends on pixels with a
+    smaller x + 2y, so all pixels with the same x + 2y are quantized together.
+    The last row's error is carried into the next block, so the result equals serial Floyd-Steinberg
+    (scanning left to right) with the LUT as the nearest-colour search.
+    Args:
+        rgb (np.ndarray): (H, W, 3) uint8 image.
+        palette (np.ndarray): (K, 3) palette.
+        lut (np.ndarray): LUT from build_palette_lut.
+        bits (int): Bits per channel of the LUT grid.
+    Returns:
+        np.ndarray: (H, W) uint8 palette indices.
+    """
+    height, width = rgb.shape[:2]
+    pal = np.asarray(palette, dtype=np.float32)
+    out = np.empty(height * width, dtype=np.uint8)
+    stride = width + 2
+    carry = np.zeros((width, 3), dtype=np.float32)
+    for top in range(0, height, DITHER_BLOCK_ROWS):
+        rows = min(DITHER_BLOCK_ROWS, height - top)
+        # One padding column on each side and one extra row that collects error for the next block
+        work = np.zeros((rows + 1, stride, 3), dtype=np.float32)
+        work[:rows, 1:width + 1] = rgb[top:top + rows]
+        work[0, 1:width + 1] += carry
+        flat = work.reshape(-1, 3)
+        ys = np.arange(rows, dtype=np.intp)
+        work_base = ys * width + 1          # flat work index of (y, x) is y*stride + x + 1 with x = t - 2y
+        out_base = ys * (width - 2) + top * width  # flat output index of (y, x) is (top + y)*width + x
+        for t in range(width + 2 * (rows - 1)):
+            y_lo = max(0, (t - width + 2) // 2)
+            y_hi = min(rows - 1, t // 2)
+            idx = work_base[y_lo:y_hi + 1] + t
+            v = np.clip(flat[idx], 0.0, 255.0)
+            q = np.take(lut, _lut_index(v, bits))
+            out[out_base[y_lo:y_hi + 1] + t] = q
+            err = v - pal[q]
+            flat[idx + 1] += err * (7.0 / 16.0)
+            flat[idx + stride - 1] += err * (3.0 / 16.0)
+            flat[idx + stride] += err * (5.0 / 16.0)
+            flat[idx + stride + 1] += err * (1.0 / 16.0)
+        carry = work[rows, 1:width + 1].copy()
+    return out.reshape(height, width)
+
+
+def _bayer_matrix(size):
+    """
+    Return the size x size Bayer index matrix (size a power of two).
+    """
+    m = np.zeros((1, 1))
+    while m.shape[0] < size:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return m
+
+
+def _blue_noise_matrix(size, sigma=BLUE_NOISE_SIGMA, seed=BLUE_NOISE_SEED):
+    """
+    Return a size x size blue-noise rank matrix built with Ulichney's void-and-cluster method.
+    The energy of a pixel is the Gaussian-filtered (toroidal) density of set pixels around it;
+    set pixels are ranked by repeatedly removing the tightest cluster, unset ones by repeatedly
+    filling the largest void.
+    """
+    n = size * size
+    d = np.minimum(np.arange(size), size - np.arange(size)).astype(np.float64)
+    kernel = np.exp(-(d[:, None] ** 2 + d[None, :] ** 2) / (2.0 * sigma * sigma))
+
+    def splat(pos):
+        return np.roll(kernel, divmod(int(pos), size), axis=(0, 1)).ravel()
+
+    rng = np.random.default_rng(seed)
+    pattern = np.zeros(n, dtype=bool)
+    pattern[rng.choice(n, n // 10, replace=False)] = True
+    energy = np.real(np.fft.ifft2(np.fft.fft2(pattern.reshape(size, size)) * np.fft.fft2(kernel))).ravel()
+    # Relax the random start: move the tightest cluster into the largest void until stable
+    for _ in range(n):
+        cluster = int(np.argmax(np.where(pattern, energy, -np.inf)))
+        pattern[cluster] = False
+        energy -= splat(cluster)
+        void = int(np.argmin(np.where(pattern, np.inf, energy)))
+        pattern[void] = True
+        energy += splat(void)
+        if void == cluster:
+            break
+    ranks = np.empty(n, dtype=np.float64)
+    ones = int(pattern.sum())
+    p, e = pattern.copy(), energy.copy()
+    for rank in range(ones - 1, -1, -1):
+        cluster = int(np.argmax(np.where(p, e, -np.inf)))
+        p[cluster] = False
+        e -= splat(cluster)
+        ranks[cluster] = rank
+    # Filling the largest void past half is the same as removing the tightest cluster of unset pixels
+    for rank in range(ones, n):
+        void = int(np.argmin(np.where(pattern, np.inf, energy)))
+        pattern[void] = True
+        energy += splat(void)
+        ranks[void] = rank
+    return ranks.reshape(size, size)
+
+
+@functools.lru_cache(maxsize=None)
+def threshold_matrix(dither):
+    """
+    Return the threshold matrix of an ordered dither mode, normalized to [-0.5, 0.5).
+    Args:
+        dither (int): Key of ORDERED_DITHERS.
+    Returns:
+        np.ndarray: (N, N) float32 matrix (treat as read-only).
+    """
+    kind, size = ORDERED_DITHERS[dither]
+    ranks = _bayer_matrix(size) if kind == 'bayer' else _blue_noise_matrix(size)
+    return ((ranks + 0.5) / ranks.size - 0.5).astype(np.float32)
+
+
+def palette_spread(palette):
+    """
+    Return the median distance from each palette entry to its nearest neighbour.
+    This is the step between neighbouring palette colours that ordered dithering has to bridge.
+    """
+    pal = np.unique(np.asarray(palette, dtype=np.float64).reshape(-1, 3), axis=0)
+    if pal.shape[0] < 2:
+        return 0.0
+    d = ((pal[:, None, :] - pal[None, :, :]) ** 2).sum(axis=2)
+    np.fill_diagonal(d, np.inf)
+    return float(np.median(np.sqrt(d.min(axis=1))))
+
+
+def ordered_dither_pixels(rgb, palette, lut, matrix, top=0, bits=LUT_BITS):
+    """
+    Map an (H, W, 3) uint8 image to palette indices with ordered dithering.
+    The tiled threshold matrix, scaled by the palette spread, is added to every pixel before the
+    LUT lookup. A pixel only depends on its own value and position, so strips of an image can be
+    processed independently; top is the row of rgb within the full image.
+    Args:
+        rgb (np.ndarray): (H, W, 3) uint8 image.
+        palette (np.ndarray): (K, 3) palette.
+        lut (np.ndarray): LUT from build_palette_lut.
+        matrix (np.ndarray): Threshold matrix from threshold_matrix.
+        top (int): Image row of the first row of rgb.
+        bits (int): Bits per channel of the LUT grid.
+    Returns:
+        np.ndarray: (H, W) uint8 palette indices.
+    """
+    height, width = rgb.shape[:2]
+    size = matrix.shape[0]
+    columns = matrix[:, np.arange(width) % size] * np.float32(palette_spread(palette))
+    out = np.empty((height, width), dtype=np.uint8)
+    for start in range(0, height, DITHER_BLOCK_ROWS):
+        stop = min(start + DITHER_BLOCK_ROWS, height)
+        v = rgb[start:stop].astype(np.float32)
+        v += columns[(np.arange(start, stop) + top) % size][:, :, None]
+        np.clip(v, 0.0, 255.0, out=v)
+        out[start:stop] = np.take(lut, _lut_index(v, bits))
+    return out
+
+
+def pillow_palette(src, colors, method):
+    """
+    Return the palette Pillow's quantizer (methods 0-2) builds for an image, used entries only.
+    Args:
+        src (PIL.Image): 'L' or 'RGB' image.
+        colors (int): Number of palette entries.
+        method (int): Pillow quantization method.
+    Returns:
+        np.ndarray: (K, 3) uint8 palette.
+    """
+    quantized = src.quantize(colors=colors, method=method, dither=0)
+    entries = np.array(quantized.getpalette(), dtype=np.uint8).reshape(-1, 3)
+    return entries[np.unique(np.asarray(quantized))]
+
+
+def numpy_palette(pixels, colors, method, mode):
+    """
+    Build the palette of method 3 or 4, rounded to what is written.
+    Gray ('L') pixels get a palette at full 8-bit precision (wu_gray_palette).
+    Args:
+        pixels (np.ndarray): (N, 3) uint8 pixels.
+        colors (int): Maximum number of palette entries.
+        method (int): WU_METHOD or KMEANS_METHOD.
+        mode (str): 'L' for gray pixels, anything else for RGB.
+    Returns:
+        np.ndarray: (K, 3) uint8 palette.
+    """
+    seed = wu_gray_palette(pixels[:, 0], colors) if mode == 'L' else wu_palette(pixels, colors)
+    palette = kmeans_palette(pixels, colors, seed) if method == KMEANS_METHOD else seed
+    return np.clip(np.rint(palette), 0, 255).astype(np.uint8)
+
+
+@log_call
+def quantize_numpy(img, colors, method=WU_METHOD, dither=1, mode='P'):
+    """
+    Quantize an image with the NumPy engine.
+    The Pillow methods (0-2) only supply the palette; this is how they get ordered dithering.
+    Args:
+        img (PIL.Image): Image to quantize.
+        colors (int): Number of palette entries (2..256).
+        method (int): WU_METHOD (3), KMEANS_METHOD (4) or a Pillow method (0-2).
+        dither (int): 0=None, 1=Floyd-Steinberg, or a key of ORDERED_DITHERS.
+        mode (str): 'L' quantizes the luminance only, anything else quantizes RGB.
+    Returns:
+        PIL.Image: Palette ('P') image.
+    """
+    src = img.convert('L').convert('RGB') if mode == 'L' else img.convert('RGB')
+    rgb = np.asarray(src)
+    pixels = rgb.reshape(-1, 3)
+    if method in NUMPY_METHODS:
+        # Rounded first: the written palette is what the LUT maps to and what dithering diffuses against
+        palette = numpy_palette(pixels, colors, method, mode)
+    else:
+        palette = pillow_palette(src, colors, method)
+    # Gray images map through the exact 256-entry table; a 5-bit grid would merge levels
+    # Gray images map through the exact 256-entry table and dense palettes through a 6-bit LUT,
+    # so no palette entry is merged with a neighbour in one LUT cell
+    bits = lut_bits(palette, mode)
+    lut = get_palette_lut(palette, bits)
+    if dither in ORDERED_DITHERS:
+        indices = ordered_dither_pixels(rgb, palette, lut, threshold_matrix(dither), bits=bits)
+    elif dither:
+        indices = dither_pixels(rgb, palette, lut, bits)
+    else:
+        indices = map_pixels(rgb, lut, bits)
+    out = Image.fromarray(indices, 'P')
+    out.putpalette(palette.flatten().tolist())
+    return out
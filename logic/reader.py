@@ -0,0 +1,124 @@
+"""
+This module implements the input reader layer of A2P_Cli (--reader).
+Instead of letting Pillow and the decoder plugins issue many small buffered reads and seeks
+on the input path (costly on network filesystems), each file is read with one bulk read, or
+memory-mapped, and the decoder gets an in-memory file object over those bytes. Upcoming files
+are announced to the kernel with posix_fadvise so their read-ahead overlaps the current decode.
+Bytes and seconds spent reading are counted per process for the run metrics.
+"""
+
+import io
+import logging
+import mmap
+import os
+import threading
+import time
+
+READERS = {
+    'read': 'One bulk read per file into memory (default)',
+    'mmap': 'Memory-map each file; pages are read on first access',
+    'path': 'Let the decoder open and read the file itself',
+}
+DEFAULT_READER = 'read'
+
+_totals = {'files': 0, 'bytes': 0, 'seconds': 0.0}
+_totals_lock = threading.Lock()
+
+
+class _MappedFile(mmap.mmap):
+    """
+    Read-only mapping that also carries the file name, like an open file object.
+    """
+    name = None
+
+
+def _advise(fd, advice):
+    """
+    Give the kernel an access pattern hint for a whole file; a no-op where unsupported.
+    """
+    if hasattr(os, 'posix_fadvise') and advice is not None:
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError as e:
+            logging.debug(f"posix_fadvise failed: {e}")
+
+
+def prefetch(path):
+    """
+    Ask the kernel to start reading a file that will be decoded soon (POSIX_FADV_WILLNEED).
+    Returns immediately; the read-ahead runs in the background. A no-op without posix_fadvise.
+    Args:
+        path (Path or str): File to prefetch.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        _advise(fd, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def _record(size, seconds):
+    with _totals_lock:
+        _totals['files'] += 1
+        _totals['bytes'] += size
+        _totals['seconds'] += seconds
+
+
+def read_input(path, reader=DEFAULT_READER):
+    """
+    Open an input file for decoding with the given reader.
+    Args:
+        path (Path or str): Input file.
+        reader (str): Key of READERS.
+    Returns:
+        Path/str for 'path', otherwise a seekable file object with a 'name' attribute:
+        a BytesIO sharing the bytes of one bulk read, or a read-only memory map.
+    Raises:
+        ValueError: If reader is unknown.
+        OSError: If the file cannot be read.
+    """
+    if reader not in READERS:
+        raise ValueError(f"Unknown reader '{reader}' (choices: {', '.join(READERS)})")
+    if reader == 'path':
+        return path
+    started = time.perf_counter()
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        _advise(fd, getattr(os, 'POSIX_FADV_SEQUENTIAL', None))
+        size = os.fstat(fd).st_size
+        if reader == 'mmap' and size:
+            src = _MappedFile(fd, 0, access=mmap.ACCESS_READ)
+            if hasattr(src, 'madvise'):
+                src.madvise(mmap.MADV_WILLNEED)
+        else:
+            # FileIO.readall sizes its buffer from fstat, so this is one read into one bytes object,
+            # and BytesIO shares that object instead of copying it
+            with open(fd, 'rb', buffering=0, closefd=False) as f:
+                src = io.BytesIO(f.readall())
+    finally:
+        os.close(fd)
+    src.name = str(path)
+    _record(size, time.perf_counter() - started)
+    return src
+
+
+def read_totals():
+    """
+    Return this process's reader counters: {'files', 'bytes', 'seconds'}.
+    For mmap the seconds cover mapping only; the pages are read during decoding.
+    """
+    with _totals_lock:
+        return dict(_totals)
+
+
+def read_delta(before):
+    """
+    Return the reader counters accumulated since an earlier read_totals() snapshot.
+    """
+    now = read_totals()
+    return {key: now[key] - before[key] for key in now}
@@ -0,0 +1,142 @@
+"""
+This module implements deterministic sharding for multi-node batch runs.
+A file belongs to shard K of N when a stable hash of its path relative to the input
+directory is K-1 modulo N, so N independent processes cover a shared tree with no
+overlap and no coordinator. Each shard writes its own JSON result file, and
+merge_results combines them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+from pathlib import Path
+from logic.logging_config import log_call
+
+RESULTS_PREFIX = 'a2p-results-'
+
+
+def parse_shard(value):
+    """
+    Parse a shard specification 'K/N' (1 <= K <= N).
+    Args:
+        value (str, tuple or None): Specification, an already parsed (K, N) tuple, or None.
+    Returns:
+        tuple or None: (K, N), or None when sharding is off.
+    Raises:
+        ValueError: If the specification is malformed.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (tuple, list)):
+        k, n = value
+    else:
+        try:
+            k, n = (int(part) for part in str(value).split('/'))
+        except ValueError:
+            raise ValueError(f"Invalid shard '{value}': expected K/N, e.g. 1/4") from None
+    if not 1 <= k <= n:
+        raise ValueError(f"Invalid shard '{value}': K must be between 1 and N")
+    return k, n
+
+
+def shard_of(rel_path, n):
+    """
+    Return the 1-based shard of a relative path. Independent of OS, process and Python hash seed.
+    Args:
+        rel_path (Path or str): Path relative to the input directory.
+        n (int): Number of shards.
+    Returns:
+        int: Shard number in 1..n.
+    """
+    key = Path(rel_path).as_posix().encode('utf-8')
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % n + 1
+
+
+@log_call
+def select_shard(files, input_path, shard):
+    """
+    Keep only the files that belong to the given shard.
+    Args:
+        files (list): File paths under input_path.
+        input_path (Path): Input directory the hashes are relative to.
+        shard (tuple or None): (K, N), or None to keep all files.
+    Returns:
+        list: Files of this shard.
+    """
+    if shard is None:
+        return list(files)
+    k, n = shard
+    return [f for f in files if shard_of(Path(f).relative_to(input_path), n) == k]
+
+
+def default_worker_id(shard=None):
+    """
+    Return a worker id for result file names: the shard if any, else host and pid.
+    """
+    if shard is not None:
+        return f"shard-{shard[0]}-of-{shard[1]}"
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def results_path(directory, worker_id):
+    """
+    Return the result file path of a worker inside a directory.
+    """
+    return Path(directory) / f"{RESULTS_PREFIX}{worker_id}.json"
+
+
+@log_call
+def write_results(path, record):
+    """
+    Write a worker's result record as JSON (via a temporary file, so readers never see a partial file).
+    Args:
+        path (Path or str): Result file.
+        record (dict): Result record.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp, path)
+
+
+@log_call
+def merge_results(paths):
+    """
+    Merge worker result files into one summary and check shard coverage.
+    Args:
+        paths (list): Result files (or directories containing a2p-results-*.json files).
+    Returns:
+        dict: Summed counts, concatenated failures, per-worker records and coverage problems.
+    """
+    files = []
+    for p in map(Path, paths):
+        files.extend(sorted(p.glob(f"{RESULTS_PREFIX}*.json")) if p.is_dir() else [p])
+    merged = {"workers": [], "files": 0, "success": 0, "fail": 0, "failed_files": [], "elapsed_seconds": 0.0, "problems": []}
+    shards_seen = {}
+    for f in files:
+        with open(f, encoding='utf-8') as fh:
+            record = json.load(fh)
+        merged["workers"].append(record.get("worker_id", f.stem))
+        for key in ("files", "success", "fail"):
+            merged[key] += int(record.get(key, 0))
+        merged["failed_files"].extend(record.get("failed_files", []))
+        merged["elapsed_seconds"] = max(merged["elapsed_seconds"], float(record.get("elapsed_seconds", 0.0)))
+        shard = parse_shard(record.get("shard"))
+        if shard is not None:
+            if shard in shards_seen:
+                merged["problems"].append(f"Shard {shard[0]}/{shard[1]} reported twice ({shards_seen[shard]}, {f.name})")
+            shards_seen[shard] = f.name
+    counts = {n for _, n in shards_seen}
+    if len(counts) > 1:
+        merged["problems"].append(f"Result files use different shard counts: {sorted(counts)}")
+    for n in counts:
+        missing = [k for k in range(1, n + 1) if (k, n) not in shards_seen]
+        if missing:
+            merged["problems"].append(f"Missing shards of {n}: {', '.join(map(str, missing))}")
+    for problem in merged["problems"]:
+        logging.warning(problem)
+    return merged
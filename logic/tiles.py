@@ -0,0 +1,236 @@
+"""
+This module implements intra-image parallelism for very large images in A2P_Cli.
+Above TILE_MIN_PIXELS, one palette is built from a pixel subsample, horizontal strips are
+mapped/dithered on a thread pool (Pillow, NumPy and zlib release the GIL), and palette PNGs are
+compressed as independent zlib chunks, so one gigapixel scan no longer runs on a single core.
+"""
+
+import concurrent.futures
+import contextlib
+import math
+import struct
+import threading
+import zlib
+import numpy as np
+from PIL import Image
+from logic.autotune import usable_cpus
+from logic.logging_config import log_call
+from logic.quantize import (NUMPY_METHODS, ORDERED_DITHERS, get_palette_lut, lut_bits, map_pixels, numpy_palette,
+                            ordered_dither_pixels, threshold_matrix)
+
+# Images with at least this many pixels are quantized and encoded strip-parallel
+TILE_MIN_PIXELS = 32 * 1024 * 1024
+# Pixels the shared palette is built from
+TILE_PALETTE_SAMPLE = 4 * 1024 * 1024
+# Minimum rows per strip
+TILE_MIN_STRIP_ROWS = 256
+# Rows above each strip that are dithered again and discarded, so the strip starts with a
+# settled Floyd-Steinberg error state instead of a visible seam
+TILE_SEAM_ROWS = 32
+# Uncompressed bytes per parallel zlib chunk
+ZLIB_CHUNK_BYTES = 4 * 1024 * 1024
+# Window carried between zlib chunks as preset dictionary
+ZLIB_WINDOW = 32 * 1024
+
+_ADLER_BASE = 65521
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _thread_pool():
+    """
+    Return the per-process thread pool for strip work (created on first use).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=usable_cpus(), thread_name_prefix="a2p-tile")
+        return _pool
+
+
+def use_tiles(img):
+    """
+    Return True if an image is large enough for strip-parallel processing.
+    """
+    return img.width * img.height >= TILE_MIN_PIXELS
+
+
+def _subsample(img, mode):
+    """
+    Return a nearest-neighbour subsample of about TILE_PALETTE_SAMPLE pixels in the quantization mode.
+    """
+    step = max(1, math.ceil(math.sqrt(img.width * img.height / TILE_PALETTE_SAMPLE)))
+    small = img.resize((max(1, img.width // step), max(1, img.height // step)), Image.NEAREST)
+    return small.convert('L' if mode == 'L' else 'RGB')
+
+
+def _palette_image(img, colors, method, mode):
+    """
+    Build the shared palette from a subsample and return it as a 'P' image for Image.quantize.
+    """
+    sample = _subsample(img, mode)
+    if method in NUMPY_METHODS:
+        pixels = np.asarray(sample.convert('RGB')).reshape(-1, 3)
+        entries = numpy_palette(pixels, colors, method, mode).flatten().tolist()
+    else:
+        entries = sample.quantize(colors=colors, method=method, dither=0).getpalette()[:3 * colors]
+    pal_img = Image.new('P', (1, 1))
+    pal_img.putpalette(entries)
+    return pal_img
+
+
+def _map_strip(img, pal_img, method, dither, mode, top, bottom, out):
+    """
+    Map rows top..bottom to palette indices into out, starting TILE_SEAM_ROWS earlier when
+    error-diffusing. Ordered dithering depends on the pixel position only and needs no seam rows.
+    Ordered and undithered NumPy mapping go through the palette LUT exactly as quantize_numpy does.
+    Strips are mapped as RGB: Pillow converts an 'L' image to 'P' by copying the gray levels
+    as indices instead of looking them up in the palette.
+    """
+    if dither in ORDERED_DITHERS or (method in NUMPY_METHODS and not dither):
+        palette = np.array(pal_img.getpalette(), dtype=np.uint8).reshape(-1, 3)
+        rgb = np.asarray(img.crop((0, top, img.width, bottom)).convert('RGB'))
+        bits = lut_bits(palette, mode)
+        lut = get_palette_lut(palette, bits)
+        if dither:
+            out[top:bottom] = ordered_dither_pixels(rgb, palette, lut, threshold_matrix(dither), top=top, bits=bits)
+        else:
+            out[top:bottom] = map_pixels(rgb, lut, bits)
+        return
+    start = max(0, top - TILE_SEAM_ROWS) if dither else top
+    strip = img.crop((0, start, img.width, bottom))
+    strip = strip.convert('RGB')
+    indices = np.asarray(strip.quantize(palette=pal_img, dither=Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE))
+    out[top:bottom] = indices[top - start:]
+
+
+@log_call
+def tile_quantize(img, colors, method, dither, mode):
+    """
+    Quantize a large image with one subsample palette and strip-parallel mapping.
+    Args:
+        img (PIL.Image): Image to quantize.
+        colors (int): Number of palette entries.
+        method (int): Quantization method (0-4).
+        dither (int): 0=None, 1=Floyd-Steinberg, or a key of ORDERED_DITHERS.
+        mode (str): 'L' quantizes the luminance only, anything else quantizes RGB.
+    Returns:
+        PIL.Image: Palette ('P') image.
+    """
+    img.load()
+    pal_img = _palette_image(img, colors, method, mode)
+    if mode == 'L' and img.mode != 'L':
+        img = img.convert('L')
+    out = np.empty((img.height, img.width), dtype=np.uint8)
+    rows = max(TILE_MIN_STRIP_ROWS, math.ceil(img.height / usable_cpus()))
+    futures = [_thread_pool().submit(_map_strip, img, pal_img, method, dither, mode, top, min(top + rows, img.height), out)
+               for top in range(0, img.height, rows)]
+    for future in futures:
+        future.result()
+    result = Image.fromarray(out, 'P')
+    result.putpalette(pal_img.getpalette()[:3 * colors])
+    return result
+
+
+def _adler32_combine(adler1, adler2, len2):
+    """
+    Combine the Adler-32 checksums of two consecutive buffers (zlib's adler32_combine).
+    """
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xffff
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 += (adler2 & 0xffff) + _ADLER_BASE - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - rem
+    return (sum1 % _ADLER_BASE) | ((sum2 % _ADLER_BASE) << 16)
+
+
+def _pack_rows(indices, bits):
+    """
+    Pack (H, W) palette indices into PNG scanlines of the given bit depth, each prefixed with filter type 0.
+    """
+    height, width = indices.shape
+    if bits < 8:
+        per_byte = 8 // bits
+        padded = np.zeros((height, math.ceil(width / per_byte) * per_byte), dtype=np.uint8)
+        padded[:, :width] = indices
+        groups = padded.reshape(height, -1, per_byte)
+        packed = np.zeros(groups.shape[:2], dtype=np.uint8)
+        for i in range(per_byte):
+            packed |= groups[:, :, i] << (8 - bits * (i + 1))
+        indices = packed
+    rows = np.zeros((height, indices.shape[1] + 1), dtype=np.uint8)
+    rows[:, 1:] = indices
+    return rows.tobytes()
+
+
+def _deflate_chunk(indices, bits, level, dictionary, last):
+    """
+    Compress one row chunk as a raw deflate block sequence ending on a byte boundary.
+    Returns:
+        tuple: (compressed bytes, adler32 of the raw data, raw length)
+    """
+    raw = _pack_rows(indices, bits)
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zdict=dictionary) if dictionary else \
+        zlib.compressobj(level, zlib.DEFLATED, -15, 9)
+    data = comp.compress(raw) + comp.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(raw), len(raw)
+
+
+@contextlib.contextmanager
+def _open_output(out_file):
+    """
+    Yield a writable binary stream: file objects are written in place and left open.
+    """
+    if hasattr(out_file, 'write'):
+        yield out_file
+    else:
+        with open(out_file, 'wb') as f:
+            yield f
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+@log_call
+def write_png_parallel(img, out_file, level=9):
+    """
+    Write a 'P' image as PNG, compressing row chunks on the thread pool.
+    Each chunk is a raw deflate stream primed with the previous chunk's last 32 KiB (as pigz does),
+    so the concatenation is one valid zlib stream with a combined Adler-32.
+    Args:
+        img (PIL.Image): Palette image.
+        out_file (Path, str or file object): Output file, e.g. a BytesIO for archive members.
+        level (int): zlib compression level.
+    """
+    palette = img.getpalette() or []
+    colors = max(1, min(len(palette) // 3, 256))
+    bits = 1 if colors <= 2 else 2 if colors <= 4 else 4 if colors <= 16 else 8
+    indices = np.asarray(img)
+    row_bytes = math.ceil(img.width * bits / 8) + 1
+    rows = max(1, ZLIB_CHUNK_BYTES // row_bytes)
+    bounds = [(top, min(top + rows, img.height)) for top in range(0, img.height, rows)]
+    # The dictionary of a chunk is the raw tail of the previous one, which is cheap to pack directly
+    tails = [None] + [_pack_rows(indices[max(top, bottom - ZLIB_WINDOW // row_bytes - 1):bottom], bits)[-ZLIB_WINDOW:]
+                      for top, bottom in bounds[:-1]]
+    futures = [_thread_pool().submit(_deflate_chunk, indices[top:bottom], bits, level, tail, i == len(bounds) - 1)
+               for i, ((top, bottom), tail) in enumerate(zip(bounds, tails))]
+    flevel = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    header = 0x78 << 8 | flevel << 6
+    header += 31 - header % 31
+    adler = 1
+    with _open_output(out_file) as f:
+        f.write(_PNG_SIGNATURE)
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', img.width, img.height, bits, 3, 0, 0, 0)))
+        f.write(_png_chunk(b'PLTE', bytes(palette[:3 * colors])))
+        for i, future in enumerate(futures):
+            data, chunk_adler, length = future.result()
+            adler = _adler32_combine(adler, chunk_adler, length)
+            if i == 0:
+                data = struct.pack('>H', header) + data
+            if i == len(futures) - 1:
+                data += struct.pack('>I', adler)
+            f.write(_png_chunk(b'IDAT', data))
+        f.write(_png_chunk(b'IEND', b''))
@@ -0,0 +1,90 @@
+"""
+This module parses output variants for A2P_Cli (--variant, or --variant @options for the
+[VARIANTS] section of options.ini).
+A variant is a name plus option overrides, e.g. 'q4:qb_color=4' or 'proof:grayscale=true,qb_gray=4'.
+With variants, every input is decoded and classified once and written once per variant,
+each variant into its own output tree named after it.
+"""
+
+import re
+from logic.config import OPTION_VALIDATORS
+
+# Options a variant may override; 'grayscale' converts colour images to gray (a grayscale proof)
+VARIANT_KEYS = ('qb_color', 'qb_gray_color', 'qb_gray', 'method', 'dither', 'output_format', 'grayscale')
+
+# --variant value that stands for all variants of the [VARIANTS] section of options.ini
+OPTIONS_VARIANTS = '@options'
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+def _parse_variant_value(key, text):
+    """
+    Convert one 'key=value' value of a variant spec to its option value.
+    """
+    text = text.strip()
+    if text.lower() in ('', 'none'):
+        return None
+    if key == 'grayscale':
+        if text.lower() not in ('true', 'false', '1', '0', 'y', 'n'):
+            raise ValueError(f"invalid value '{text}' for 'grayscale' (use true or false)")
+        return text.lower() in ('true', '1', 'y')
+    if key == 'output_format':
+        return text.lower()
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"invalid value '{text}' for '{key}'") from None
+
+
+def parse_variant(spec):
+    """
+    Parse a variant spec 'NAME' or 'NAME:key=value,key=value'.
+    Args:
+        spec (str): Variant spec.
+    Returns:
+        dict: {'name': str, 'options': dict}
+    Raises:
+        ValueError: If the name is not a plain folder name or an override is invalid.
+    """
+    name, _, overrides = spec.partition(':')
+    name = name.strip()
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"invalid variant name '{name}' (letters, digits, '_', '.', '-')")
+    options = {}
+    for item in filter(None, (part.strip() for part in overrides.split(','))):
+        key, sep, text = item.partition('=')
+        key = key.strip().lower()
+        if not sep or key not in VARIANT_KEYS:
+            raise ValueError(f"unsupported override '{item}' in variant '{name}' (keys: {', '.join(VARIANT_KEYS)})")
+        value = _parse_variant_value(key, text)
+        if key != 'grayscale' and value is not None and not OPTION_VALIDATORS[key](value):
+            raise ValueError(f"invalid value '{text.strip()}' for '{key}' in variant '{name}'")
+        options[key] = value
+    return {'name': name, 'options': options}
+
+
+def parse_variants(specs):
+    """
+    Parse a list of variant specs, rejecting duplicate names.
+    Args:
+        specs (list): Variant specs (see parse_variant).
+    Returns:
+        list: Parsed variants in the given order.
+    Raises:
+        ValueError: If a spec is invalid or a name is used twice.
+    """
+    variants = [parse_variant(spec) for spec in specs]
+    names = [v['name'] for v in variants]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate variant name(s): {', '.join(duplicates)}")
+    return variants
+
+
+def format_variant(variant):
+    """
+    Return the spec string of a parsed variant (the inverse of parse_variant).
+    """
+    overrides = ','.join(f"{k}={v}" for k, v in variant['options'].items())
+    return f"{variant['name']}:{overrides}" if overrides else variant['name']
@@ -0,0 +1,118 @@
+"""
+This module defines the output writer registry for A2P_Cli.
+Each writer maps a format name to a file extension, a Pillow encoder with its save options,
+and a declared speed/size profile so formats can be compared (see benchmark.py).
+"""
+
+from logic.logging_config import log_call
+from logic.tiles import use_tiles, write_png_parallel
+
+# Ordered scales used by the writer profiles (first entry is best)
+SPEED_SCALE = ('fastest', 'fast', 'medium', 'slow')
+SIZE_SCALE = ('smallest', 'small', 'medium', 'large')
+
+OUTPUT_WRITERS = {}
+
+
+def register_writer(name, extension, pil_format, save_options=None, modes=None, encode_speed='medium', size='medium', description=''):
+    """
+    Register an output writer.
+    Args:
+        name (str): Format name used by --format and options.ini.
+        extension (str): Output file extension including the dot.
+        pil_format (str): Pillow format identifier passed to Image.save.
+        save_options (dict, optional): Keyword arguments passed to Image.save.
+        modes (tuple, optional): Image modes the encoder accepts; None means any mode.
+        encode_speed (str): Encode speed rating from SPEED_SCALE.
+        size (str): Output size rating from SIZE_SCALE.
+        description (str): Human readable description for help/menus.
+    """
+    if encode_speed not in SPEED_SCALE:
+        raise ValueError(f"Unknown encode speed rating '{encode_speed}' for writer '{name}'")
+    if size not in SIZE_SCALE:
+        raise ValueError(f"Unknown size rating '{size}' for writer '{name}'")
+    OUTPUT_WRITERS[name] = {
+        'name': name,
+        'extension': extension,
+        'pil_format': pil_format,
+        'save_options': dict(save_options or {}),
+        'modes': tuple(modes) if modes else None,
+        'encode_speed': encode_speed,
+        'size': size,
+        'description': description,
+    }
+
+
+register_writer('png', '.png', 'PNG', {'optimize': True}, encode_speed='slow', size='small',
+                description='PNG, optimized (default)')
+register_writer('png-fast', '.png', 'PNG', {'compress_level': 1}, encode_speed='fast', size='large',
+                description='PNG, zlib level 1')
+# For lossless WebP, quality selects encoder effort rather than fidelity
+register_writer('webp', '.webp', 'WEBP', {'lossless': True, 'quality': 50, 'method': 2}, modes=('RGB', 'RGBA'),
+                encode_speed='medium', size='smallest', description='Lossless WebP')
+register_writer('webp-fast', '.webp', 'WEBP', {'lossless': True, 'quality': 0, 'method': 0}, modes=('RGB', 'RGBA'),
+                encode_speed='fastest', size='small', description='Lossless WebP, lowest effort')
+register_writer('tiff', '.tiff', 'TIFF', {'compression': 'tiff_adobe_deflate'}, encode_speed='medium', size='medium',
+                description='TIFF, deflate (keeps indexed/grayscale modes)')
+
+
+def get_writer(name):
+    """
+    Return the registered writer for a format name.
+    Args:
+        name (str or None): Format name; None selects PNG.
+    Returns:
+        dict: Writer description.
+    Raises:
+        ValueError: If the format is not registered.
+    """
+    key = 'png' if name in (None, '') else str(name).lower()
+    if key not in OUTPUT_WRITERS:
+        raise ValueError(f"Unknown output format '{name}'. Available: {', '.join(OUTPUT_WRITERS)}")
+    return OUTPUT_WRITERS[key]
+
+
+def get_extension(name):
+    """
+    Return the file extension for a format name.
+    Args:
+        name (str or None): Format name; None selects PNG.
+    Returns:
+        str: File extension including the dot.
+    """
+    return get_writer(name)['extension']
+
+
+def _prepare_for_writer(img, writer):
+    """
+    Convert an image to a mode the writer accepts, keeping transparency when present.
+    Args:
+        img (PIL.Image): Image to write.
+        writer (dict): Writer description.
+    Returns:
+        PIL.Image: Image in a supported mode.
+    """
+    modes = writer['modes']
+    if modes is None or img.mode in modes:
+        return img
+    has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+    target = 'RGBA' if has_alpha and 'RGBA' in modes else modes[0]
+    return img.convert(target)
+
+
+@log_call
+def write_image(img, out_file, output_format=None):
+    """
+    Encode an image with the selected writer.
+    Large palette images bound for PNG are compressed in parallel row chunks (see logic/tiles.py).
+    Args:
+        img (PIL.Image): Image to write.
+        out_file (Path, str or file object): Output file.
+        output_format (str, optional): Format name; defaults to PNG.
+    """
+    writer = get_writer(output_format)
+    if writer['pil_format'] == 'PNG' and img.mode == 'P' and use_tiles(img) and 'transparency' not in img.info:
+        options = writer['save_options']
+        write_png_parallel(img, out_file, 9 if options.get('optimize') else options.get('compress_level', 6))
+        return
+    _prepare_for_writer(img, writer).save(out_file, writer['pil_format'], **writer['save_options'])
@@ -1,28 +1,24 @@
-# Clear log file at app launch
-with open("a2pcli.log", "w") as f:
-    f.write("")
-
-import logging
-logging.basicConfig(
-    filename="a2pcli.log",
-    filemode="a",
-    level=logging.DEBUG,
-    format="%(asctime)s %(levelname)s %(message)s"
-)
-
 import sys
+from logic.logging_config import logging_options, setup_logging, shutdown_logging
 
 def main():
     """
     Entry point for A2P_Cli.
     Runs GUI if no arguments are given, otherwise runs CLI/script mode.
+    Logging is set up here rather than at import time: with the spawn start method every
+    worker re-imports this module, and must not truncate or reopen the log file.
+    --log_level/--log_json are read first, so every record uses the requested level and format.
     """
-    if len(sys.argv) == 1:
-        from gui.qt_app import run as main_menu_run
-        main_menu_run()
-    else:
-        from cli.script_mode import run as script_mode_run
-        script_mode_run()
+    setup_logging(**logging_options(sys.argv[1:]))
+    try:
+        if len(sys.argv) == 1:
+            from gui.qt_app import run as main_menu_run
+            main_menu_run()
+        else:
+            from cli.script_mode import run as script_mode_run
+            script_mode_run()
+    finally:
+        shutdown_logging()
 
 if __name__ == "__main__":
     import multiprocessing
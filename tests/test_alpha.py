@@ -0,0 +1,82 @@
+"""
+Alpha handling, checked on the written PNG: an opaque channel is dropped, binary alpha becomes
+a tRNS key (colour or palette entry) covering exactly the transparent pixels, and partial alpha
+is kept when the image is not quantized.
+"""
+
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from logic.convert import convert_single_image
+
+WIDTH, HEIGHT = 64, 48
+
+
+def _source(mode, alpha_kind):
+    rng = np.random.default_rng(6)
+    if alpha_kind == 'opaque':
+        alpha = np.full((HEIGHT, WIDTH), 255, dtype=np.uint8)
+    elif alpha_kind == 'binary':
+        alpha = np.where(rng.random((HEIGHT, WIDTH)) < 0.3, 0, 255).astype(np.uint8)
+    else:
+        alpha = rng.integers(0, 256, (HEIGHT, WIDTH), dtype=np.uint8)
+    if mode == 'RGBA':
+        base = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    else:
+        base = np.dstack([np.tile(np.linspace(0, 255, WIDTH).astype(np.uint8), (HEIGHT, 1))] * 3)
+    return np.dstack([base, alpha])
+
+
+def _convert(pixels, **options):
+    src = io.BytesIO()
+    Image.fromarray(pixels, 'RGBA').save(src, 'WEBP', lossless=True)
+    src.seek(0)
+    src.name = 'input.webp'
+    out = io.BytesIO()
+    out.name = 'output.png'
+    assert convert_single_image(src, out, True, **options)
+    out.seek(0)
+    decoded = Image.open(out)
+    decoded.load()
+    return decoded
+
+
+# 'RGBA' sources are colour images; 'LA' sources have R == G == B and are written as gray
+QUANTIZE = [{}, {'qb_color': 4, 'qb_gray': 4, 'method': 3}]
+
+
+@pytest.mark.parametrize('mode', ['RGBA', 'LA'])
+@pytest.mark.parametrize('options', QUANTIZE)
+def test_opaque_alpha_is_dropped(mode, options):
+    decoded = _convert(_source(mode, 'opaque'), **options)
+    assert 'A' not in decoded.getbands()
+    assert 'transparency' not in decoded.info
+
+
+@pytest.mark.parametrize('mode', ['RGBA', 'LA'])
+@pytest.mark.parametrize('options', QUANTIZE)
+def test_binary_alpha_becomes_transparency_key(mode, options):
+    pixels = _source(mode, 'binary')
+    decoded = _convert(pixels, **options)
+    assert 'A' not in decoded.getbands()
+    key = decoded.info['transparency']
+    values = np.asarray(decoded)
+    if decoded.mode == 'RGB':
+        transparent = np.all(values == np.array(key, dtype=np.uint8), axis=-1)
+    else:
+        transparent = values == key
+    assert np.array_equal(transparent, pixels[..., 3] == 0)
+    if not options:
+        # Unquantized: the opaque pixels keep their values
+        channels = 3 if decoded.mode == 'RGB' else 1
+        opaque = pixels[..., 3] == 255
+        assert np.array_equal(values.reshape(HEIGHT, WIDTH, -1)[opaque], pixels[..., :channels][opaque])
+
+
+@pytest.mark.parametrize('mode,expected', [('RGBA', 'RGBA'), ('LA', 'LA')])
+def test_partial_alpha_is_kept(mode, expected):
+    pixels = _source(mode, 'full')
+    decoded = _convert(pixels)
+    assert decoded.mode == expected
+    assert np.array_equal(np.asarray(decoded.getchannel('A')), pixels[..., 3])
@@ -0,0 +1,85 @@
+"""
+Archive conversion: unsafe member names never become output paths, and a tar converted into a
+zip keeps one output member per input image.
+"""
+
+import io
+import tarfile
+import zipfile
+import numpy as np
+import pytest
+from PIL import Image
+from logic.archives import ArchiveSink, iter_archive_members
+from logic.convert import _safe_member_path, convert_archive
+
+NAMES = ['a.webp', 'dir/b.webp', 'dir/sub/c.webp', 'd.WEBP', 'e.webp']
+
+
+def _webp(seed):
+    buffer = io.BytesIO()
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 256, (16, 16, 3), dtype=np.uint8), 'RGB').save(buffer, 'WEBP', lossless=True)
+    return buffer.getvalue()
+
+
+def _tar(path, members):
+    with tarfile.open(path, 'w') as tf:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+@pytest.mark.parametrize('name', ['../x.avif', 'a/../../x.avif', 'a/../x.avif', '/x.avif', '/etc/a/x.avif'])
+def test_unsafe_member_names_are_rejected(name):
+    assert _safe_member_path(name) is None
+
+
+@pytest.mark.parametrize('name', ['x.avif', 'a/b/x.avif', './a/x.avif', 'a..b/x..avif'])
+def test_safe_member_names_are_kept(name):
+    rel = _safe_member_path(name)
+    assert rel is not None and not rel.is_absolute()
+
+
+def test_tar_and_zip_members_match(tmp_path):
+    members = [(name, _webp(i)) for i, name in enumerate(NAMES)] + [('notes.txt', b'not an image')]
+    tar = _tar(tmp_path / 'in.tar', members)
+    with zipfile.ZipFile(tmp_path / 'in.zip', 'w') as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    expected = members[:-1]
+    assert list(iter_archive_members(tar, {'.webp'})) == expected
+    assert list(iter_archive_members(tmp_path / 'in.zip', {'.webp'})) == expected
+
+
+@pytest.mark.parametrize('suffix', ['.tar', '.tar.gz', '.zip'])
+def test_archive_sink_keeps_every_member(tmp_path, suffix):
+    sink = ArchiveSink(tmp_path / f'out{suffix}')
+    files = {f'dir{i % 3}/f{i}.png': bytes([i]) * i for i in range(50)}
+    for name, data in files.items():
+        sink.add(name, data)
+    sink.close()
+    assert sink.count == len(files)
+    assert dict(iter_archive_members(tmp_path / f'out{suffix}', {'.png'})) == files
+
+
+def test_tar_to_zip_keeps_every_output(tmp_path):
+    tar = _tar(tmp_path / 'in.tar', [(name, _webp(i)) for i, name in enumerate(NAMES)])
+    result = convert_archive(str(tar), output_archive=str(tmp_path / 'out.zip'), silent=True, max_workers=2,
+                             input_formats='webp', qb_color=4)
+    assert (result['success'], result['fail']) == (len(NAMES), 0)
+    with zipfile.ZipFile(tmp_path / 'out.zip') as zf:
+        assert sorted(zf.namelist()) == sorted(name.rsplit('.', 1)[0] + '.png' for name in NAMES)
+        for name in zf.namelist():
+            with Image.open(io.BytesIO(zf.read(name))) as img:
+                assert img.format == 'PNG' and img.size == (16, 16)
+
+
+def test_unsafe_members_are_not_written(tmp_path):
+    tar = _tar(tmp_path / 'in.tar', [('ok.webp', _webp(1)), ('../escape.webp', _webp(2)), ('/abs.webp', _webp(3))])
+    out = tmp_path / 'nested' / 'out'
+    result = convert_archive(str(tar), output_dir=str(out), silent=True, max_workers=1, input_formats='webp')
+    assert result['success'] == 1
+    assert result['failed_files'] == sorted(['../escape.webp', '/abs.webp'])
+    assert [p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob('*.png')] == ['nested/out/ok.png']
@@ -0,0 +1,73 @@
+"""
+classify_image_type must agree with a full-frame scan in every input mode, whatever the
+strided sample sees.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+from logic.convert import CLASSIFY_SAMPLE_STRIDE, classify_image_type
+
+WIDTH, HEIGHT = 200, 150
+
+
+def _reference(img):
+    # Full scan: every pixel, no sampling or early exit
+    if img.mode in ('L', 'LA'):
+        levels = np.unique(np.asarray(img.getchannel('L')))
+    else:
+        rgb = np.asarray(img.convert('RGBA'))[..., :3].reshape(-1, 3)
+        if not np.all((rgb == rgb[:, :1]).all(axis=1)):
+            return 'color'
+        levels = np.unique(rgb[:, 0])
+    return 'grayscale+one' if len(levels) == 2 else 'grayscale'
+
+
+def _gray():
+    return np.tile(np.linspace(0, 255, WIDTH).astype(np.uint8), (HEIGHT, 1))
+
+
+def _images():
+    rng = np.random.default_rng(3)
+    gray = _gray()
+    two = np.where(gray > 127, 200, 30).astype(np.uint8)
+    off_gray = np.dstack([gray] * 3)
+    # Pixel (0, 0) sits between the nearest-neighbour sample points
+    off_gray[0, 0] = (10, 20, 10)
+    alpha = rng.integers(0, 256, gray.shape, dtype=np.uint8)
+    images = {
+        'rgb-color': Image.fromarray(rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8), 'RGB'),
+        'rgb-gray': Image.fromarray(np.dstack([gray] * 3), 'RGB'),
+        'rgb-two-levels': Image.fromarray(np.dstack([two] * 3), 'RGB'),
+        'rgb-off-gray': Image.fromarray(off_gray, 'RGB'),
+        'rgba-off-gray': Image.fromarray(np.dstack([off_gray, alpha]), 'RGBA'),
+        'rgba-gray': Image.fromarray(np.dstack([gray] * 3 + [alpha]), 'RGBA'),
+        'l-gray': Image.fromarray(gray, 'L'),
+        'l-two-levels': Image.fromarray(two, 'L'),
+        'la-two-levels': Image.fromarray(np.dstack([two, alpha]), 'LA'),
+        'la-gray': Image.fromarray(np.dstack([gray, alpha]), 'LA'),
+        'p-gray': Image.fromarray(np.dstack([gray] * 3), 'RGB').quantize(16),
+        'p-off-gray': Image.fromarray(off_gray, 'RGB').quantize(256, method=Image.Quantize.FASTOCTREE),
+        '1': Image.fromarray(gray, 'L').convert('1'),
+    }
+    return images
+
+
+@pytest.mark.parametrize('name', list(_images()))
+def test_classify_matches_full_scan(name):
+    img = _images()[name]
+    assert classify_image_type(img) == _reference(img)
+
+
+def test_off_gray_pixel_is_outside_sample():
+    img = _images()['rgb-off-gray']
+    sample = np.asarray(img.resize((WIDTH // CLASSIFY_SAMPLE_STRIDE, HEIGHT // CLASSIFY_SAMPLE_STRIDE), Image.NEAREST))
+    assert np.all((sample == sample[..., :1]).all(axis=-1))
+    assert classify_image_type(img) == 'color'
+
+
+@pytest.mark.parametrize('name,expected', [('rgb-two-levels', 'grayscale+one'), ('l-two-levels', 'grayscale+one'),
+                                           ('la-two-levels', 'grayscale+one'), ('1', 'grayscale+one'),
+                                           ('rgb-gray', 'grayscale'), ('rgb-color', 'color')])
+def test_expected_classes(name, expected):
+    assert classify_image_type(_images()[name]) == expected
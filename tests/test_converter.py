@@ -0,0 +1,21 @@
+"""
+In-memory Converter API: bytes in, bytes out, without dumping the payloads into the log.
+"""
+
+import io
+import logging
+from PIL import Image
+from logic.converter import Converter
+
+
+def test_convert_bytes_logs_sizes_not_payloads(caplog):
+    src = io.BytesIO()
+    Image.effect_noise((256, 256), 64).convert('RGB').save(src, 'WEBP', lossless=True)
+    data = src.getvalue()
+    caplog.set_level(logging.DEBUG)
+    with Converter(max_workers=1) as conv:
+        png = conv.convert_bytes(data)
+    with Image.open(io.BytesIO(png)) as decoded:
+        assert decoded.format == 'PNG' and decoded.size == (256, 256)
+    assert any(f"{len(data)} bytes in" in r.getMessage() for r in caplog.records)
+    assert all(len(r.getMessage()) < 1000 for r in caplog.records)
@@ -0,0 +1,49 @@
+"""
+Input sniffing: ISO-BMFF brands and the fallback when the sniffed decoder is unavailable.
+"""
+
+import io
+import pytest
+from PIL import Image
+import logic.decoders as decoders
+from logic.decoders import open_image, sniff_decoder
+
+
+def _ftyp(major, *compatible):
+    body = major + b'\x00\x00\x00\x00' + b''.join(compatible)
+    return (8 + len(body)).to_bytes(4, 'big') + b'ftyp' + body + b'\x00\x00\x00\x08meta'
+
+
+@pytest.mark.parametrize('header,expected', [
+    (_ftyp(b'avif', b'mif1', b'miaf'), 'avif'),
+    (_ftyp(b'mif1', b'mif1', b'miaf', b'MA1B', b'avif'), 'avif'),
+    (_ftyp(b'msf1', b'msf1', b'avis'), 'avif'),
+    (_ftyp(b'mif1', b'mif1', b'heic'), 'heic'),
+    (_ftyp(b'heic', b'mif1', b'heic'), 'heic'),
+])
+def test_sniff_reads_compatible_brands(header, expected):
+    src = io.BytesIO(header)
+    src.name = 'input.bin'
+    assert sniff_decoder(src) == expected
+    assert src.tell() == 0
+
+
+def _webp(name):
+    src = io.BytesIO()
+    Image.new('RGB', (8, 8), (10, 20, 30)).save(src, 'WEBP', lossless=True)
+    src.seek(0)
+    src.name = name
+    return src
+
+
+@pytest.mark.parametrize('name', ['x.webp', 'x.bin'])
+def test_unavailable_sniffed_decoder_falls_back(monkeypatch, name):
+    # A decoder that claims every file but has no Pillow format in this process
+    fake = {'name': 'fake', 'extensions': ('.fake',), 'pil_format': 'FAKE', 'sniff': lambda h: True, 'plugin': ''}
+    monkeypatch.setattr(decoders, 'DECODERS', {'fake': fake, **decoders.DECODERS})
+    monkeypatch.setitem(decoders.AVAILABLE_DECODERS, 'fake', False)
+    src = _webp(name)
+    assert sniff_decoder(src) == 'fake'
+    with open_image(src) as img:
+        assert img.format == 'WEBP'
+        assert img.getpixel((0, 0)) == (10, 20, 30)
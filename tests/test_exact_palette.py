@@ -0,0 +1,67 @@
+"""
+Images with no more colours than the requested palette are written as an exact palette:
+decoding the output gives back the input pixels. One colour more goes through quantization.
+"""
+
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from logic.convert import EXACT_PALETTE_MAX, convert_single_image, exact_colors
+
+WIDTH, HEIGHT = 64, 48
+
+
+def _with_colors(count, gray=False):
+    rng = np.random.default_rng(4)
+    if gray:
+        levels = np.sort(rng.choice(256, count, replace=False)).astype(np.uint8)
+        colors = np.repeat(levels[:, None], 3, axis=1)
+    else:
+        packed = rng.choice(1 << 24, count, replace=False)
+        colors = np.stack([packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF], axis=1).astype(np.uint8)
+    # Every colour appears at least once, in shuffled positions
+    picks = np.concatenate([np.arange(count), rng.integers(0, count, WIDTH * HEIGHT - count)])
+    return colors[rng.permutation(picks)].reshape(HEIGHT, WIDTH, 3)
+
+
+def _convert(pixels, **options):
+    src = io.BytesIO()
+    Image.fromarray(pixels, 'RGB').save(src, 'WEBP', lossless=True)
+    src.seek(0)
+    src.name = 'input.webp'
+    out = io.BytesIO()
+    out.name = 'output.png'
+    assert convert_single_image(src, out, True, **options)
+    out.seek(0)
+    with Image.open(out) as decoded:
+        return decoded.mode, np.asarray(decoded.convert('RGB'))
+
+
+@pytest.mark.parametrize('count,qb_color', [(2, 1), (16, 4), (100, 8), (EXACT_PALETTE_MAX, 8)])
+@pytest.mark.parametrize('method', [0, 2, 3])
+def test_fitting_colors_round_trip_exactly(count, qb_color, method):
+    pixels = _with_colors(count)
+    mode, decoded = _convert(pixels, qb_color=qb_color, method=method, dither=1)
+    assert mode == 'P'
+    assert np.array_equal(decoded, pixels)
+
+
+@pytest.mark.parametrize('count', [2, 16, 200])
+def test_fitting_gray_levels_round_trip_exactly(count):
+    pixels = _with_colors(count, gray=True)
+    # Two levels are classified 'grayscale+one' (qb_gray_color), more are 'grayscale' (qb_gray)
+    mode, decoded = _convert(pixels, qb_gray=8, qb_gray_color=8, method=3, dither=1)
+    assert mode == 'P'
+    assert np.array_equal(decoded, pixels)
+
+
+def test_one_color_too_many_is_quantized():
+    pixels = _with_colors(EXACT_PALETTE_MAX + 1)
+    image = Image.fromarray(pixels, 'RGB')
+    assert exact_colors(image, 'RGB', EXACT_PALETTE_MAX) is None
+    assert len(exact_colors(image, 'RGB', EXACT_PALETTE_MAX + 1)) == EXACT_PALETTE_MAX + 1
+    mode, decoded = _convert(pixels, qb_color=8, method=3, dither=0)
+    assert mode == 'P'
+    assert len(np.unique(decoded.reshape(-1, 3), axis=0)) <= EXACT_PALETTE_MAX
+    assert not np.array_equal(decoded, pixels)
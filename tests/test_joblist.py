@@ -0,0 +1,76 @@
+"""
+Job lists: plain paths and NDJSON records, per-record overrides and output paths, and
+malformed lines counted as failures instead of stopping the run.
+"""
+
+import json
+import numpy as np
+import pytest
+from PIL import Image
+from logic.convert import convert_job_list
+from logic.joblist import parse_job_line
+
+
+def test_plain_path_line():
+    assert parse_job_line('  photos/a b.avif \n') == {'input': 'photos/a b.avif', 'output': None, 'options': {}}
+
+
+@pytest.mark.parametrize('line', ['', '   ', '# comment', '  # indented comment'])
+def test_blank_and_comment_lines_are_skipped(line):
+    assert parse_job_line(line) is None
+
+
+def test_json_record_with_overrides_and_output():
+    line = json.dumps({'input': 'a/b.avif', 'output': 'out/b.webp', 'qb_color': 4, 'method': 3, 'output_format': 'webp'})
+    assert parse_job_line(line) == {'input': 'a/b.avif', 'output': 'out/b.webp',
+                                    'options': {'qb_color': 4, 'method': 3, 'output_format': 'webp'}}
+    assert parse_job_line('{"input": "c.avif"}') == {'input': 'c.avif', 'output': None, 'options': {}}
+
+
+@pytest.mark.parametrize('line,message', [
+    ('{"input": "a.avif", ', None),
+    ('{"output": "a.png"}', "no 'input'"),
+    ('{"input": ""}', "no 'input'"),
+    ('{"input": "a.avif", "remove": true}', "unsupported key 'remove'"),
+    ('{"input": "a.avif", "qb_color": 12}', "invalid value 12 for 'qb_color'"),
+    ('{"input": "a.avif", "output_format": "bmp"}', "'output_format'"),
+])
+def test_malformed_records_raise(line, message):
+    with pytest.raises(ValueError, match=message):
+        parse_job_line(line)
+
+
+def _colors(path):
+    with Image.open(path) as img:
+        return img.format, len(img.convert('RGB').getcolors(1 << 24))
+
+
+def test_convert_job_list(tmp_path):
+    rng = np.random.default_rng(7)
+    src = tmp_path / 'in'
+    (src / 'sub').mkdir(parents=True)
+    for name in ('a.webp', 'sub/b.webp', 'c.webp'):
+        Image.fromarray(rng.integers(0, 256, (32, 32, 3), dtype=np.uint8), 'RGB').save(src / name, 'WEBP', lossless=True)
+    lines = [
+        'a.webp',
+        json.dumps({'input': 'sub/b.webp', 'qb_color': 1}),
+        json.dumps({'input': 'c.webp', 'output': str(tmp_path / 'elsewhere' / 'c_small.webp'), 'output_format': 'webp'}),
+        '{"input": "broken.webp"',
+        json.dumps({'input': 'a.webp', 'dither': 'strong'}),
+        'missing.webp',
+        '',
+    ]
+    job_list = tmp_path / 'jobs.txt'
+    job_list.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    out = tmp_path / 'out'
+    result = convert_job_list(str(job_list), input_dir=str(src), output_dir=str(out), silent=True, max_workers=1, qb_color=3)
+    assert result['success'] == 3
+    # Malformed lines are reported as source:line, conversion failures by their listed path
+    assert result['failed_files'] == sorted([f'{job_list}:4', f'{job_list}:5', 'missing.webp'])
+    assert result['fail'] == 3
+    fmt, colors = _colors(out / 'a.png')
+    assert fmt == 'PNG' and 2 < colors <= 8
+    # The record's qb_color overrides the run default; relative folders are kept
+    assert _colors(out / 'sub' / 'b.png') == ('PNG', 2)
+    assert _colors(tmp_path / 'elsewhere' / 'c_small.webp')[0] == 'WEBP'
+    assert not (out / 'c.png').exists()
@@ -0,0 +1,18 @@
+"""
+options.ini round trips: saving a settings section must keep the case of variant names.
+"""
+
+import logic.options_io as options_io
+from logic.options_io import load_options, load_variants, save_options, save_variants
+
+
+def test_mixed_case_variants_survive_option_saves(monkeypatch, tmp_path):
+    monkeypatch.setattr(options_io, 'get_options_path', lambda: tmp_path / 'options.ini')
+    specs = ['Thumbs_HQ:qb_color=6', 'webLow:output_format=webp', 'plain']
+    save_variants(specs)
+    save_options('CLI', {'qb_color': 4, 'method': None, 'recursive': True, 'input_dir': 'skipped'})
+    assert load_variants() == specs
+    assert load_options('CLI') == {'qb_color': 4, 'method': None, 'recursive': True}
+    save_variants(specs[:1])
+    assert load_variants() == specs[:1]
+    assert load_options('CLI')['qb_color'] == 4
@@ -0,0 +1,70 @@
+"""
+Plan headers: AVIF/HEIC dimensions come from the primary item's properties, not from the
+first or largest 'ispe' bytes found anywhere in the header.
+"""
+
+import io
+import struct
+import pytest
+from PIL import Image
+import logic.planner as planner
+from logic.planner import _ispe_size, read_header
+
+
+def _box(box_type, payload):
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+
+def _full_box(box_type, payload, version=0, flags=0):
+    return _box(box_type, bytes([version]) + flags.to_bytes(3, 'big') + payload)
+
+
+def _heif(primary, items, rotation=None):
+    """
+    Build an ftyp + meta header. items: {item_ID: (width, height)}; the primary item may also get an irot.
+    """
+    properties, associations = [], []
+    for item, (width, height) in items.items():
+        properties.append(_full_box(b'ispe', struct.pack('>II', width, height)))
+        indices = [len(properties)]
+        if item == primary and rotation is not None:
+            properties.append(_box(b'irot', bytes([rotation])))
+            indices.append(len(properties) | 0x80)
+        associations.append(struct.pack('>HB', item, len(indices)) + bytes(indices))
+    ipma = _full_box(b'ipma', struct.pack('>I', len(items)) + b''.join(associations))
+    iprp = _box(b'iprp', _box(b'ipco', b''.join(properties)) + ipma)
+    meta = _full_box(b'meta', _full_box(b'hdlr', bytes(8) + b'pict' + bytes(13)) + _full_box(b'pitm', struct.pack('>H', primary)) + iprp)
+    return _box(b'ftyp', b'mif1' + bytes(4) + b'mif1avif') + meta
+
+
+def test_primary_item_wins_over_larger_items():
+    # Item 2 (say a depth map or an unreferenced item) is larger than the primary image
+    assert _ispe_size(_heif(1, {2: (4000, 3000), 1: (640, 480)})) == (640, 480)
+
+
+@pytest.mark.parametrize('rotation,expected', [(0, (640, 480)), (1, (480, 640)), (2, (640, 480)), (3, (480, 640))])
+def test_irot_swaps_extents(rotation, expected):
+    assert _ispe_size(_heif(1, {1: (640, 480)}, rotation)) == expected
+
+
+@pytest.mark.parametrize('header', [
+    _heif(1, {1: (640, 480)})[:60],  # meta cut off by the header limit
+    _heif(3, {1: (640, 480)}),  # primary item without properties
+    _box(b'ftyp', b'avif' + bytes(4)) + b'ispe' + struct.pack('>II', 1, 1),  # stray bytes, no meta
+])
+def test_unparsed_header_returns_none(header):
+    assert _ispe_size(header) is None
+
+
+def test_read_header_falls_back_to_pillow(monkeypatch, tmp_path):
+    buffer = io.BytesIO()
+    Image.new('RGB', (70, 40)).save(buffer, 'AVIF')
+    path = tmp_path / 'x.avif'
+    path.write_bytes(buffer.getvalue())
+    entry = read_header(path)
+    assert (entry['decoder'], entry['width'], entry['height']) == ('avif', 70, 40)
+    # With 'meta' cut off by the header limit the walk fails and Pillow reads the size
+    monkeypatch.setattr(planner, 'PLAN_HEADER_BYTES', 64)
+    assert _ispe_size(path.read_bytes()[:64]) is None
+    entry = read_header(path)
+    assert (entry['decoder'], entry['width'], entry['height'], entry.get('error')) == ('avif', 70, 40, None)
@@ -0,0 +1,86 @@
+"""
+Quantization precision: grayscale output must be able to use every level that was requested.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+import logic.tiles as tiles
+from logic.convert import quantize_image
+from logic.quantize import (GRAY_LUT_BITS, KMEANS_METHOD, LUT_FINE_MIN_COLORS, WU_METHOD, get_palette_lut, lut_bits,
+                            map_pixels)
+
+
+def _ramp():
+    return Image.fromarray(np.tile(np.arange(256, dtype=np.uint8), (64, 4)), 'L')
+
+
+def _levels_and_error(img_q, src):
+    indices = np.asarray(img_q)
+    palette = np.array(img_q.getpalette(), dtype=np.int32).reshape(-1, 3)[:, 0]
+    return len(np.unique(indices)), np.abs(palette[indices] - np.asarray(src, dtype=np.int32)).mean()
+
+
+@pytest.mark.parametrize('method', [WU_METHOD, KMEANS_METHOD])
+@pytest.mark.parametrize('bits', [5, 6, 7, 8])
+def test_gray_levels_used_match_requested(method, bits):
+    ramp = _ramp()
+    levels, error = _levels_and_error(quantize_image(ramp, 2 ** bits, 'L', method, 0), ramp)
+    assert levels == 2 ** bits
+    assert error <= 256 / 2 ** bits / 4 + 0.01
+
+
+@pytest.mark.parametrize('method', [WU_METHOD, KMEANS_METHOD])
+def test_tiled_gray_levels_used_match_requested(monkeypatch, method):
+    monkeypatch.setattr(tiles, 'TILE_MIN_PIXELS', 1)
+    ramp = _ramp()
+    levels, _ = _levels_and_error(quantize_image(ramp, 128, 'L', method, 0), ramp)
+    assert levels == 128
+
+
+@pytest.mark.parametrize('method', [0, 1, WU_METHOD, KMEANS_METHOD])
+@pytest.mark.parametrize('dither', [2, 3, 4])
+@pytest.mark.parametrize('tiled', [False, True])
+def test_ordered_dither_gray_reaches_fine_palette(monkeypatch, method, dither, tiled):
+    if tiled:
+        monkeypatch.setattr(tiles, 'TILE_MIN_PIXELS', 1)
+    ramp = _ramp()
+    levels, _ = _levels_and_error(quantize_image(ramp, 128, 'L', method, dither), ramp)
+    assert levels > 32
+
+
+@pytest.mark.parametrize('dither', [2, 3, 4])
+def test_ordered_dither_rgb_reaches_dense_palette(dither):
+    # All colours inside one 32-wide cube: a 5-bit LUT has 64 cells there (plus the ones the
+    # threshold offsets reach) for 128 Pillow entries
+    rng = np.random.default_rng(2)
+    img = Image.fromarray(rng.integers(96, 128, (128, 128, 3), dtype=np.uint8), 'RGB')
+    img_q = quantize_image(img, 128, 'RGB', 0, dither)
+    assert len(np.unique(np.asarray(img_q))) > 0.9 * 128
+
+
+def test_lut_resolution_follows_palette():
+    gray = np.repeat(np.arange(0, 256, 2, dtype=np.uint8)[:, None], 3, axis=1)
+    assert lut_bits(gray, 'L') == GRAY_LUT_BITS
+    assert lut_bits(gray[:LUT_FINE_MIN_COLORS], 'RGB') == 5
+    # Entries 4 apart share 5-bit cells; with the 6-bit LUT every entry maps back to itself
+    dense = np.stack(np.meshgrid(*[np.arange(96, 112, 4, dtype=np.uint8)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    bits = lut_bits(dense, 'RGB')
+    assert bits == 6
+    indices = map_pixels(dense[None], get_palette_lut(dense, bits), bits)[0]
+    assert np.array_equal(indices, np.arange(len(dense)))
+
+
+@pytest.mark.parametrize('method', [WU_METHOD, KMEANS_METHOD])
+@pytest.mark.parametrize('tiled', [False, True])
+def test_dense_rgb_palette_maps_near_nearest(monkeypatch, method, tiled):
+    if tiled:
+        monkeypatch.setattr(tiles, 'TILE_MIN_PIXELS', 1)
+    rng = np.random.default_rng(2)
+    src = rng.integers(64, 192, (128, 128, 3), dtype=np.uint8)
+    img_q = quantize_image(Image.fromarray(src, 'RGB'), 256, 'RGB', method, 0)
+    palette = np.array(img_q.getpalette()[:768], dtype=np.int32).reshape(-1, 3)
+    error = np.abs(palette[np.asarray(img_q)] - src).sum(-1).mean()
+    distances = ((src.reshape(-1, 1, 3).astype(np.int32) - palette[None]) ** 2).sum(-1)
+    nearest = np.abs(palette[distances.argmin(1)] - src.reshape(-1, 3)).sum(-1).mean()
+    assert error <= 1.02 * nearest
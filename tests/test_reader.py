@@ -0,0 +1,71 @@
+"""
+Input readers: every reader hands the decoder the same bytes, and open_image decodes from any of them.
+"""
+
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from logic.decoders import open_image
+from logic.reader import READERS, _MappedFile, read_delta, read_input, read_totals
+
+
+@pytest.fixture
+def webp_file(tmp_path):
+    rng = np.random.default_rng(8)
+    pixels = rng.integers(0, 256, (40, 30, 3), dtype=np.uint8)
+    path = tmp_path / 'input.webp'
+    Image.fromarray(pixels, 'RGB').save(path, 'WEBP', lossless=True)
+    return path, pixels
+
+
+def _bytes(src):
+    if not hasattr(src, 'read'):
+        with open(src, 'rb') as f:
+            return f.read()
+    data = src.read()
+    src.seek(0)
+    return data
+
+
+@pytest.mark.parametrize('reader', list(READERS))
+def test_readers_return_the_file_bytes(webp_file, reader):
+    path, _ = webp_file
+    src = read_input(path, reader)
+    assert _bytes(src) == path.read_bytes()
+    if reader == 'path':
+        assert src == path
+    else:
+        assert src.name == str(path)
+        assert isinstance(src, _MappedFile if reader == 'mmap' else io.BytesIO)
+
+
+@pytest.mark.parametrize('reader', list(READERS))
+def test_open_image_with_each_reader(webp_file, reader):
+    path, pixels = webp_file
+    with open_image(path, reader) as img:
+        assert np.array_equal(np.asarray(img.convert('RGB')), pixels)
+
+
+def test_open_image_on_mapped_file(webp_file):
+    path, pixels = webp_file
+    mapped = read_input(path, 'mmap')
+    assert isinstance(mapped, _MappedFile)
+    with open_image(mapped) as img:
+        assert img.format == 'WEBP'
+        assert np.array_equal(np.asarray(img.convert('RGB')), pixels)
+
+
+def test_reads_are_counted(webp_file):
+    path, _ = webp_file
+    before = read_totals()
+    read_input(path, 'read')
+    read_input(path, 'mmap')
+    read_input(path, 'path')
+    delta = read_delta(before)
+    assert (delta['files'], delta['bytes']) == (2, 2 * path.stat().st_size)
+
+
+def test_unknown_reader(webp_file):
+    with pytest.raises(ValueError, match='Unknown reader'):
+        read_input(webp_file[0], 'stream')
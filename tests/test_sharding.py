@@ -0,0 +1,68 @@
+"""
+Sharding: every file lands in exactly one shard, independently of the process, and the merge
+of the shard result files flags missing and duplicate shards.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from logic.sharding import default_worker_id, merge_results, results_path, select_shard, shard_of, write_results
+
+FILES = [Path(f"dir{i % 7}") / f"sub{i % 3}" / f"image_{i:04d}.avif" for i in range(500)]
+
+
+def test_shard_of_is_stable_across_processes():
+    # A fresh interpreter has a different str hash seed; shard_of must not depend on it
+    code = ("from logic.sharding import shard_of; "
+            f"print(','.join(str(shard_of(p, 7)) for p in {[p.as_posix() for p in FILES[:50]]!r}))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parent.parent).stdout.strip()
+    assert output == ','.join(str(shard_of(p, 7)) for p in FILES[:50])
+    assert shard_of('dir1/sub1/image_0001.avif', 7) == shard_of(Path('dir1') / 'sub1' / 'image_0001.avif', 7)
+
+
+@pytest.mark.parametrize('n', [1, 2, 5, 16])
+def test_shards_cover_every_file_once(tmp_path, n):
+    files = [tmp_path / p for p in FILES]
+    shards = [select_shard(files, tmp_path, (k, n)) for k in range(1, n + 1)]
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    assert all(1 <= shard_of(p, n) <= n for p in FILES)
+    if n > 1:
+        assert all(shards)
+    assert select_shard(files, tmp_path, None) == files
+
+
+def _write(directory, shard, **counts):
+    worker_id = default_worker_id(shard)
+    record = {"worker_id": worker_id, "shard": f"{shard[0]}/{shard[1]}", "files": 10, "success": 9, "fail": 1,
+              "failed_files": [f"{worker_id}.avif"], "elapsed_seconds": 2.0, **counts}
+    path = results_path(directory, worker_id)
+    write_results(path, record)
+    return path
+
+
+def test_merge_complete_run(tmp_path):
+    for k in (1, 2, 3):
+        _write(tmp_path, (k, 3))
+    merged = merge_results([tmp_path])
+    assert merged["problems"] == []
+    assert (merged["files"], merged["success"], merged["fail"]) == (30, 27, 3)
+    assert len(merged["failed_files"]) == 3
+
+
+def test_merge_reports_missing_and_duplicate_shards(tmp_path):
+    first = _write(tmp_path, (1, 3))
+    duplicate = tmp_path / 'copy' / first.name
+    duplicate.parent.mkdir()
+    duplicate.write_bytes(first.read_bytes())
+    merged = merge_results([tmp_path, duplicate])
+    assert any("Shard 1/3 reported twice" in p for p in merged["problems"])
+    assert any(p == "Missing shards of 3: 2, 3" for p in merged["problems"])
+
+
+def test_merge_reports_mixed_shard_counts(tmp_path):
+    _write(tmp_path, (1, 2))
+    _write(tmp_path, (1, 1))
+    merged = merge_results([tmp_path])
+    assert any("different shard counts" in p for p in merged["problems"])
@@ -0,0 +1,70 @@
+"""
+Tiled (strip-parallel) quantization must give the same pixels as the untiled path.
+Images below TILE_PALETTE_SAMPLE build the same palette either way, so with several strips
+the result only depends on the strip mapping. Floyd-Steinberg strips restart their error state
+(seam rows), and Pillow's median cut / max coverage map to their own boxes instead of the
+nearest entry, so those combinations are not compared.
+"""
+
+import io
+import numpy as np
+import pytest
+from PIL import Image
+import logic.tiles as tiles
+from logic.convert import quantize_image
+
+COLORS = 16
+
+
+def _images():
+    rng = np.random.default_rng(1)
+    gray = np.tile(np.linspace(0, 255, 320).astype(np.uint8), (240, 1))
+    rgb = np.dstack([gray, gray[::-1], rng.integers(0, 256, gray.shape, dtype=np.uint8)])
+    return {'L': Image.fromarray(gray, 'L'), 'RGB': Image.fromarray(rgb, 'RGB')}
+
+
+def _pixels(img_q):
+    palette = np.array(img_q.getpalette()[:3 * COLORS], dtype=np.uint8).reshape(-1, 3)
+    indices = np.asarray(img_q)
+    assert indices.max() < COLORS
+    return palette[indices]
+
+
+@pytest.fixture
+def strips(monkeypatch):
+    # Force several strips on any machine
+    monkeypatch.setattr(tiles, 'TILE_MIN_STRIP_ROWS', 16)
+    monkeypatch.setattr(tiles, 'usable_cpus', lambda: 8)
+    return monkeypatch
+
+
+@pytest.mark.parametrize('mode', ['L', 'RGB'])
+@pytest.mark.parametrize('method,dither', [(2, 0), (3, 0), (4, 0)] + [(m, d) for m in range(5) for d in (2, 3, 4)])
+def test_tiled_matches_untiled(strips, mode, method, dither):
+    img = _images()[mode]
+    strips.setattr(tiles, 'TILE_MIN_PIXELS', 1 << 40)
+    untiled = quantize_image(img, COLORS, mode, method, dither)
+    strips.setattr(tiles, 'TILE_MIN_PIXELS', 1)
+    tiled = quantize_image(img, COLORS, mode, method, dither)
+    assert np.array_equal(_pixels(tiled), _pixels(untiled))
+
+
+@pytest.mark.parametrize('dither', [0, 1])
+def test_tiled_gray_maps_through_palette(strips, dither):
+    img = _images()['L']
+    strips.setattr(tiles, 'TILE_MIN_PIXELS', 1)
+    tiled = quantize_image(img, 4, 'L', 2, dither)
+    assert np.asarray(tiled).max() < 4
+    error = np.abs(_pixels(tiled)[..., 0].astype(int) - np.asarray(img)).mean()
+    assert error < 40
+
+
+def test_parallel_png_to_file_object(tmp_path):
+    img_q = quantize_image(_images()['RGB'], COLORS, 'RGB', 3, 0)
+    buffer = io.BytesIO()
+    tiles.write_png_parallel(img_q, buffer)
+    tiles.write_png_parallel(img_q, tmp_path / 'out.png')
+    assert buffer.getvalue() == (tmp_path / 'out.png').read_bytes()
+    buffer.seek(0)
+    with Image.open(buffer) as decoded:
+        assert np.array_equal(np.asarray(decoded), np.asarray(img_q))